@@ -1,60 +1,152 @@
 import asyncio
-from datetime import datetime, timedelta
-from typing import Dict
-from prediction_trader import trade_from_latest_prediction
-from models import User
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple, Union
+from prediction_trader import trade_from_latest_prediction, load_latest_prediction
+from binance_trader import symbol_filter_cache
+from prediction_watcher import PredictionWatcher
+from models import Prediction, User
+from prediction_store import PredictionSignals, as_signals
+from scheduler import scheduler, CATCH_UP_RUN_ONCE
 
-# Kullanıcıya ait asyncio task'larını tutan sözlük
-user_tasks: Dict[int, asyncio.Task] = {}
+# Aynı tick içinde aynı anda işlem yapan en fazla kullanıcı sayısı
+USER_CONCURRENCY = int(os.getenv("TRADE_USER_CONCURRENCY", "20"))
 
-def start_user_loop(user: User, trade_size_usdt: float):
+# Tetikleme modu: "schedule" (4h+1dk saat dilimleri) veya "event" (yeni prediction satırı)
+TRADE_TRIGGER = os.getenv("TRADE_TRIGGER", "schedule").lower()
+
+# Zamanlanmış tick: her 4 saatte bir, UTC 00:01, 04:01, ... (mum kapanışı + 1 dk)
+TICK_JOB_ID = "trading-tick"
+TICK_INTERVAL = 4 * 3600
+TICK_OFFSET = 60
+# Tüm worker'lar aynı saniyede borsaya yüklenmesin diye isteğe bağlı gecikme (saniye)
+TICK_JITTER = float(os.getenv("TRADE_TICK_JITTER", "0"))
+
+# Trade döngüsü aktif olan kullanıcılar: user_id -> (User, trade_size_usdt)
+active_users: Dict[int, Tuple[User, float]] = {}
+
+# "event" modunda predictions tablosunu izleyen watcher
+prediction_watcher: Optional[PredictionWatcher] = None
+
+# Son tick'in raporu (introspection için)
+last_tick_report: dict = {}
+
+
+async def run_trading_tick(users: Optional[Dict[int, Tuple[User, float]]] = None,
+                           prediction: Optional[Union[PredictionSignals, Prediction]] = None) -> dict:
+    """
+    Tek bir tick: en son prediction'ı bir kez okur (veya verileni kullanır),
+    sonra tüm aktif kullanıcılara sınırlı eşzamanlılıkla dağıtır.
+    Kullanıcı bazında rapor döner.
     """
-    Kullanıcının Binance hesabı için trade döngüsünü başlatır.
-    Her gün 00:01, 04:01, 08:01, 12:01, 16:01, 20:01 saatlerinde prediction tablosunu okuyarak işlem yapar.
-    """
-    async def periodic_task():
-        # İlk tetik zamanını hesapla
-        now = datetime.now()
-        block = (now.hour // 4) + 1
-        next_hour = (block * 4) % 24
-        next_run = now.replace(hour=next_hour, minute=1, second=0, microsecond=0)
-        if next_run <= now:
-            next_run += timedelta(days=1)
-
-        # İlk uyku: bir sonraki 4h+1dk noktasına kadar bekle
-        initial_delay = (next_run - now).total_seconds()
-        await asyncio.sleep(initial_delay)
-
-        # Döngü: her 4 saatte bir tetikle
-        while True:
-            try:
-                await trade_from_latest_prediction(user, trade_size_usdt)
-            except asyncio.CancelledError:
-                print(f"[❌] Task iptal edildi: user_id={user.id}")
-                break
-            except Exception as e:
-                print(f"[⚠️] Task hata verdi (user_id={user.id}): {e}")
-
-            # Bir sonraki çalıştırma için 4 saat bekle
-            await asyncio.sleep(4 * 3600)
+    global last_tick_report
+    users = dict(active_users if users is None else users)
+    started = time.perf_counter()
+    report = {"started_at": datetime.now(), "prediction": None, "users": {}}
+
+    latest = as_signals(prediction) if prediction is not None else await load_latest_prediction()
+    if not latest:
+        print("[❌] No suitable prediction found.")
+        last_tick_report = report
+        return report
+    report["prediction"] = latest.timestamp
+
+    semaphore = asyncio.Semaphore(USER_CONCURRENCY)
+
+    async def run_user(user: User, trade_size_usdt: float):
+        async with semaphore:
+            return await trade_from_latest_prediction(user, trade_size_usdt, prediction=latest)
+
+    user_ids = list(users)
+    results = await asyncio.gather(
+        *(run_user(*users[uid]) for uid in user_ids),
+        return_exceptions=True,
+    )
+    for uid, res in zip(user_ids, results):
+        if isinstance(res, BaseException):
+            print(f"[⚠️] Task hata verdi (user_id={uid}): {res}")
+            report["users"][uid] = {"status": "error", "error": str(res)}
+        else:
+            report["users"][uid] = {"status": "ok", **res}
+
+    report["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"[🚀] Tick tamamlandı: {len(user_ids)} kullanıcı, {report['elapsed_ms']}ms")
+    last_tick_report = report
+    return report
+
+
+async def _scheduled_tick() -> None:
+    if active_users:
+        await run_trading_tick()
+
 
+async def _on_new_prediction(prediction: Prediction) -> None:
+    """Event modunda: yeni prediction satırı gelir gelmez tick'i çalıştır."""
+    if not active_users:
+        return
+    await run_trading_tick(prediction=prediction)
+
+
+def _start_trigger() -> None:
+    global prediction_watcher
+    if TRADE_TRIGGER == "event":
+        if prediction_watcher is None:
+            prediction_watcher = PredictionWatcher(_on_new_prediction)
+        prediction_watcher.start()
+        return
+    # Paylaşılan tick'i merkezi zamanlayıcıya kaydet
+    if TICK_JOB_ID not in scheduler.jobs:
+        scheduler.add_job(
+            TICK_JOB_ID, _scheduled_tick, TICK_INTERVAL,
+            offset=TICK_OFFSET, jitter=TICK_JITTER, catch_up=CATCH_UP_RUN_ONCE,
+        )
+    scheduler.start()
+
+
+def start_user_loop(user: User, trade_size_usdt: float):
+    """
+    Kullanıcıyı paylaşılan trade döngüsüne ekler.
+    Her gün 00:01, 04:01, 08:01, 12:01, 16:01, 20:01 (UTC) saatlerinde (TRADE_TRIGGER=event
+    ise yeni prediction satırı gelir gelmez) prediction bir kez okunur ve tüm
+    aktif kullanıcılar için işlem yapılır.
+    """
     # Aynı kullanıcı için tekrar başlatma kontrolü
-    if user.id in user_tasks:
+    if user.id in active_users:
         print(f"[ℹ️] Kullanıcı zaten çalışıyor: user_id={user.id}")
         return
 
-    # Görevi başlat ve kaydet
-    task = asyncio.create_task(periodic_task())
-    user_tasks[user.id] = task
+    active_users[user.id] = (user, trade_size_usdt)
+
+    # exchangeInfo önbelleğini arka planda güncel tut (tüm kullanıcılar paylaşır)
+    symbol_filter_cache.start_background_refresh()
+
+    _start_trigger()
     print(f"[✅] Görev başlatıldı: user_id={user.id}")
 
 
+def update_user_loop(user: User, trade_size_usdt: float):
+    """
+    Çalışan kullanıcının User nesnesini (ör. yeni API anahtarları) ve trade büyüklüğünü günceller.
+    """
+    if user.id in active_users:
+        active_users[user.id] = (user, trade_size_usdt)
+
+
 def stop_user_loop(user_id: int):
     """
-    Belirtilen kullanıcının trade döngüsünü durdurur.
+    Belirtilen kullanıcıyı trade döngüsünden çıkarır.
     """
-    task = user_tasks.get(user_id)
-    if task and not task.done():
-        task.cancel()
+    if active_users.pop(user_id, None) is not None:
         print(f"[🛑] Görev durduruldu: user_id={user_id}")
-    user_tasks.pop(user_id, None)
+
+    # Aktif kullanıcı kalmadıysa zamanlayıcıyı ve önbellek görevini durdur.
+    # Process genelindeki HTTP havuzu, WebSocket API oturumları ve emir journal'ı
+    # açık kalır; hemen ardından gelen start_user_loop kapanmakta olan bir havuz almasın.
+    # Onları process'in sahibi kapatır (FastAPI lifespan, trading_worker, Streamlit handler).
+    if not active_users:
+        scheduler.remove_job(TICK_JOB_ID)
+        scheduler.stop()
+        if prediction_watcher is not None:
+            prediction_watcher.stop()
+        symbol_filter_cache.stop_background_refresh()
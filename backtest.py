@@ -0,0 +1,197 @@
+# backtest.py
+# prediction_trader'daki sabit miktarlı hedef pozisyon stratejisinin vektörel backtest'i.
+# Bar başına Python döngüsü yok; tüm semboller tek seferde NumPy/pandas ile hesaplanır.
+#   python backtest.py --years 6      (sentetik veriyle hız ölçümü)
+import os
+import time
+import argparse
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from models import Prediction, PredictionSignal
+from prediction_store import WIDE_SYMBOLS
+from prediction_trader import PAIR_TO_FIXED_QTY
+
+# Varsayılan taker komisyonu (paper_trader ile aynı)
+BACKTEST_FEE_RATE = float(os.getenv("BACKTEST_FEE_RATE", "0.0004"))
+# Sinyal ile emir arasındaki bar gecikmesi (1 → sinyal barının kapanışında işlem)
+BACKTEST_LAG = int(os.getenv("BACKTEST_LAG", "1"))
+
+
+class BacktestResult(NamedTuple):
+    bars: pd.DataFrame      # portföy: pnl, fees, turnover, equity, drawdown (bar başına)
+    symbols: pd.DataFrame   # sembol başına özet: pnl, fees, turnover, trades, max_drawdown
+    positions: pd.DataFrame # sembol başına tutulan miktar (işaretli, adet)
+
+
+# --- Veri yükleme ---
+async def load_signal_history(session: AsyncSession, start: Optional[datetime] = None,
+                              end: Optional[datetime] = None, model_version: str = "") -> pd.DataFrame:
+    """
+    timestamp x symbol sinyal matrisi (NaN = sinyal yok). Önce uzun formattaki
+    prediction_signals okunur, boşsa geniş predictions tablosuna düşülür.
+    """
+    query = select(PredictionSignal.timestamp, PredictionSignal.symbol, PredictionSignal.signal) \
+        .where(PredictionSignal.model_version == model_version)
+    if start is not None:
+        query = query.where(PredictionSignal.timestamp >= start)
+    if end is not None:
+        query = query.where(PredictionSignal.timestamp <= end)
+    rows = (await session.execute(query)).all()
+    if rows:
+        long = pd.DataFrame(rows, columns=["timestamp", "symbol", "signal"])
+        return long.pivot(index="timestamp", columns="symbol", values="signal").sort_index()
+
+    columns = [getattr(Prediction, f"{sym.lower()}_pred") for sym in WIDE_SYMBOLS]
+    query = select(Prediction.timestamp, *columns).order_by(Prediction.timestamp)
+    if start is not None:
+        query = query.where(Prediction.timestamp >= start)
+    if end is not None:
+        query = query.where(Prediction.timestamp <= end)
+    rows = (await session.execute(query)).all()
+    return pd.DataFrame(rows, columns=["timestamp", *WIDE_SYMBOLS]).set_index("timestamp").astype(float)
+
+
+# --- Pozisyon durumu ---
+def signal_positions(signals: pd.DataFrame, can_open: Optional[pd.DataFrame] = None,
+                     flip: bool = True) -> pd.DataFrame:
+    """
+    Bar başına yön (-1/0/1).
+    flip=True (rebalancer ile canlı davranış): yön = son geçerli sinyal; ters sinyal flip eder.
+    flip=False (eski davranış):
+      - düzken 1/-1 → long/short aç
+      - 0 → pozisyonu kapat
+      - pozisyon açıkken 1/-1 → değişiklik yok (ters sinyal flip etmez)
+      Yani bar t'deki yön, son 0'dan bu yana gelen ilk açılabilir sinyaldir.
+    Sinyal yok (NaN) → değişiklik yok.
+    can_open: açılışın filtrelere takılmadığı barlar (False → pozisyon korunur).
+    """
+    s = signals.to_numpy(dtype=float)
+    zero = s == 0
+    opener = np.isin(s, (-1.0, 1.0))
+    if can_open is not None:
+        opener &= can_open.to_numpy(dtype=bool)
+
+    if flip:
+        state = np.where(opener | zero, s, np.nan)
+        return pd.DataFrame(state, index=signals.index, columns=signals.columns).ffill().fillna(0.0)
+
+    # Her segment (son 0'dan sonrası) içindeki açılabilir sinyal sayısı
+    cnz = np.cumsum(opener, axis=0)
+    seg_base = pd.DataFrame(np.where(zero, cnz, np.nan)).ffill().fillna(0).to_numpy()
+    first = opener & (cnz - seg_base == 1)
+
+    state = np.where(first, s, np.where(zero, 0.0, np.nan))
+    pos = pd.DataFrame(state, index=signals.index, columns=signals.columns).ffill().fillna(0.0)
+    return pos
+
+
+def _max_drawdown(equity: np.ndarray) -> np.ndarray:
+    """Sütun başına en büyük düşüş (pozitif değer)."""
+    return (np.maximum.accumulate(equity, axis=0) - equity).max(axis=0)
+
+
+# --- Backtest ---
+def run_backtest(signals: pd.DataFrame, closes: pd.DataFrame,
+                 quantities: Optional[Dict[str, float]] = None,
+                 fee_rate: float = BACKTEST_FEE_RATE, lag: int = BACKTEST_LAG,
+                 min_notional: Optional[Dict[str, float]] = None,
+                 initial_equity: float = 0.0, flip: bool = True) -> BacktestResult:
+    """
+    signals: timestamp x symbol (-1/0/1, NaN = sinyal yok); bar açılış zamanına hizalı.
+    closes:  timestamp x symbol kapanış fiyatları (aynı bar ızgarası).
+    quantities: sembol → sabit miktar (varsayılan PAIR_TO_FIXED_QTY).
+    Sinyal bar t'de verilir, `lag` bar sonra kapanış fiyatından işlem görür.
+    """
+    quantities = quantities or {pair.upper(): qty for pair, qty in PAIR_TO_FIXED_QTY.items()}
+    symbols = [sym for sym in closes.columns if sym in quantities]
+    closes = closes[symbols].sort_index()
+    signals = signals.reindex(index=closes.index, columns=symbols)
+
+    qty = np.array([quantities[sym] for sym in symbols], dtype=float)
+    px = closes.to_numpy(dtype=float)
+
+    can_open = None
+    if min_notional:
+        floor = np.array([min_notional.get(sym, 0.0) for sym in symbols])
+        can_open = pd.DataFrame(px * qty >= floor, index=closes.index, columns=symbols)
+
+    direction = signal_positions(signals, can_open, flip)
+    held = direction.shift(lag).fillna(0.0).to_numpy() * qty  # işaretli adet
+
+    prev_px = np.vstack([px[:1], px[:-1]])
+    prev_held = np.vstack([np.zeros((1, len(symbols))), held[:-1]])
+    # İşlem: bar t'ye girerken (bar t-1 kapanışında) pozisyon değişimi
+    traded_notional = np.abs(held - prev_held) * prev_px
+    fees = traded_notional * fee_rate
+    gross = np.nan_to_num(held * (px - prev_px))
+    pnl = gross - np.nan_to_num(fees)
+    trades = (held != prev_held).sum(axis=0)
+
+    sym_equity = np.cumsum(pnl, axis=0)
+    total_pnl = pnl.sum(axis=1)
+    equity = initial_equity + np.cumsum(total_pnl)
+    drawdown = np.maximum.accumulate(equity) - equity
+
+    bars = pd.DataFrame({
+        "pnl": total_pnl,
+        "fees": np.nan_to_num(fees).sum(axis=1),
+        "turnover": np.nan_to_num(traded_notional).sum(axis=1),
+        "gross_exposure": np.nan_to_num(np.abs(held) * px).sum(axis=1),
+        "equity": equity,
+        "drawdown": drawdown,
+    }, index=closes.index)
+
+    summary = pd.DataFrame({
+        "pnl": sym_equity[-1] if len(sym_equity) else np.zeros(len(symbols)),
+        "fees": np.nan_to_num(fees).sum(axis=0),
+        "turnover": np.nan_to_num(traded_notional).sum(axis=0),
+        "trades": trades,
+        "max_drawdown": _max_drawdown(sym_equity) if len(sym_equity) else np.zeros(len(symbols)),
+    }, index=pd.Index(symbols, name="symbol"))
+
+    return BacktestResult(bars, summary, pd.DataFrame(held, index=closes.index, columns=symbols))
+
+
+def summarize(result: BacktestResult) -> dict:
+    bars = result.bars
+    return {
+        "bars": len(bars),
+        "pnl": round(float(bars["pnl"].sum()), 4),
+        "fees": round(float(bars["fees"].sum()), 4),
+        "turnover": round(float(bars["turnover"].sum()), 2),
+        "max_drawdown": round(float(bars["drawdown"].max()), 4) if len(bars) else 0.0,
+        "trades": int(result.symbols["trades"].sum()),
+    }
+
+
+# --- Sentetik hız ölçümü ---
+def _synthetic(years: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    n = int(years * 365 * 6)
+    index = pd.date_range("2019-01-01", periods=n, freq="4h")
+    symbols = [pair.upper() for pair in PAIR_TO_FIXED_QTY]
+    start = np.array([0.3, 20, 300, 40000, 0.1, 5, 2000, 10, 100])
+    returns = rng.normal(0, 0.02, size=(n, len(symbols)))
+    closes = pd.DataFrame(start * np.exp(np.cumsum(returns, axis=0)), index=index, columns=symbols)
+    signals = pd.DataFrame(rng.choice([-1, 0, 1], size=(n, len(symbols))).astype(float),
+                           index=index, columns=symbols)
+    return signals, closes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vectorized backtest benchmark on synthetic 4h bars")
+    parser.add_argument("--years", type=float, default=6)
+    parser.add_argument("--fee-rate", type=float, default=BACKTEST_FEE_RATE)
+    args = parser.parse_args()
+
+    signals, closes = _synthetic(args.years)
+    t0 = time.perf_counter()
+    result = run_backtest(signals, closes, fee_rate=args.fee_rate)
+    elapsed = (time.perf_counter() - t0) * 1000
+    print(f"bars={len(closes)} symbols={closes.shape[1]} elapsed={elapsed:.1f}ms")
+    print(summarize(result))
+    print(result.symbols)
@@ -1,90 +1,390 @@
 import time
 import hmac
 import hashlib
+import asyncio
+import importlib.util
+import json
 import httpx
 import urllib.parse
 import os
+from typing import Dict, Iterable, List, Optional
 from dotenv import load_dotenv
-import math
+from rate_limiter import rate_limiter, account_id
+from clock_sync import clock_sync
 
 # Load environment variables
 load_dotenv()
 USE_TESTNET = os.getenv("USE_TESTNET", "False") == "True"
 
-# Set API base URL for testnet or prod
-BASE_URL = "https://testnet.binancefuture.com" if USE_TESTNET else "https://fapi.binance.com"
+# Set API base URL for testnet or prod (BINANCE_REST_URL ile ör. yerel mock_exchange'e yönlendirilebilir)
+BASE_URL = os.getenv(
+    "BINANCE_REST_URL",
+    "https://testnet.binancefuture.com" if USE_TESTNET else "https://fapi.binance.com",
+)
+
+# HTTP pool ayarları (.env ile değiştirilebilir)
+HTTP_TIMEOUT = float(os.getenv("BINANCE_HTTP_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("BINANCE_HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("BINANCE_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("BINANCE_HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("BINANCE_HTTP_KEEPALIVE_EXPIRY", "60"))
+# HTTP/2 sadece `h2` paketi kuruluysa açılır
+HTTP2_ENABLED = (
+    os.getenv("BINANCE_HTTP2", "True") == "True"
+    and importlib.util.find_spec("h2") is not None
+)
+
+# /fapi/v1/batchOrders tek istekte en fazla 5 emir kabul eder
+BATCH_ORDER_LIMIT = 5
+
+# exchangeInfo önbelleğinin yenilenme süresi (saniye)
+EXCHANGE_INFO_TTL = float(os.getenv("BINANCE_EXCHANGE_INFO_TTL", "3600"))
+
+
+# --- Shared exchange client ---
+class ExchangeClient:
+    """
+    Tüm REST çağrıları için tek, uzun ömürlü httpx.AsyncClient.
+    Bağlantılar keep-alive ile havuzda tutulur, böylece her istek için
+    yeniden TCP+TLS el sıkışması yapılmaz.
+    """
+
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        timeout: float = HTTP_TIMEOUT,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive: int = HTTP_MAX_KEEPALIVE,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+        http2: bool = HTTP2_ENABLED,
+    ):
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _build(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=self.limits,
+            http2=self.http2,
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Aktif event loop'a bağlı client'ı döner. Streamlit her butonda yeni bir
+        asyncio.run açtığı için loop değiştiyse eski havuz bırakılıp yenisi kurulur.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = self._build()
+            self._loop = loop
+        return self._client
+
+    async def request(self, method: str, path: str, weight: float = 1, orders: int = 0, **kwargs) -> httpx.Response:
+        """
+        İsteği rate limit governor'dan geçirerek gönderir.
+        weight: endpoint'in request weight'i, orders: isteğin saydığı emir adedi.
+        """
+        api_key = (kwargs.get("headers") or {}).get("X-MBX-APIKEY")
+        account = account_id(api_key) if api_key else None
+        await rate_limiter.acquire(weight, account, orders)
+        resp = await self.client.request(method, path, **kwargs)
+        rate_limiter.update_from_headers(resp.headers, account, resp.status_code)
+        return resp
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        loop, self._loop = self._loop, None
+        if client is None or client.is_closed:
+            return
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        # Kapanmış bir loop'a ait havuzu kapatmaya çalışmak hata verir; bırakıyoruz
+        if loop is current:
+            await client.aclose()
+
+    async def __aenter__(self) -> "ExchangeClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+
+_exchange_client: Optional[ExchangeClient] = None
+
+
+def get_exchange_client() -> ExchangeClient:
+    """Process genelinde paylaşılan ExchangeClient'ı döner."""
+    global _exchange_client
+    if _exchange_client is None:
+        _exchange_client = ExchangeClient()
+    return _exchange_client
+
+
+async def close_exchange_client() -> None:
+    """Worker/uygulama kapanırken havuzdaki bağlantıları kapatır."""
+    if _exchange_client is not None:
+        await _exchange_client.aclose()
 
 # --- Signature Creator ---
 def create_signature(query_string: str, secret_key: str) -> str:
     return hmac.new(secret_key.encode(), query_string.encode(), hashlib.sha256).hexdigest()
 
-# --- Get lot size stepSize and minNotional filters for symbol ---
-async def get_symbol_filters(api_key: str, api_secret: str, symbol: str) -> dict:
+# --- Server-synced timestamp for signed requests ---
+async def server_timestamp() -> int:
+    """Yerel saat + ölçülmüş sunucu ofseti (ms); ofset periyodik olarak yenilenir."""
+    return await clock_sync.atimestamp(get_exchange_client())
+
+# --- Symbol filters (LOT_SIZE / MIN_NOTIONAL / PRICE_FILTER / PERCENT_PRICE) ---
+def parse_symbol_filters(info: dict) -> dict:
     """
-    exchangeInfo’dan hem stepSize hem minNotional değerlerini getirir.
+    exchangeInfo'daki tek bir sembol kaydını düz bir filtre sözlüğüne çevirir.
     """
-    url = f"{BASE_URL}/fapi/v1/exchangeInfo?symbol={symbol}"
-    headers = {"X-MBX-APIKEY": api_key}
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, headers=headers)
-        resp.raise_for_status()
-        info = resp.json().get("symbols", [])[0]
-
     out = {}
     for f in info.get("filters", []):
-        if f.get("filterType") == "LOT_SIZE":
+        ftype = f.get("filterType")
+        if ftype == "LOT_SIZE":
             out["stepSize"] = float(f.get("stepSize"))
-        elif f.get("filterType") == "MIN_NOTIONAL":
+            out["minQty"] = float(f.get("minQty", 0))
+            out["maxQty"] = float(f.get("maxQty", 0))
+        elif ftype == "MIN_NOTIONAL":
             out["minNotional"] = float(f.get("notional"))
+        elif ftype == "PRICE_FILTER":
+            out["tickSize"] = float(f.get("tickSize", 0))
+            out["minPrice"] = float(f.get("minPrice", 0))
+            out["maxPrice"] = float(f.get("maxPrice", 0))
+        elif ftype == "PERCENT_PRICE":
+            out["multiplierUp"] = float(f.get("multiplierUp", 0))
+            out["multiplierDown"] = float(f.get("multiplierDown", 0))
     return out
 
+
+class SymbolFilterCache:
+    """
+    Process genelinde paylaşılan exchangeInfo indeksi.
+    Tüm sembollerin filtreleri tek istekle yüklenir, TTL dolunca
+    (veya arka plan görevinde) yenilenir.
+    """
+
+    def __init__(self, ttl: float = EXCHANGE_INFO_TTL):
+        self.ttl = ttl
+        self._filters: Dict[str, dict] = {}
+        self._loaded_at: float = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def age(self) -> float:
+        """Son yüklemeden bu yana geçen süre (saniye)."""
+        if not self._loaded_at:
+            return float("inf")
+        return time.monotonic() - self._loaded_at
+
+    def is_stale(self) -> bool:
+        return self.age >= self.ttl
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def refresh(self) -> Dict[str, dict]:
+        """Tüm exchangeInfo'yu tek istekle çekip indeksi yeniler."""
+        resp = await get_exchange_client().get("/fapi/v1/exchangeInfo", weight=1)
+        resp.raise_for_status()
+        filters = {
+            info["symbol"]: parse_symbol_filters(info)
+            for info in resp.json().get("symbols", [])
+            if "symbol" in info
+        }
+        self._filters = filters
+        self._loaded_at = time.monotonic()
+        print(f"[ℹ️] exchangeInfo önbelleği yenilendi: {len(filters)} sembol")
+        return filters
+
+    async def ensure_fresh(self) -> Dict[str, dict]:
+        if self.is_stale():
+            async with self._get_lock():
+                # Kilidi beklerken başka bir görev yenilemiş olabilir
+                if self.is_stale():
+                    await self.refresh()
+        return self._filters
+
+    async def get(self, symbol: str) -> dict:
+        filters = await self.ensure_fresh()
+        if symbol not in filters and self.age > 60:
+            # Yeni listelenmiş sembol olabilir; bir kez zorla yenile
+            async with self._get_lock():
+                filters = await self.refresh()
+        return dict(filters.get(symbol, {}))
+
+    async def get_many(self, symbols: Iterable[str]) -> Dict[str, dict]:
+        filters = await self.ensure_fresh()
+        return {sym: dict(filters.get(sym, {})) for sym in symbols}
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+                delay = self.ttl
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[⚠️] exchangeInfo yenilenemedi: {e}")
+                delay = min(60.0, self.ttl)
+            await asyncio.sleep(delay)
+
+    def start_background_refresh(self) -> asyncio.Task:
+        """Çalışan event loop üzerinde periyodik yenileme görevini başlatır."""
+        task = self._refresh_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+        return self._refresh_task
+
+    def stop_background_refresh(self) -> None:
+        task, self._refresh_task = self._refresh_task, None
+        if task and not task.done():
+            task.cancel()
+
+
+symbol_filter_cache = SymbolFilterCache()
+
+
+async def get_symbol_filters(api_key: str, api_secret: str, symbol: str) -> dict:
+    """
+    stepSize, minNotional (ve diğer fiyat filtrelerini) paylaşılan
+    exchangeInfo önbelleğinden getirir.
+    """
+    return await symbol_filter_cache.get(symbol)
+
 # --- Get current position amount with 401 handling ---
 async def get_position_amount(api_key: str, api_secret: str, symbol: str) -> float:
     endpoint = "/fapi/v2/positionRisk"
-    timestamp = int(time.time() * 1000)
+    timestamp = await server_timestamp()
     qs = f"symbol={symbol}&timestamp={timestamp}"
     sig = create_signature(qs, api_secret)
-    url = f"{BASE_URL}{endpoint}?{qs}&signature={sig}"
+    url = f"{endpoint}?{qs}&signature={sig}"
     headers = {"X-MBX-APIKEY": api_key}
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.get(url, headers=headers)
-            resp.raise_for_status()
-            data = resp.json()
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 401:
-                print(f"[⚠️] {symbol}: 401 Unauthorized—API key or endpoint error.")
-                return 0.0
-            raise
+    try:
+        resp = await get_exchange_client().get(url, headers=headers, weight=5)
+        resp.raise_for_status()
+        data = resp.json()
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 401:
+            print(f"[⚠️] {symbol}: 401 Unauthorized—API key or endpoint error.")
+            return 0.0
+        raise
     for item in data:
         if item.get("symbol") == symbol:
             return float(item.get("positionAmt", 0))
     return 0.0
 
+# --- Snapshot of all positions for an account in one signed request ---
+async def get_position_amounts(api_key: str, api_secret: str) -> Dict[str, float]:
+    """
+    positionRisk'i sembol filtresi olmadan tek seferde çağırıp
+    {symbol: positionAmt} sözlüğü döner. Bir trade döngüsü boyunca tekrar kullanılır.
+    """
+    endpoint = "/fapi/v2/positionRisk"
+    timestamp = await server_timestamp()
+    qs = f"timestamp={timestamp}"
+    sig = create_signature(qs, api_secret)
+    url = f"{endpoint}?{qs}&signature={sig}"
+    headers = {"X-MBX-APIKEY": api_key}
+    try:
+        resp = await get_exchange_client().get(url, headers=headers, weight=5)
+        resp.raise_for_status()
+        data = resp.json()
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 401:
+            print("[⚠️] positionRisk: 401 Unauthorized—API key or endpoint error.")
+            return {}
+        raise
+
+    amounts: Dict[str, float] = {}
+    for item in data:
+        sym = item.get("symbol")
+        if not sym:
+            continue
+        # Hedge modunda LONG/SHORT ayrı satırlar gelir; net miktarı topluyoruz
+        amounts[sym] = amounts.get(sym, 0.0) + float(item.get("positionAmt", 0))
+    return amounts
+
 # --- Get mark price for symbol ---
 async def get_mark_price(api_key: str, api_secret: str, symbol: str) -> float:
     endpoint = "/fapi/v1/premiumIndex"
-    timestamp = int(time.time() * 1000)
+    timestamp = await server_timestamp()
     qs = f"symbol={symbol}&timestamp={timestamp}"
     sig = create_signature(qs, api_secret)
-    url = f"{BASE_URL}{endpoint}?{qs}&signature={sig}"
+    url = f"{endpoint}?{qs}&signature={sig}"
     headers = {"X-MBX-APIKEY": api_key}
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, headers=headers)
-        resp.raise_for_status()
-        data = resp.json()
+    resp = await get_exchange_client().get(url, headers=headers)
+    resp.raise_for_status()
+    data = resp.json()
     return float(data.get("markPrice", 0))
 
+# --- Get mark prices for many symbols in one public request ---
+async def get_mark_prices(symbols: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """
+    premiumIndex'i sembolsüz çağırır (tüm semboller tek yanıtta döner).
+    symbols verilirse sonuç bu sembollerle sınırlandırılır.
+    """
+    resp = await get_exchange_client().get("/fapi/v1/premiumIndex", weight=10)
+    resp.raise_for_status()
+    data = resp.json()
+    wanted = set(symbols) if symbols is not None else None
+    prices: Dict[str, float] = {}
+    for item in data:
+        sym = item.get("symbol")
+        if wanted is not None and sym not in wanted:
+            continue
+        prices[sym] = float(item.get("markPrice", 0))
+    return prices
+
+# Emri yükseltmeden atlatan borsa hataları → journal'daki sebep
+SKIP_ERROR_REASONS = {-4131: "PERCENT_PRICE", -4116: "duplicate clientOrderId"}
+
+
+def skipped_order(code: int, msg: Optional[str]) -> dict:
+    """Atlanan emrin sonucu: borsanın kodu ve mesajı korunur, reason journal'a yazılır."""
+    return {"skipped": True, "code": code, "msg": msg, "reason": f"{SKIP_ERROR_REASONS[code]} ({code})"}
+
+
 # --- Send Market Order with precision & percent_price fallback ---
-async def send_binance_order(api_key: str, api_secret: str, symbol: str, side: str, quantity: float):
+async def send_binance_order(api_key: str, api_secret: str, symbol: str, side: str, quantity: float,
+                             client_order_id: Optional[str] = None):
     """
     Send a MARKET order, with fallbacks:
       - İlk olarak istenen quantity ile dener.
       - Precision hatasında integer miktara düşürür.
       - PERCENT_PRICE hatasında (testnet’te likidite yetersizse) güvenli şekilde atlar.
+      - client_order_id verilirse newClientOrderId olarak gönderilir; aynı id ile
+        daha önce emir verilmişse (-4116) tekrar gönderilmez.
+      Atlanan emirlerde skipped_order() sonucu döner ({"skipped": True, "code", "msg", "reason"}).
     """
     endpoint = "/fapi/v1/order"
-    timestamp = int(time.time() * 1000)
+    timestamp = await server_timestamp()
     qty_to_try = quantity
 
     while True:
@@ -95,14 +395,15 @@ async def send_binance_order(api_key: str, api_secret: str, symbol: str, side: s
             "quantity": qty_to_try,
             "timestamp": timestamp
         }
+        if client_order_id:
+            params["newClientOrderId"] = client_order_id
         qs = urllib.parse.urlencode(params, doseq=True)
         sig = create_signature(qs, api_secret)
-        url = f"{BASE_URL}{endpoint}?{qs}&signature={sig}"
+        url = f"{endpoint}?{qs}&signature={sig}"
         headers = {"X-MBX-APIKEY": api_key}
 
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(url, headers=headers)
-            data = resp.json()
+        resp = await get_exchange_client().post(url, headers=headers, weight=1, orders=1)
+        data = resp.json()
 
         # Başarılı
         if resp.status_code == 200:
@@ -119,14 +420,104 @@ async def send_binance_order(api_key: str, api_secret: str, symbol: str, side: s
             continue
 
         # 2) PERCENT_PRICE hatası: testnet’te likidite yetersizliği demek,
-        #    bunu atlayıp devam etmek için None dönüyoruz
+        #    bunu atlayıp devam ediyoruz
         if code == -4131:
             print(f"[WARN] {symbol} {side}: PERCENT_PRICE filter limit, skipping order.")
-            return None
+            return skipped_order(code, data.get("msg"))
+
+        # 3) Aynı client order id ile emir zaten verilmiş: tekrar gönderme
+        if code == -4116:
+            print(f"[WARN] {symbol} {side}: duplicate clientOrderId {client_order_id}, skipping order.")
+            return skipped_order(code, data.get("msg"))
 
         # Diğer hatalar: yükselt
         raise RuntimeError(f"Order failed: {data}")
 
+# --- Send several Market Orders via /fapi/v1/batchOrders ---
+async def send_binance_orders(api_key: str, api_secret: str, orders: List[dict]) -> List[Optional[dict]]:
+    """
+    MARKET emirlerini 5'erli gruplar halinde batchOrders ile gönderir.
+    orders: [{"symbol": ..., "side": ..., "quantity": ..., "client_order_id": (isteğe bağlı)}, ...]
+
+    Dönen liste girdiyle aynı sıradadır:
+      - başarılı emirde borsanın emir yanıtı,
+      - PERCENT_PRICE (-4131) ve tekrar eden client order id (-4116) hatasında
+        skipped_order() sonucu (send_binance_order gibi atlanır),
+      - diğer hatalarda borsanın hata yanıtı ({"code": ..., "msg": ...}).
+    Precision (-1111) hatası alan emirler integer miktarla bir sonraki batch'te yeniden denenir.
+    """
+    endpoint = "/fapi/v1/batchOrders"
+    headers = {"X-MBX-APIKEY": api_key}
+    results: List[Optional[dict]] = [None] * len(orders)
+    qtys = [o["quantity"] for o in orders]
+    pending = list(range(len(orders)))
+
+    while pending:
+        retry = []
+        for start in range(0, len(pending), BATCH_ORDER_LIMIT):
+            chunk = pending[start:start + BATCH_ORDER_LIMIT]
+            batch = []
+            for i in chunk:
+                item = {
+                    "symbol": orders[i]["symbol"],
+                    "side": orders[i]["side"],
+                    "type": "MARKET",
+                    "quantity": str(qtys[i]),
+                }
+                if orders[i].get("client_order_id"):
+                    item["newClientOrderId"] = orders[i]["client_order_id"]
+                batch.append(item)
+            params = {
+                "batchOrders": json.dumps(batch, separators=(",", ":")),
+                "timestamp": await server_timestamp(),
+            }
+            qs = urllib.parse.urlencode(params, doseq=True)
+            sig = create_signature(qs, api_secret)
+            url = f"{endpoint}?{qs}&signature={sig}"
+
+            resp = await get_exchange_client().post(url, headers=headers, weight=5, orders=len(chunk))
+            data = resp.json()
+            if resp.status_code != 200 or not isinstance(data, list):
+                # İstek bütünüyle reddedildi (imza, rate limit vb.)
+                raise RuntimeError(f"Batch order failed: {data}")
+
+            for i, item in zip(chunk, data):
+                symbol, side = orders[i]["symbol"], orders[i]["side"]
+                code = item.get("code")
+
+                # Başarılı
+                if code is None:
+                    print(f"[ORDER RESPONSE] {symbol} {side} qty={qtys[i]} → {item}")
+                    results[i] = item
+                    continue
+
+                # 1) Precision hatası: tam sayıya düşürüp yeniden dene
+                if code == -1111 and qtys[i] != int(qtys[i]):
+                    fallback = int(qtys[i])
+                    print(f"[WARN] {symbol} precision error ({orders[i]['quantity']}), retrying with integer qty={fallback}")
+                    qtys[i] = fallback
+                    retry.append(i)
+                    continue
+
+                # 2) PERCENT_PRICE hatası: emri atla
+                if code == -4131:
+                    print(f"[WARN] {symbol} {side}: PERCENT_PRICE filter limit, skipping order.")
+                    results[i] = skipped_order(code, item.get("msg"))
+                    continue
+
+                # 3) Aynı client order id ile emir zaten verilmiş
+                if code == -4116:
+                    print(f"[WARN] {symbol} {side}: duplicate clientOrderId, skipping order.")
+                    results[i] = skipped_order(code, item.get("msg"))
+                    continue
+
+                # Diğer hatalar: diğer emirleri etkilememesi için yanıtı olduğu gibi döndür
+                print(f"[ERROR] {symbol} {side}: order failed → {item}")
+                results[i] = item
+        pending = retry
+
+    return results
+
 # --- Close open position via reverse market order ---
 async def close_position(api_key: str, api_secret: str, symbol: str, current_amt: float):
     side = "SELL" if current_amt > 0 else "BUY"
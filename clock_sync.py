@@ -0,0 +1,126 @@
+import os
+import time
+import asyncio
+import threading
+import httpx
+from typing import Optional
+from dotenv import load_dotenv
+from rate_limiter import rate_limiter
+
+load_dotenv()
+USE_TESTNET = os.getenv("USE_TESTNET", "False") == "True"
+BASE_URL = os.getenv(
+    "BINANCE_REST_URL",
+    "https://testnet.binancefuture.com" if USE_TESTNET else "https://fapi.binance.com",
+)
+
+# Ofsetin yeniden ölçüleceği aralık (saniye) ve her ölçümdeki örnek sayısı
+CLOCK_SYNC_INTERVAL = float(os.getenv("BINANCE_CLOCK_SYNC_INTERVAL", "300"))
+CLOCK_SYNC_SAMPLES = int(os.getenv("BINANCE_CLOCK_SYNC_SAMPLES", "3"))
+
+
+def _now_ms() -> float:
+    return time.time() * 1000
+
+
+class ClockSync:
+    """
+    Binance sunucu saati ile yerel saat arasındaki farkı NTP benzeri ölçer:
+    istek gidiş-dönüş süresinin (RTT) ortası sunucu zamanına denk sayılır,
+    en düşük RTT'li örnek seçilir. İmzalı istekler için timestamp yerelde
+    (time.time() + offset) üretilir; her istekte /fapi/v1/time çağrılmaz.
+    """
+
+    def __init__(self, base_url: str = BASE_URL, interval: float = CLOCK_SYNC_INTERVAL,
+                 samples: int = CLOCK_SYNC_SAMPLES):
+        self.base_url = base_url
+        self.interval = interval
+        self.samples = samples
+        self.offset_ms = 0.0
+        self.rtt_ms = None
+        self.synced_at = 0.0
+        self._lock = threading.Lock()
+        # Süren async ölçüm; eşzamanlı çağıranlar aynı görevi bekler
+        self._sync_task: Optional[asyncio.Task] = None
+
+    def needs_sync(self) -> bool:
+        return not self.synced_at or time.monotonic() - self.synced_at >= self.interval
+
+    def _apply(self, measurements) -> float:
+        # En kısa RTT'li ölçüm en az belirsizliğe sahiptir
+        offset, rtt = min(measurements, key=lambda m: m[1])
+        self.offset_ms = offset
+        self.rtt_ms = rtt
+        self.synced_at = time.monotonic()
+        return offset
+
+    @staticmethod
+    def _measure(t0: float, t1: float, server_ms: float):
+        rtt = t1 - t0
+        return server_ms - (t0 + rtt / 2), rtt
+
+    def sync(self) -> float:
+        """Ofseti senkron HTTP ile ölçer (thread'ler için)."""
+        with self._lock:
+            measurements = []
+            for _ in range(self.samples):
+                rate_limiter.acquire_sync(1)
+                t0 = _now_ms()
+                r = httpx.get(f"{self.base_url}/fapi/v1/time", timeout=5)
+                t1 = _now_ms()
+                rate_limiter.update_from_headers(r.headers, status_code=r.status_code)
+                r.raise_for_status()
+                measurements.append(self._measure(t0, t1, r.json()["serverTime"]))
+            return self._apply(measurements)
+
+    async def async_sync(self, client) -> float:
+        """Ofseti verilen async client (ör. binance_trader.ExchangeClient) ile ölçer."""
+        measurements = []
+        for _ in range(self.samples):
+            t0 = _now_ms()
+            r = await client.get("/fapi/v1/time", weight=1)
+            t1 = _now_ms()
+            r.raise_for_status()
+            measurements.append(self._measure(t0, t1, r.json()["serverTime"]))
+        return self._apply(measurements)
+
+    def _defer_retry(self, after: float = 30.0) -> None:
+        # Başarısız ölçümden sonra her istekte tekrar denememek için kısa bir erteleme
+        self.synced_at = time.monotonic() - max(0.0, self.interval - after)
+
+    def timestamp(self) -> int:
+        """Son ölçülen ofsetle yerel olarak hesaplanan sunucu zamanı (ms)."""
+        return int(_now_ms() + self.offset_ms)
+
+    def timestamp_sync(self) -> int:
+        """Gerekirse önce ofseti yeniler; hata olursa son bilinen ofsetle devam eder."""
+        if self.needs_sync():
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"[⚠️] Sunucu saati senkronize edilemedi: {e}")
+                self._defer_retry()
+        return self.timestamp()
+
+    async def _async_refresh(self, client) -> None:
+        try:
+            await self.async_sync(client)
+        except Exception as e:
+            print(f"[⚠️] Sunucu saati senkronize edilemedi: {e}")
+            self._defer_retry()
+
+    async def atimestamp(self, client) -> int:
+        # Aynı anda çok kullanıcı tetiklenirse ölçümü yalnızca biri yapar, diğerleri
+        # onun bitmesini bekler (soğuk başlangıçta ofset 0 ile imzalanmasın, -1021)
+        if self.needs_sync():
+            loop = asyncio.get_running_loop()
+            task = self._sync_task
+            if task is None or task.done() or task.get_loop() is not loop:
+                task = self._sync_task = loop.create_task(self._async_refresh(client))
+            # Bekleyenlerden biri iptal edilirse ortak ölçüm iptal olmasın
+            await asyncio.shield(task)
+        return self.timestamp()
+
+
+# Process genelinde paylaşılan saat senkronizasyonu
+clock_sync = ClockSync()
@@ -0,0 +1,242 @@
+# kline_store.py
+# /fapi/v1/klines için artımlı yerel önbellek. Her sembol/interval tek bir
+# sabit kayıt boyutlu ikili dosyada tutulur ve np.memmap ile sıfır kopya okunur.
+#   python kline_store.py --interval 4h --since 2020-01-01
+import os
+import time
+import asyncio
+import argparse
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from binance_trader import get_exchange_client
+
+# Dosyaların yazılacağı dizin
+KLINE_STORE_DIR = os.getenv("KLINE_STORE_DIR", "kline_data")
+# Bir istekte en fazla mum sayısı (limit 1000-1500 → weight 10)
+KLINE_PAGE_LIMIT = 1500
+KLINE_PAGE_WEIGHT = 10
+# Aynı anda uçuştaki en fazla sayfa isteği
+KLINE_FETCH_CONCURRENCY = int(os.getenv("KLINE_FETCH_CONCURRENCY", "8"))
+
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000,
+    "8h": 28_800_000, "12h": 43_200_000, "1d": 86_400_000,
+}
+
+# Binance kline satırının sabit kayıt düzeni
+KLINE_DTYPE = np.dtype([
+    ("open_time", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+    ("close_time", "<i8"),
+    ("quote_volume", "<f8"),
+    ("trades", "<i8"),
+    ("taker_buy_base", "<f8"),
+    ("taker_buy_quote", "<f8"),
+])
+
+
+def _to_ms(value) -> int:
+    if value is None:
+        return int(time.time() * 1000)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+def parse_klines(rows: list) -> np.ndarray:
+    """REST yanıtını (liste listesi) KLINE_DTYPE kayıt dizisine çevirir."""
+    out = np.empty(len(rows), dtype=KLINE_DTYPE)
+    for i, r in enumerate(rows):
+        out[i] = (r[0], r[1], r[2], r[3], r[4], r[5], r[6], r[7], r[8], r[9], r[10])
+    return out
+
+
+class KlineStore:
+    """
+    Sembol/interval başına `{SYMBOL}_{interval}.bin` dosyası; kayıtlar open_time'a göre sıralı.
+      - sync(): yalnızca eksik aralıkları (baştan veya sondan) sayfalı ve eşzamanlı çeker;
+        her sayfa grubu bitince diske eklenir, kesilen iş kaldığı yerden devam eder.
+      - read(): np.memmap üzerinde searchsorted ile aralık döner (kopyasız görünüm).
+    """
+
+    def __init__(self, root: str = KLINE_STORE_DIR, concurrency: int = KLINE_FETCH_CONCURRENCY):
+        self.root = root
+        self.concurrency = concurrency
+        # path -> (dosya boyutu, memmap)
+        self._maps: Dict[str, Tuple[int, np.memmap]] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, f"{symbol.upper()}_{interval}.bin")
+
+    # --- Okuma ---
+    def load(self, symbol: str, interval: str) -> np.ndarray:
+        """Tüm dosyanın memmap görünümü (boşsa boş dizi)."""
+        path = self.path(symbol, interval)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size < KLINE_DTYPE.itemsize:
+            return np.empty(0, dtype=KLINE_DTYPE)
+        cached = self._maps.get(path)
+        if cached is None or cached[0] != size:
+            mm = np.memmap(path, dtype=KLINE_DTYPE, mode="r", shape=(size // KLINE_DTYPE.itemsize,))
+            self._maps[path] = cached = (size, mm)
+        return cached[1]
+
+    def read(self, symbol: str, interval: str, start=None, end=None) -> np.ndarray:
+        """open_time ∈ [start, end] aralığındaki mumlar; dosyaya kopyasız görünüm."""
+        data = self.load(symbol, interval)
+        times = data["open_time"]
+        lo = 0 if start is None else int(np.searchsorted(times, _to_ms(start), side="left"))
+        hi = len(data) if end is None else int(np.searchsorted(times, _to_ms(end), side="right"))
+        return data[lo:hi]
+
+    def coverage(self, symbol: str, interval: str) -> Optional[Tuple[int, int]]:
+        data = self.load(symbol, interval)
+        if not len(data):
+            return None
+        return int(data["open_time"][0]), int(data["open_time"][-1])
+
+    def close_frame(self, symbols: Iterable[str], interval: str, start=None, end=None,
+                    field: str = "close") -> pd.DataFrame:
+        """timestamp x symbol fiyat matrisi (backtest.run_backtest için)."""
+        series = {}
+        for sym in symbols:
+            rows = self.read(sym, interval, start, end)
+            series[sym.upper()] = pd.Series(
+                np.asarray(rows[field]), index=pd.to_datetime(np.asarray(rows["open_time"]), unit="ms"),
+            )
+        return pd.DataFrame(series).sort_index()
+
+    # --- Yazma ---
+    def _append(self, path: str, rows: np.ndarray) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        with open(path, "ab") as f:
+            f.write(rows.tobytes())
+
+    def _prepend(self, path: str, rows: np.ndarray) -> None:
+        existing = np.fromfile(path, dtype=KLINE_DTYPE) if os.path.exists(path) else np.empty(0, KLINE_DTYPE)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(rows.tobytes())
+            f.write(existing.tobytes())
+        self._maps.pop(path, None)
+        os.replace(tmp, path)
+
+    # --- Çekme ---
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _fetch_page(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> np.ndarray:
+        async with self._get_semaphore():
+            resp = await get_exchange_client().get(
+                "/fapi/v1/klines",
+                params={"symbol": symbol, "interval": interval, "startTime": start_ms,
+                        "endTime": end_ms, "limit": KLINE_PAGE_LIMIT},
+                weight=KLINE_PAGE_WEIGHT,
+            )
+            resp.raise_for_status()
+            return parse_klines(resp.json())
+
+    async def _fetch_range(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> List[np.ndarray]:
+        """[start_ms, end_ms) aralığını sayfalara bölüp eşzamanlı çeker; sıralı sayfalar döner."""
+        span = INTERVAL_MS[interval] * KLINE_PAGE_LIMIT
+        pages = [(s, min(s + span, end_ms) - 1) for s in range(start_ms, end_ms, span)]
+        return await asyncio.gather(*(self._fetch_page(symbol, interval, s, e) for s, e in pages))
+
+    async def sync(self, symbol: str, interval: str, since, until=None) -> int:
+        """
+        [since, until) aralığında eksik kapanmış mumları çekip dosyaya ekler.
+        Eklenen mum sayısını döner.
+        """
+        symbol = symbol.upper()
+        step = INTERVAL_MS[interval]
+        path = self.path(symbol, interval)
+        since_ms = _to_ms(since) // step * step
+        # Yalnızca kapanmış mumlar
+        until_ms = min(_to_ms(until), int(time.time() * 1000)) // step * step
+        added = 0
+
+        cov = self.coverage(symbol, interval)
+        if cov is not None and since_ms < cov[0]:
+            # Baştaki boşluk: nadir, dosya yeniden yazılır
+            rows = np.concatenate(await self._fetch_range(symbol, interval, since_ms, cov[0]))
+            rows = rows[rows["open_time"] < cov[0]]
+            if len(rows):
+                self._prepend(path, rows)
+                added += len(rows)
+
+        cov = self.coverage(symbol, interval)
+        next_ms = since_ms if cov is None else max(since_ms, cov[1] + step)
+        # Sondaki boşluk: her grup bitince diske eklenir (devam ettirilebilir)
+        group = step * KLINE_PAGE_LIMIT * self.concurrency
+        while next_ms < until_ms:
+            group_end = min(next_ms + group, until_ms)
+            pages = await self._fetch_range(symbol, interval, next_ms, group_end)
+            rows = np.concatenate(pages) if pages else np.empty(0, KLINE_DTYPE)
+            rows = rows[(rows["open_time"] >= next_ms) & (rows["open_time"] < until_ms)]
+            if len(rows):
+                self._append(path, rows)
+                added += len(rows)
+            next_ms = group_end
+        if added:
+            print(f"[ℹ️] {symbol} {interval}: {added} mum eklendi")
+        return added
+
+    async def sync_many(self, symbols: Iterable[str], interval: str, since, until=None) -> Dict[str, int]:
+        symbols = [s.upper() for s in symbols]
+        results = await asyncio.gather(
+            *(self.sync(sym, interval, since, until) for sym in symbols),
+            return_exceptions=True,
+        )
+        out = {}
+        for sym, res in zip(symbols, results):
+            if isinstance(res, BaseException):
+                print(f"[⚠️] {sym} {interval} mumları çekilemedi: {res}")
+                out[sym] = 0
+            else:
+                out[sym] = res
+        return out
+
+
+# Process genelinde paylaşılan depo
+kline_store = KlineStore()
+
+
+async def _main(interval: str, since: str) -> None:
+    from prediction_trader import PAIR_TO_FIXED_QTY
+    from binance_trader import close_exchange_client
+
+    symbols = [pair.upper() for pair in PAIR_TO_FIXED_QTY]
+    try:
+        t0 = time.perf_counter()
+        added = await kline_store.sync_many(symbols, interval, since)
+        print(f"sync: {added} ({(time.perf_counter() - t0):.1f}s)")
+        t0 = time.perf_counter()
+        frame = kline_store.close_frame(symbols, interval)
+        print(f"read: {frame.shape} ({(time.perf_counter() - t0) * 1000:.1f}ms)")
+    finally:
+        await close_exchange_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync the local kline cache for the tracked symbols")
+    parser.add_argument("--interval", default="4h", choices=sorted(INTERVAL_MS))
+    parser.add_argument("--since", default="2020-01-01")
+    args = parser.parse_args()
+    asyncio.run(_main(args.interval, args.since))
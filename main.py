@@ -9,6 +9,10 @@ from fastapi import FastAPI, HTTPException, Depends, Header
 from contextlib import asynccontextmanager
 from auth import hash_password, verify_password, create_jwt_token, decode_jwt_token
 from database import engine, Base, get_db
+from binance_trader import close_exchange_client
+from order_journal import order_journal
+from ws_order_client import close_ws_sessions
+from prediction_store import COMPAT_VIEW_NAME, create_prediction_store
 from pydantic import BaseModel
 from models import User
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -32,7 +36,16 @@ def decrypt_val(token: str) -> str:
 async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    # Uzun formatlı prediction_signals ve eski okuyucular için geniş uyumluluk görünümü
+    try:
+        await create_prediction_store()
+    except Exception as e:
+        print(f"[⚠️] {COMPAT_VIEW_NAME} görünümü oluşturulamadı: {e}")
     yield
+    # Bekleyen emir kayıtlarını yaz, paylaşılan Binance HTTP havuzunu ve WebSocket API oturumlarını kapat
+    await order_journal.close()
+    await close_exchange_client()
+    await close_ws_sessions()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -0,0 +1,556 @@
+# mock_exchange.py
+# Binance USDⓈ-M Futures için yerel taklit borsa: REST + combined stream WS +
+# user data WS + WebSocket API (order.place). Fill'ler deterministiktir
+# (paper_trader.PaperExchange), gecikme ve hata enjeksiyonu ayarlanabilir.
+#
+#   python mock_exchange.py --serve --port 8765
+#     BINANCE_REST_URL=http://127.0.0.1:8765 BINANCE_WS_URL=ws://127.0.0.1:8765 \
+#     BINANCE_WS_API_URL=ws://127.0.0.1:8765/ws-fapi/v1 streamlit run streamlit_app.py
+#
+#   python mock_exchange.py --users 200 --ticks 3 --latency-ms 1 5   (uçtan uca benchmark)
+import json
+import math
+import time
+import hmac
+import socket
+import asyncio
+import hashlib
+import argparse
+import itertools
+import random
+import statistics
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+from paper_trader import PaperExchange
+from rate_limiter import account_id
+
+# Takip edilen semboller: (başlangıç fiyatı, stepSize, tickSize)
+DEFAULT_MARKETS = {
+    "BTCUSDT": (65000.0, 0.001, 0.1),
+    "ETHUSDT": (3200.0, 0.001, 0.01),
+    "BNBUSDT": (600.0, 0.01, 0.01),
+    "SOLUSDT": (150.0, 1, 0.01),
+    "XRPUSDT": (0.6, 0.1, 0.0001),
+    "ADAUSDT": (0.45, 1, 0.0001),
+    "AVAXUSDT": (25.0, 1, 0.001),
+    "DOGEUSDT": (0.12, 1, 0.00001),
+    "DOTUSDT": (6.0, 0.1, 0.001),
+    "LINKUSDT": (14.0, 0.01, 0.001),
+}
+MIN_NOTIONAL = 5.0
+
+# Endpoint weight'leri (X-MBX-USED-WEIGHT-1M başlığı için)
+ENDPOINT_WEIGHTS = {
+    "/fapi/v2/positionRisk": 5,
+    "/fapi/v1/premiumIndex": 10,
+    "/fapi/v1/batchOrders": 5,
+    "/fapi/v1/userTrades": 5,
+    "/fapi/v1/klines": 10,
+}
+
+
+def _free_port(host: str) -> int:
+    with socket.socket() as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+class MockExchange:
+    """
+    Deterministik taklit borsa.
+      - latency: her REST/WS API isteğine eklenen gecikme aralığı (saniye)
+      - precision_error_symbols: kesirli miktarda -1111
+      - percent_price_symbols: her emirde -4131
+      - rate_limit_every: her N'inci REST isteğinde 429 (-1003, Retry-After)
+      - secrets: {apiKey: secret} verilirse imzalar doğrulanır (-1022)
+    Mark price'lar seed'li rastgele yürüyüşle mark_interval'da bir güncellenir.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 markets: Optional[Dict[str, Tuple[float, float, float]]] = None,
+                 latency: Tuple[float, float] = (0.0, 0.0),
+                 precision_error_symbols: Iterable[str] = (),
+                 percent_price_symbols: Iterable[str] = (),
+                 rate_limit_every: int = 0, retry_after: int = 1,
+                 secrets: Optional[Dict[str, str]] = None,
+                 mark_interval: float = 1.0, seed: int = 0):
+        self.host = host
+        self.port = port or _free_port(host)
+        self.markets = dict(markets or DEFAULT_MARKETS)
+        self.latency = latency
+        self.precision_error_symbols = set(precision_error_symbols)
+        self.percent_price_symbols = set(percent_price_symbols)
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.secrets = secrets
+        self.mark_interval = mark_interval
+        self.engine = PaperExchange(start_balance=10_000, latency_ms=0, db_path="")
+        self.mark_prices = {sym: m[0] for sym, m in self.markets.items()}
+        self.requests = 0
+        self.orders = 0
+        self._rng = random.Random(seed)
+        self._weight_window = (0, 0)                 # (dakika, kullanılan weight)
+        self._order_windows: Dict[str, list] = {}  # account -> [(dk, n), (10sn, n)]
+        self._listen_keys: Dict[str, str] = {}     # listenKey -> account
+        self._user_sockets: Dict[str, set] = defaultdict(set)
+        self._stream_sockets: set = set()
+        self._trades: Dict[str, List[dict]] = defaultdict(list)
+        self._trade_ids = itertools.count(1)
+        self._server: Optional[uvicorn.Server] = None
+        self._serve_task: Optional[asyncio.Task] = None
+        self._mark_task: Optional[asyncio.Task] = None
+        self.app = self._build_app()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    @property
+    def ws_api_url(self) -> str:
+        return f"{self.ws_url}/ws-fapi/v1"
+
+    # --- Yardımcılar ---
+    async def _delay(self) -> None:
+        lo, hi = self.latency
+        if hi > 0:
+            await asyncio.sleep(self._rng.uniform(lo, hi))
+
+    def _filters(self, symbol: str) -> dict:
+        _, step, tick = self.markets[symbol]
+        return {"stepSize": step, "minQty": step, "maxQty": 1e9, "minNotional": MIN_NOTIONAL,
+                "tickSize": tick}
+
+    def _check_signature(self, api_key: Optional[str], payload: str, signature: Optional[str]) -> bool:
+        if self.secrets is None:
+            return True
+        secret = self.secrets.get(api_key or "")
+        if secret is None or signature is None:
+            return False
+        expected = hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature)
+
+    def _signed(self, request: Request) -> Optional[JSONResponse]:
+        """REST imzası: signature sorgu dizisinin sonunda gelir."""
+        query = request.url.query
+        payload, _, signature = query.partition("&signature=")
+        if not self._check_signature(request.headers.get("X-MBX-APIKEY"), payload, signature or None):
+            return JSONResponse({"code": -1022, "msg": "Signature for this request is not valid."}, 400)
+        return None
+
+    def _count_orders(self, account: str, n: int) -> Dict[str, str]:
+        now = time.time()
+        minute, ten = int(now // 60), int(now // 10)
+        windows = self._order_windows.setdefault(account, [(minute, 0), (ten, 0)])
+        windows[0] = (minute, (windows[0][1] if windows[0][0] == minute else 0) + n)
+        windows[1] = (ten, (windows[1][1] if windows[1][0] == ten else 0) + n)
+        return {"X-MBX-ORDER-COUNT-1M": str(windows[0][1]), "X-MBX-ORDER-COUNT-10S": str(windows[1][1])}
+
+    def _mark_stream_data(self, symbol: str) -> dict:
+        return {"e": "markPriceUpdate", "E": int(time.time() * 1000), "s": symbol,
+                "p": f"{self.mark_prices[symbol]:.8f}"}
+
+    # --- Emir ---
+    def place(self, api_key: str, symbol: str, side: str, quantity,
+              client_order_id: Optional[str] = None) -> dict:
+        """Tek MARKET emrini hata enjeksiyonu + deterministik fill ile işler."""
+        self.orders += 1
+        if symbol not in self.markets:
+            return {"code": -1121, "msg": "Invalid symbol."}
+        qty = float(quantity)
+        if symbol in self.percent_price_symbols:
+            return {"code": -4131, "msg": "The counterparty's best price does not meet the PERCENT_PRICE filter limit."}
+        if symbol in self.precision_error_symbols and qty != int(qty):
+            return {"code": -1111, "msg": "Precision is over the maximum defined for this asset."}
+        resp = self.engine.fill(api_key, symbol, side, quantity, self.mark_prices[symbol],
+                                self._filters(symbol), client_order_id)
+        if "code" not in resp:
+            self._on_fill(api_key, resp)
+        return resp
+
+    def _on_fill(self, api_key: str, order: dict) -> None:
+        account = account_id(api_key)
+        symbol = order["symbol"]
+        now = int(time.time() * 1000)
+        self._trades[account].append({
+            "id": next(self._trade_ids), "orderId": order["orderId"], "symbol": symbol,
+            "side": order["side"], "price": order["avgPrice"], "qty": order["executedQty"],
+            "quoteQty": order["cumQuote"], "commission": order["commission"],
+            "commissionAsset": "USDT", "realizedPnl": order["realizedPnl"], "time": now,
+        })
+        sockets = self._user_sockets.get(account)
+        if not sockets:
+            return
+        amt, entry = self.engine.account_for_key(api_key).positions.get(symbol, (0.0, 0.0))
+        events = [
+            {"e": "ORDER_TRADE_UPDATE", "E": now, "T": now, "o": {
+                "s": symbol, "c": order["clientOrderId"], "S": order["side"], "o": "MARKET",
+                "q": order["origQty"], "p": "0", "ap": order["avgPrice"], "L": order["avgPrice"],
+                "x": "TRADE", "X": "FILLED", "i": order["orderId"], "l": order["executedQty"],
+                "z": order["executedQty"], "n": order["commission"], "N": "USDT", "T": now,
+                "rp": order["realizedPnl"],
+            }},
+            {"e": "ACCOUNT_UPDATE", "E": now, "T": now, "a": {"m": "ORDER", "P": [{
+                "s": symbol, "pa": str(amt), "ep": str(entry), "cr": "0",
+                "up": str(amt * (self.mark_prices[symbol] - entry)), "mt": "cross", "ps": "BOTH",
+            }]}},
+        ]
+        for ws in list(sockets):
+            for ev in events:
+                asyncio.create_task(self._safe_send(ws, ev))
+
+    @staticmethod
+    async def _safe_send(ws: WebSocket, payload: dict) -> None:
+        try:
+            await ws.send_text(json.dumps(payload))
+        except Exception:
+            pass
+
+    # --- Uygulama ---
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.middleware("http")
+        async def exchange_middleware(request: Request, call_next):
+            self.requests += 1
+            await self._delay()
+            if self.rate_limit_every and self.requests % self.rate_limit_every == 0:
+                return JSONResponse(
+                    {"code": -1003, "msg": "Too many requests; current limit is 2400 requests per minute."},
+                    429, headers={"Retry-After": str(self.retry_after)},
+                )
+            resp = await call_next(request)
+            minute = int(time.time() // 60)
+            used = self._weight_window[1] if self._weight_window[0] == minute else 0
+            used += ENDPOINT_WEIGHTS.get(request.url.path, 1)
+            self._weight_window = (minute, used)
+            resp.headers["X-MBX-USED-WEIGHT-1M"] = str(used)
+            return resp
+
+        @app.get("/fapi/v1/time")
+        async def server_time():
+            return {"serverTime": int(time.time() * 1000)}
+
+        @app.get("/fapi/v1/exchangeInfo")
+        async def exchange_info():
+            symbols = []
+            for sym, (_, step, tick) in self.markets.items():
+                symbols.append({"symbol": sym, "status": "TRADING", "filters": [
+                    {"filterType": "PRICE_FILTER", "tickSize": str(tick), "minPrice": str(tick), "maxPrice": "10000000"},
+                    {"filterType": "LOT_SIZE", "stepSize": str(step), "minQty": str(step), "maxQty": "1000000000"},
+                    {"filterType": "MIN_NOTIONAL", "notional": str(MIN_NOTIONAL)},
+                    {"filterType": "PERCENT_PRICE", "multiplierUp": "1.05", "multiplierDown": "0.95"},
+                ]})
+            return {"timezone": "UTC", "serverTime": int(time.time() * 1000), "symbols": symbols}
+
+        @app.get("/fapi/v1/premiumIndex")
+        async def premium_index(symbol: Optional[str] = None):
+            now = int(time.time() * 1000)
+            items = [{"symbol": sym, "markPrice": f"{p:.8f}", "indexPrice": f"{p:.8f}", "time": now}
+                     for sym, p in self.mark_prices.items() if symbol in (None, sym)]
+            return items[0] if symbol and items else items
+
+        @app.get("/fapi/v1/klines")
+        async def klines(symbol: str, interval: str, startTime: int, endTime: int, limit: int = 500):
+            from kline_store import INTERVAL_MS
+            step = INTERVAL_MS[interval]
+            first = -(-startTime // step) * step
+            times = np.arange(first, endTime + 1, step, dtype=np.int64)[:limit]
+            base = self.markets[symbol][0]
+            # open_time'ın deterministik fonksiyonu: aynı aralık her istekte aynı mumları verir
+            closes = base * (1 + 0.05 * np.sin(times / (step * 50.0)))
+            opens = np.concatenate([[closes[0]], closes[:-1]]) if len(closes) else closes
+            return [
+                [int(t), f"{o:.8f}", f"{max(o, c) * 1.001:.8f}", f"{min(o, c) * 0.999:.8f}", f"{c:.8f}",
+                 "100", int(t + step - 1), f"{100 * c:.8f}", 10, "50", f"{50 * c:.8f}", "0"]
+                for t, o, c in zip(times, opens, closes)
+            ]
+
+        @app.get("/fapi/v2/positionRisk")
+        async def position_risk(request: Request, symbol: Optional[str] = None):
+            if (err := self._signed(request)) is not None:
+                return err
+            acc = self.engine.account_for_key(request.headers.get("X-MBX-APIKEY", ""))
+            out = []
+            for sym in self.markets:
+                if symbol not in (None, sym):
+                    continue
+                amt, entry = acc.positions.get(sym, (0.0, 0.0))
+                mark = self.mark_prices[sym]
+                out.append({
+                    "symbol": sym, "positionAmt": str(amt), "entryPrice": str(entry),
+                    "markPrice": str(mark), "unRealizedProfit": str(amt * (mark - entry)),
+                    "liquidationPrice": "0", "leverage": "20", "marginType": "cross",
+                    "positionSide": "BOTH",
+                })
+            return out
+
+        @app.get("/fapi/v1/userTrades")
+        async def user_trades(request: Request, symbol: str, limit: int = 500,
+                              startTime: Optional[int] = None, endTime: Optional[int] = None):
+            if (err := self._signed(request)) is not None:
+                return err
+            trades = [
+                t for t in self._trades.get(account_id(request.headers.get("X-MBX-APIKEY", "")), [])
+                if t["symbol"] == symbol
+                and (startTime is None or t["time"] >= startTime)
+                and (endTime is None or t["time"] <= endTime)
+            ]
+            return trades[-limit:]
+
+        @app.post("/fapi/v1/order")
+        async def new_order(request: Request, symbol: str, side: str, quantity: str,
+                            newClientOrderId: Optional[str] = None):
+            if (err := self._signed(request)) is not None:
+                return err
+            api_key = request.headers.get("X-MBX-APIKEY", "")
+            resp = self.place(api_key, symbol, side, quantity, newClientOrderId)
+            headers = self._count_orders(account_id(api_key), 1)
+            return JSONResponse(resp, 400 if "code" in resp else 200, headers=headers)
+
+        @app.post("/fapi/v1/batchOrders")
+        async def batch_orders(request: Request, batchOrders: str):
+            if (err := self._signed(request)) is not None:
+                return err
+            api_key = request.headers.get("X-MBX-APIKEY", "")
+            orders = json.loads(batchOrders)
+            if len(orders) > 5:
+                return JSONResponse({"code": -1130, "msg": "Data sent for parameter 'batchOrders' is not valid."}, 400)
+            results = [
+                self.place(api_key, o["symbol"], o["side"], o["quantity"], o.get("newClientOrderId"))
+                for o in orders
+            ]
+            return JSONResponse(results, headers=self._count_orders(account_id(api_key), len(orders)))
+
+        @app.post("/fapi/v1/listenKey")
+        async def new_listen_key(request: Request):
+            api_key = request.headers.get("X-MBX-APIKEY", "")
+            key = hashlib.sha256(f"{api_key}:{time.time()}".encode()).hexdigest()[:60]
+            self._listen_keys[key] = account_id(api_key)
+            return {"listenKey": key}
+
+        @app.put("/fapi/v1/listenKey")
+        async def keepalive_listen_key(listenKey: Optional[str] = None):
+            if listenKey is not None and listenKey not in self._listen_keys:
+                return JSONResponse({"code": -1125, "msg": "This listenKey does not exist."}, 400)
+            return {}
+
+        @app.delete("/fapi/v1/listenKey")
+        async def close_listen_key(listenKey: Optional[str] = None):
+            self._listen_keys.pop(listenKey, None)
+            return {}
+
+        @app.websocket("/stream")
+        async def combined_stream(ws: WebSocket):
+            await ws.accept()
+            streams = [s for s in ws.query_params.get("streams", "").split("/") if s]
+            ws.state.symbols = [s.split("@")[0].upper() for s in streams if s.endswith("@markPrice")]
+            self._stream_sockets.add(ws)
+            try:
+                while True:
+                    await ws.receive_text()
+            except WebSocketDisconnect:
+                pass
+            finally:
+                self._stream_sockets.discard(ws)
+
+        @app.websocket("/ws/{listen_key}")
+        async def user_stream(ws: WebSocket, listen_key: str):
+            account = self._listen_keys.get(listen_key)
+            if account is None:
+                await ws.close(code=1008)
+                return
+            await ws.accept()
+            self._user_sockets[account].add(ws)
+            try:
+                while True:
+                    await ws.receive_text()
+            except WebSocketDisconnect:
+                pass
+            finally:
+                self._user_sockets[account].discard(ws)
+
+        @app.websocket("/ws-fapi/v1")
+        async def ws_api(ws: WebSocket):
+            await ws.accept()
+            try:
+                while True:
+                    req = json.loads(await ws.receive_text())
+                    # Yanıtlar sırasız dönebilir
+                    asyncio.create_task(self._ws_api_respond(ws, req))
+            except WebSocketDisconnect:
+                pass
+
+        return app
+
+    async def _ws_api_respond(self, ws: WebSocket, req: dict) -> None:
+        await self._delay()
+        req_id = req.get("id")
+        params = dict(req.get("params", {}))
+        signature = params.pop("signature", None)
+        payload = "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+        if req.get("method") != "order.place":
+            resp = {"id": req_id, "status": 400, "error": {"code": -1000, "msg": "Unsupported method"}}
+        elif not self._check_signature(params.get("apiKey"), payload, signature):
+            resp = {"id": req_id, "status": 400,
+                    "error": {"code": -1022, "msg": "Signature for this request is not valid."}}
+        else:
+            result = self.place(params.get("apiKey", ""), params.get("symbol"), params.get("side"),
+                                params.get("quantity", "0"), params.get("newClientOrderId"))
+            if "code" in result:
+                resp = {"id": req_id, "status": 400, "error": result}
+            else:
+                resp = {"id": req_id, "status": 200, "result": result}
+        await self._safe_send(ws, resp)
+
+    async def _mark_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.mark_interval)
+            for sym in self.mark_prices:
+                self.mark_prices[sym] *= math.exp(self._rng.gauss(0, 0.0005))
+            for ws in list(self._stream_sockets):
+                for sym in getattr(ws.state, "symbols", ()):
+                    if sym in self.mark_prices:
+                        await self._safe_send(ws, {"stream": f"{sym.lower()}@markPrice",
+                                                   "data": self._mark_stream_data(sym)})
+
+    # --- Yaşam döngüsü ---
+    async def start(self) -> "MockExchange":
+        config = uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning",
+                                lifespan="off", ws="websockets")
+        self._server = uvicorn.Server(config)
+        self._serve_task = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            if self._serve_task.done():
+                self._serve_task.result()
+            await asyncio.sleep(0.01)
+        self._mark_task = asyncio.create_task(self._mark_loop())
+        return self
+
+    async def stop(self) -> None:
+        if self._mark_task is not None:
+            self._mark_task.cancel()
+        if self._server is not None:
+            self._server.should_exit = True
+            await self._serve_task
+
+
+# --- Uçtan uca benchmark ---
+async def _run_benchmark(n_users: int, ticks: int, latency_ms: Tuple[float, float], transport: str,
+                         rate_limit: bool, precision_error_symbols: List[str],
+                         percent_price_symbols: List[str], rate_limit_every: int, seed: int) -> None:
+    from types import SimpleNamespace
+    from datetime import datetime, timedelta
+    import binance_trader
+    import prediction_trader
+    import ws_order_client
+    from clock_sync import clock_sync
+    from rate_limiter import rate_limiter, TokenBucket
+    from order_journal import order_journal
+    from prediction_store import PredictionSignals
+    from background_jobs import run_trading_tick
+
+    if prediction_trader.TRADE_BACKEND != "live":
+        raise SystemExit("Benchmark canlı backend (TRADE_BACKEND=live) üzerinden çalışır.")
+
+    users = {
+        i: (SimpleNamespace(id=i, api_key=f"bench-key-{i}", api_secret=f"bench-secret-{i}"), 100.0)
+        for i in range(n_users)
+    }
+    mock = await MockExchange(
+        latency=(latency_ms[0] / 1000, latency_ms[1] / 1000),
+        precision_error_symbols=precision_error_symbols,
+        percent_price_symbols=percent_price_symbols,
+        rate_limit_every=rate_limit_every,
+        secrets={u.api_key: u.api_secret for u, _ in users.values()},
+        seed=seed,
+    ).start()
+
+    # Tüm istemcileri mock'a yönlendir
+    binance_trader._exchange_client = binance_trader.ExchangeClient(base_url=mock.url, http2=False)
+    clock_sync.base_url = mock.url
+    clock_sync.synced_at = 0.0
+    order_journal.persist = False
+    prediction_trader.ORDER_TRANSPORT = transport
+    for user, _ in users.values():
+        ws_order_client.get_ws_session(user.api_key, user.api_secret).url = mock.ws_api_url
+    if not rate_limit:
+        rate_limiter.ip_weight = TokenBucket(1e12, 60)
+        rate_limiter.orders_per_min = rate_limiter.orders_per_10s = 10 ** 12
+        rate_limiter.account_orders.clear()
+
+    rng = random.Random(seed)
+    symbols = prediction_trader.SYMBOLS
+    started_at = datetime(2026, 1, 1)
+    try:
+        for tick in range(ticks):
+            signals = PredictionSignals(started_at + timedelta(hours=4 * tick),
+                                        {sym: rng.choice((-1, 0, 1)) for sym in symbols})
+            orders_before, requests_before = mock.orders, mock.requests
+            report = await run_trading_tick(users, prediction=signals)
+
+            latencies = sorted(
+                r["signal_to_last_order_ms"] for r in report["users"].values()
+                if r.get("signal_to_last_order_ms") is not None
+            )
+            statuses = defaultdict(int)
+            for r in report["users"].values():
+                for entry in r.get("symbols", {}).values():
+                    statuses[entry.get("status")] += 1
+            orders = mock.orders - orders_before
+            total_s = report["elapsed_ms"] / 1000
+            print(f"tick={tick} users={n_users} transport={transport} total={report['elapsed_ms']:.1f}ms "
+                  f"orders={orders} ({orders / total_s:.0f}/s) requests={mock.requests - requests_before} "
+                  f"statuses={dict(statuses)}")
+            if latencies:
+                print(f"  signal→last fill p50={statistics.median(latencies):.1f}ms "
+                      f"p99={latencies[max(0, math.ceil(len(latencies) * 0.99) - 1)]:.1f}ms "
+                      f"max={latencies[-1]:.1f}ms")
+    finally:
+        await ws_order_client.close_ws_sessions()
+        await binance_trader.close_exchange_client()
+        await mock.stop()
+
+
+async def _serve(host: str, port: int, latency_ms: Tuple[float, float], **kwargs) -> None:
+    mock = await MockExchange(host=host, port=port,
+                              latency=(latency_ms[0] / 1000, latency_ms[1] / 1000), **kwargs).start()
+    print(f"Mock Binance Futures: REST {mock.url}  WS {mock.ws_url}  WS API {mock.ws_api_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await mock.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local mock Binance Futures exchange and end-to-end benchmark")
+    parser.add_argument("--serve", action="store_true", help="Yalnızca sunucuyu çalıştır")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--ticks", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, nargs=2, default=(1.0, 5.0))
+    parser.add_argument("--transport", choices=("rest", "ws"), default="rest")
+    parser.add_argument("--rate-limit", action="store_true",
+                        help="İstemci tarafı rate limit governor'ı gerçek limitlerle çalıştır")
+    parser.add_argument("--precision-error-symbols", nargs="*", default=[])
+    parser.add_argument("--percent-price-symbols", nargs="*", default=[])
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Her N'inci REST isteğinde 429")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    errors = dict(precision_error_symbols=args.precision_error_symbols,
+                  percent_price_symbols=args.percent_price_symbols,
+                  rate_limit_every=args.rate_limit_every)
+    if args.serve:
+        asyncio.run(_serve(args.host, args.port, tuple(args.latency_ms), seed=args.seed, **errors))
+    else:
+        asyncio.run(_run_benchmark(args.users, args.ticks, tuple(args.latency_ms), args.transport,
+                                   args.rate_limit, seed=args.seed, **errors))
@@ -0,0 +1,62 @@
+# mock_ws_api.py
+# Binance Futures WebSocket API (order.place) istemcisinin gecikme ve doğruluk
+# benchmark'ı. Sunucu olarak mock_exchange.MockExchange'in /ws-fapi/v1 uç noktası
+# kullanılır (hata enjeksiyonu ve imza kontrolü tek yerde).
+#   python mock_ws_api.py --orders 200 --latency-ms 1 5
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Tuple
+from mock_exchange import MockExchange
+
+
+async def _run_benchmark(n_orders: int, latency_ms: Tuple[float, float]) -> None:
+    from clock_sync import clock_sync
+    from ws_order_client import WSOrderSession
+
+    # Çevrimdışı: sunucu saati ölçümü yerine yerel saat
+    clock_sync.synced_at = time.monotonic()
+
+    mock = await MockExchange(
+        latency=(latency_ms[0] / 1000, latency_ms[1] / 1000),
+        secrets={"mock-key": "mock-secret"},
+    ).start()
+    session = WSOrderSession("mock-key", "mock-secret", url=mock.ws_api_url)
+    await session.connect()
+
+    symbols = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT", "LINKUSDT"]
+    orders = [(symbols[i % len(symbols)], "BUY" if i % 2 else "SELL", i + 1) for i in range(n_orders)]
+
+    async def place(order):
+        t0 = time.perf_counter()
+        resp = await session.place_order(*order)
+        return order, resp, (time.perf_counter() - t0) * 1000
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(place(o) for o in orders))
+    total_ms = (time.perf_counter() - started) * 1000
+
+    # Doğruluk: her yanıt kendi isteğiyle eşleşmeli
+    mismatched = [
+        o for o, resp, _ in results
+        if resp.get("status") != 200
+        or resp["result"]["symbol"] != o[0]
+        or resp["result"]["side"] != o[1]
+        or resp["result"]["origQty"] != str(o[2])
+    ]
+    latencies = sorted(ms for _, _, ms in results)
+    print(f"orders={n_orders} total={total_ms:.1f}ms mismatched={len(mismatched)}")
+    print(f"latency p50={statistics.median(latencies):.2f}ms "
+          f"p99={latencies[int(len(latencies) * 0.99) - 1]:.2f}ms max={latencies[-1]:.2f}ms")
+
+    await session.close()
+    await mock.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock Binance WebSocket API order benchmark")
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, nargs=2, default=(1.0, 5.0))
+    args = parser.parse_args()
+    asyncio.run(_run_benchmark(args.orders, tuple(args.latency_ms)))
@@ -3,7 +3,7 @@ from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
-from sqlalchemy import Column, Integer, Float, DateTime
+from sqlalchemy import Column, Integer, Float, DateTime, Boolean, Index
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -24,6 +24,23 @@ class Prediction(Base):
     linkusdt_pred = Column(Integer)
     solusdt_pred = Column(Integer)
 
+class PredictionSignal(Base):
+    """
+    Uzun formatta prediction deposu: her (timestamp, symbol, model_version) için bir satır.
+    Yeni sembol eklemek şema değişikliği gerektirmez.
+    """
+    __tablename__ = "prediction_signals"
+
+    timestamp = Column(DateTime, primary_key=True)
+    symbol = Column(String(20), primary_key=True)
+    model_version = Column(String(50), primary_key=True, default="")
+    signal = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        # Sembol bazlı zaman aralığı sorguları (analiz/backtest) için
+        Index("ix_prediction_signals_symbol_ts", "symbol", "timestamp"),
+    )
+
 class User(Base):
     __tablename__ = "Users"
 
@@ -52,6 +69,43 @@ class Strategy(Base):
     user = relationship("User", back_populates="strategies")
 
 
+class OrderJournal(Base):
+    """
+    Gönderilen/atlanan her emrin kalıcı kaydı (deneme başına bir satır).
+    client_order_id Binance'e newClientOrderId olarak gider; aynı emrin
+    tekrar gönderilmesini önler.
+    """
+    __tablename__ = "order_journal"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    client_order_id = Column(String(36), index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("Users.id"), index=True)
+    symbol = Column(String(20), nullable=False)
+    side = Column(String(4), nullable=False)
+    quantity = Column(Float, nullable=False)
+    status = Column(String(20), nullable=False)       # sent / skipped / error
+    reason = Column(String(50))
+    exchange_order_id = Column(String(50))
+    latency_ms = Column(Float)
+    response = Column(JSON)
+    error = Column(String(500))
+    prediction_ts = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class TradingControl(Base):
+    """
+    UI ile trading worker'ları arasındaki kontrol kanalı:
+    kullanıcının trade döngüsü açık mı, hangi büyüklükle.
+    """
+    __tablename__ = "trading_controls"
+
+    user_id = Column(Integer, ForeignKey("Users.id"), primary_key=True)
+    active = Column(Boolean, default=False, nullable=False)
+    trade_size_usdt = Column(Float, default=10.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime
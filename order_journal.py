@@ -0,0 +1,231 @@
+import os
+import asyncio
+import calendar
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable, List, Optional, Set
+from sqlalchemy import insert
+from sqlalchemy.future import select
+from database import engine, get_async_session
+from models import OrderJournal
+
+# Bir bulk insert'teki en fazla satır ve en uzun bekleme (saniye)
+ORDER_JOURNAL_BATCH_SIZE = int(os.getenv("ORDER_JOURNAL_BATCH_SIZE", "500"))
+ORDER_JOURNAL_FLUSH_INTERVAL = float(os.getenv("ORDER_JOURNAL_FLUSH_INTERVAL", "1"))
+# DB erişilemezken bellekte tutulacak en fazla satır (fazlası en eskiden atılır)
+ORDER_JOURNAL_MAX_BUFFER = int(os.getenv("ORDER_JOURNAL_MAX_BUFFER", "100000"))
+# Idempotency kontrolü için bellekte tutulan son client order id sayısı
+ORDER_JOURNAL_RECENT = int(os.getenv("ORDER_JOURNAL_RECENT", "50000"))
+
+# False → yalnızca bellekteki idempotency kaydı tutulur, DB'ye yazılmaz (ör. yük testi)
+ORDER_JOURNAL_PERSIST = os.getenv("ORDER_JOURNAL_PERSIST", "True") == "True"
+
+# Borsanın emri kabul ettiği durum
+STATUS_SENT = "sent"
+
+
+def client_order_id(user_id, symbol: str, prediction_ts: datetime) -> str:
+    """
+    (kullanıcı, prediction, sembol) için deterministik newClientOrderId.
+    Aynı tick yeniden çalışırsa aynı id üretilir (Binance sınırı: 36 karakter).
+    Kısaltma gerekirse baş kısımdan kesilir; farklı prediction'lar aynı id'ye düşmesin.
+    """
+    epoch = f"-{calendar.timegm(prediction_ts.utctimetuple())}"
+    return f"pt{user_id}-{symbol}"[:36 - len(epoch)] + epoch
+
+
+class OrderJournalWriter:
+    """
+    Emir kayıtları için write-behind kuyruk.
+    record() senkron ve anlıktır (yalnızca belleğe ekler); arka plan görevi
+    satırları ORDER_JOURNAL_BATCH_SIZE'lık bulk insert'lerle yazar.
+    DB hatasında satırlar kaybolmaz, bir sonraki flush'ta yeniden denenir.
+    """
+
+    def __init__(self, batch_size: int = ORDER_JOURNAL_BATCH_SIZE,
+                 flush_interval: float = ORDER_JOURNAL_FLUSH_INTERVAL,
+                 persist: bool = ORDER_JOURNAL_PERSIST):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.persist = persist
+        self.written = 0
+        self.dropped = 0
+        self._buffer: List[dict] = []
+        # client_order_id -> status (en yeni sonda)
+        self._recent: "OrderedDict[str, str]" = OrderedDict()
+        self._table_ready = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # --- Idempotency ---
+    def _remember(self, cid: str, status: str) -> None:
+        self._recent[cid] = status
+        self._recent.move_to_end(cid)
+        while len(self._recent) > ORDER_JOURNAL_RECENT:
+            self._recent.popitem(last=False)
+
+    def already_sent(self, cid: str) -> bool:
+        """Bu client order id ile daha önce borsaca kabul edilmiş bir emir var mı?"""
+        return self._recent.get(cid) == STATUS_SENT
+
+    async def sent_among(self, cids: Iterable[str]) -> Set[str]:
+        """
+        cids içinden borsaca kabul edildiği bilinenler. Bellekte olmayanlar
+        order_journal tablosundan sorulur; böylece yeniden başlatılan veya başka
+        bir process'in (Streamlit, FastAPI, worker) gönderdiği emirler de görülür.
+        (MARKET emri anında dolduğu için -4116 burada yardımcı olmaz.)
+        Henüz flush edilmemiş başka process satırları görülemez. DB okunamazsa
+        yalnızca bellek kullanılır.
+        """
+        cids = list(cids)
+        sent = {cid for cid in cids if self.already_sent(cid)}
+        unknown = [cid for cid in cids if cid not in sent]
+        if not unknown or not self.persist:
+            return sent
+        try:
+            await self._ensure_table()
+            session = await get_async_session()
+            try:
+                result = await session.execute(
+                    select(OrderJournal.client_order_id)
+                    .where(OrderJournal.client_order_id.in_(unknown))
+                    .where(OrderJournal.status == STATUS_SENT)
+                )
+                found = set(result.scalars().all())
+            finally:
+                await session.close()
+        except Exception as e:
+            print(f"[⚠️] Emir journal'ı okunamadı, yalnızca bellek kontrol ediliyor: {e}")
+            return sent
+        for cid in found:
+            self._remember(cid, STATUS_SENT)
+        return sent | found
+
+    async def warm(self, since: datetime) -> int:
+        """Yeniden başlatmada idempotency belleğini DB'deki son kayıtlardan doldurur."""
+        await self._ensure_table()
+        session = await get_async_session()
+        try:
+            result = await session.execute(
+                select(OrderJournal.client_order_id)
+                .where(OrderJournal.status == STATUS_SENT)
+                .where(OrderJournal.created_at >= since)
+            )
+            cids = result.scalars().all()
+        finally:
+            await session.close()
+        for cid in cids:
+            self._remember(cid, STATUS_SENT)
+        return len(cids)
+
+    # --- Kayıt ---
+    def record(self, client_order_id: str, user_id, symbol: str, side: str, quantity: float,
+               status: str, reason: Optional[str] = None, response: Optional[dict] = None,
+               error: Optional[str] = None, latency_ms: Optional[float] = None,
+               prediction_ts: Optional[datetime] = None) -> None:
+        """Emir hot path'inden çağrılır; DB'yi beklemez."""
+        self._remember(client_order_id, status)
+        if not self.persist:
+            return
+        order_id = response.get("orderId") if isinstance(response, dict) else None
+        self._buffer.append({
+            "client_order_id": client_order_id,
+            "user_id": user_id,
+            "symbol": symbol,
+            "side": side,
+            "quantity": float(quantity),
+            "status": status,
+            "reason": reason,
+            "exchange_order_id": str(order_id) if order_id is not None else None,
+            "latency_ms": latency_ms,
+            "response": response,
+            "error": error[:500] if error else None,
+            "prediction_ts": prediction_ts,
+            "created_at": datetime.utcnow(),
+        })
+        if len(self._buffer) > ORDER_JOURNAL_MAX_BUFFER:
+            overflow = len(self._buffer) - ORDER_JOURNAL_MAX_BUFFER
+            del self._buffer[:overflow]
+            self.dropped += overflow
+        self.start()
+        if len(self._buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    # --- Yazma ---
+    async def _ensure_table(self) -> None:
+        if not self._table_ready:
+            async with engine.begin() as conn:
+                await conn.run_sync(OrderJournal.__table__.create, checkfirst=True)
+            self._table_ready = True
+
+    def _get_flush_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._flush_lock is None or self._flush_lock_loop is not loop:
+            self._flush_lock = asyncio.Lock()
+            self._flush_lock_loop = loop
+        return self._flush_lock
+
+    async def flush(self) -> int:
+        """Bekleyen satırları batch'ler halinde yazar; yazılan satır sayısını döner."""
+        written = 0
+        async with self._get_flush_lock():
+            await self._ensure_table()
+            while self._buffer:
+                batch = self._buffer[:self.batch_size]
+                session = await get_async_session()
+                try:
+                    await session.execute(insert(OrderJournal), batch)
+                    await session.commit()
+                finally:
+                    await session.close()
+                del self._buffer[:len(batch)]
+                written += len(batch)
+        self.written += written
+        return written
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self._buffer:
+                continue
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[⚠️] Emir journal'ı yazılamadı ({len(self._buffer)} satır bekliyor): {e}")
+
+    def start(self) -> Optional[asyncio.Task]:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        return self._task
+
+    async def close(self) -> None:
+        """Arka plan görevini durdurur ve kalan satırları yazar."""
+        task, self._task = self._task, None
+        if task and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._buffer:
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[⚠️] Emir journal'ı kapanışta yazılamadı ({len(self._buffer)} satır): {e}")
+
+
+# Process genelinde paylaşılan journal
+order_journal = OrderJournalWriter()
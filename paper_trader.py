@@ -0,0 +1,388 @@
+# paper_trader.py
+# binance_trader ile aynı fonksiyon arayüzüne sahip kağıt üzerinde (paper) trade backend'i.
+# Emirler borsaya gitmez; yerel mark price akışından fill simüle edilir.
+#   TRADE_BACKEND=paper  → prediction_trader bu modülü kullanır
+#   python paper_trader.py --accounts 2000   (çevrimdışı yük testi)
+import os
+import time
+import asyncio
+import argparse
+import itertools
+import sqlite3
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from binance_trader import BATCH_ORDER_LIMIT, skipped_order, symbol_filter_cache
+from price_source import price_source
+from rate_limiter import account_id
+
+load_dotenv()
+
+# Taker komisyonu (0.0004 = %0.04) ve fiyat kayması (baz puan)
+PAPER_TAKER_FEE = float(os.getenv("PAPER_TAKER_FEE", "0.0004"))
+PAPER_SLIPPAGE_BPS = float(os.getenv("PAPER_SLIPPAGE_BPS", "0"))
+# Yeni hesapların başlangıç bakiyesi (USDT)
+PAPER_START_BALANCE = float(os.getenv("PAPER_START_BALANCE", "10000"))
+# Simüle edilen emir gecikmesi (ms); 0 → gecikme yok
+PAPER_LATENCY_MS = float(os.getenv("PAPER_LATENCY_MS", "0"))
+# Boşsa durum yalnızca bellekte tutulur; dosya yolu verilirse SQLite'a yazılır
+PAPER_DB_PATH = os.getenv("PAPER_DB_PATH", "")
+# Tekrar eden client order id (-4116) kontrolü için hatırlanan son id sayısı
+PAPER_RECENT_ORDER_IDS = int(os.getenv("PAPER_RECENT_ORDER_IDS", "50000"))
+
+
+class PaperAccount:
+    """Tek bir sanal hesap: net pozisyonlar, bakiye, gerçekleşen PnL ve komisyonlar."""
+
+    __slots__ = ("account", "balance", "realized_pnl", "fees", "positions")
+
+    def __init__(self, account: str, balance: float = PAPER_START_BALANCE):
+        self.account = account
+        self.balance = balance
+        self.realized_pnl = 0.0
+        self.fees = 0.0
+        # symbol -> (positionAmt, entryPrice)
+        self.positions: Dict[str, Tuple[float, float]] = {}
+
+    def apply_fill(self, symbol: str, signed_qty: float, price: float, fee: float) -> float:
+        """Fill'i pozisyona işler, gerçekleşen PnL'i döner."""
+        amt, entry = self.positions.get(symbol, (0.0, 0.0))
+        new_amt = round(amt + signed_qty, 8)
+        realized = 0.0
+
+        if amt == 0 or (amt > 0) == (signed_qty > 0):
+            # Pozisyon açılıyor/büyüyor: ağırlıklı ortalama giriş fiyatı
+            entry = (abs(amt) * entry + abs(signed_qty) * price) / abs(new_amt)
+        else:
+            # Azaltma, kapatma veya yön değiştirme
+            closed = min(abs(amt), abs(signed_qty))
+            realized = closed * (price - entry) * (1 if amt > 0 else -1)
+            if new_amt == 0:
+                entry = 0.0
+            elif (new_amt > 0) != (amt > 0):
+                entry = price
+
+        if new_amt == 0:
+            self.positions.pop(symbol, None)
+        else:
+            self.positions[symbol] = (new_amt, entry)
+        self.realized_pnl += realized
+        self.fees += fee
+        self.balance += realized - fee
+        return realized
+
+    def snapshot(self, prices: Optional[Dict[str, float]] = None) -> dict:
+        prices = prices or {}
+        unrealized = sum(
+            amt * (prices[sym] - entry)
+            for sym, (amt, entry) in self.positions.items()
+            if sym in prices
+        )
+        return {
+            "account": self.account,
+            "balance": round(self.balance, 8),
+            "realized_pnl": round(self.realized_pnl, 8),
+            "unrealized_pnl": round(unrealized, 8),
+            "fees": round(self.fees, 8),
+            "positions": {sym: {"positionAmt": amt, "entryPrice": entry}
+                          for sym, (amt, entry) in self.positions.items()},
+        }
+
+
+class PaperExchange:
+    """
+    Binance Futures MARKET emirlerini taklit eden simülatör.
+      - Fill fiyatı: price_source (yerel WS akışı, gerekirse toplu REST) ± kayma
+      - Filtreler: stepSize (-1111), min/maxQty (-4003/-4005), minNotional (-4164)
+      - Aynı hesapta daha önce kullanılmış client order id: -4116
+      - Komisyon: notional * PAPER_TAKER_FEE
+    Durum bellekte tutulur; db_path verilirse her fill SQLite'a da yazılır.
+    """
+
+    def __init__(self, fee_rate: float = PAPER_TAKER_FEE, slippage_bps: float = PAPER_SLIPPAGE_BPS,
+                 start_balance: float = PAPER_START_BALANCE, latency_ms: float = PAPER_LATENCY_MS,
+                 db_path: str = PAPER_DB_PATH):
+        self.fee_rate = fee_rate
+        self.slippage_bps = slippage_bps
+        self.start_balance = start_balance
+        self.latency_ms = latency_ms
+        self.accounts: Dict[str, PaperAccount] = {}
+        self.fills = 0
+        self.rejects = 0
+        self._order_ids = itertools.count(1)
+        self._client_ids: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._open_db(db_path)
+
+    # --- Persistence ---
+    def _open_db(self, path: str) -> None:
+        self._db = sqlite3.connect(path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS paper_accounts (
+                account TEXT PRIMARY KEY, balance REAL, realized_pnl REAL, fees REAL
+            );
+            CREATE TABLE IF NOT EXISTS paper_positions (
+                account TEXT, symbol TEXT, amount REAL, entry_price REAL,
+                PRIMARY KEY (account, symbol)
+            );
+        """)
+        for account, balance, realized, fees in self._db.execute("SELECT * FROM paper_accounts"):
+            acc = self.accounts[account] = PaperAccount(account, balance)
+            acc.realized_pnl, acc.fees = realized, fees
+        for account, symbol, amount, entry in self._db.execute("SELECT * FROM paper_positions"):
+            self.account(account).positions[symbol] = (amount, entry)
+
+    def _persist(self, acc: PaperAccount, symbol: str) -> None:
+        if self._db is None:
+            return
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO paper_accounts VALUES (?, ?, ?, ?)",
+                (acc.account, acc.balance, acc.realized_pnl, acc.fees),
+            )
+            pos = acc.positions.get(symbol)
+            if pos is None:
+                self._db.execute("DELETE FROM paper_positions WHERE account = ? AND symbol = ?",
+                                 (acc.account, symbol))
+            else:
+                self._db.execute("INSERT OR REPLACE INTO paper_positions VALUES (?, ?, ?, ?)",
+                                 (acc.account, symbol, pos[0], pos[1]))
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # --- Accounts ---
+    def account(self, account: str) -> PaperAccount:
+        acc = self.accounts.get(account)
+        if acc is None:
+            acc = self.accounts[account] = PaperAccount(account, self.start_balance)
+        return acc
+
+    def account_for_key(self, api_key: str) -> PaperAccount:
+        return self.account(account_id(api_key))
+
+    def reset(self) -> None:
+        self.accounts.clear()
+        self.fills = self.rejects = 0
+        self._client_ids.clear()
+        if self._db is not None:
+            with self._db:
+                self._db.execute("DELETE FROM paper_accounts")
+                self._db.execute("DELETE FROM paper_positions")
+
+    # --- Orders ---
+    def _reject(self, code: int, msg: str) -> dict:
+        self.rejects += 1
+        return {"code": code, "msg": msg}
+
+    def _check_filters(self, qty: float, price: float, filters: dict) -> Optional[dict]:
+        step = filters.get("stepSize")
+        if qty <= 0:
+            return self._reject(-4003, "Quantity less than or equal to zero.")
+        if step and Decimal(str(qty)) % Decimal(str(step)) != 0:
+            return self._reject(-1111, "Precision is over the maximum defined for this asset.")
+        if filters.get("minQty") and qty < filters["minQty"]:
+            return self._reject(-4003, "Quantity less than min quantity.")
+        if filters.get("maxQty") and qty > filters["maxQty"]:
+            return self._reject(-4005, "Quantity greater than max quantity.")
+        min_notional = filters.get("minNotional", 0)
+        if qty * price < min_notional:
+            return self._reject(
+                -4164, f"Order's notional must be no smaller than {min_notional} (unless you choose reduce only)."
+            )
+        return None
+
+    def fill(self, api_key: str, symbol: str, side: str, quantity, price: float,
+             filters: dict, client_order_id: Optional[str] = None) -> dict:
+        """
+        Verilen fiyat ve filtrelerle MARKET emrini anında gerçekleştirir (deterministik).
+        Binance'in emir yanıtı biçiminde (FILLED) veya hata biçiminde
+        ({"code": ..., "msg": ...}) sözlük döner.
+        """
+        qty = float(quantity)
+        cid_key = (account_id(api_key), client_order_id) if client_order_id else None
+        if cid_key is not None and cid_key in self._client_ids:
+            return self._reject(-4116, "ClientOrderId is duplicated.")
+        error = self._check_filters(qty, price, filters)
+        if error is not None:
+            return error
+
+        slip = self.slippage_bps / 10_000
+        fill_price = price * (1 + slip if side == "BUY" else 1 - slip)
+        notional = qty * fill_price
+        fee = notional * self.fee_rate
+
+        acc = self.account_for_key(api_key)
+        realized = acc.apply_fill(symbol, qty if side == "BUY" else -qty, fill_price, fee)
+        self._persist(acc, symbol)
+        self.fills += 1
+
+        order_id = next(self._order_ids)
+        if cid_key is not None:
+            self._client_ids[cid_key] = order_id
+            while len(self._client_ids) > PAPER_RECENT_ORDER_IDS:
+                self._client_ids.popitem(last=False)
+        return {
+            "orderId": order_id,
+            "clientOrderId": client_order_id or f"paper-{order_id}",
+            "symbol": symbol,
+            "side": side,
+            "positionSide": "BOTH",
+            "type": "MARKET",
+            "status": "FILLED",
+            "origQty": str(quantity),
+            "executedQty": str(quantity),
+            "avgPrice": str(fill_price),
+            "cumQuote": str(notional),
+            "commission": str(fee),
+            "realizedPnl": str(realized),
+            "updateTime": int(time.time() * 1000),
+        }
+
+    async def place_order(self, api_key: str, symbol: str, side: str, quantity,
+                          client_order_id: Optional[str] = None) -> dict:
+        """Tek MARKET emri; fiyat price_source'tan, filtreler exchangeInfo önbelleğinden."""
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        price = await price_source.get_price(symbol)
+        if price is None:
+            return self._reject(-1121, "Invalid symbol.")
+        filters = await symbol_filter_cache.get(symbol)
+        return self.fill(api_key, symbol, side, quantity, price, filters, client_order_id)
+
+
+# Process genelinde paylaşılan simülatör
+paper_exchange = PaperExchange()
+
+
+# --- binance_trader ile aynı arayüz ---
+async def get_symbol_filters(api_key: str, api_secret: str, symbol: str) -> dict:
+    return await symbol_filter_cache.get(symbol)
+
+
+async def get_position_amount(api_key: str, api_secret: str, symbol: str) -> float:
+    return paper_exchange.account_for_key(api_key).positions.get(symbol, (0.0, 0.0))[0]
+
+
+async def get_position_amounts(api_key: str, api_secret: str) -> Dict[str, float]:
+    return {sym: amt for sym, (amt, _) in paper_exchange.account_for_key(api_key).positions.items()}
+
+
+async def get_mark_price(api_key: str, api_secret: str, symbol: str) -> float:
+    return await price_source.get_price(symbol) or 0.0
+
+
+async def send_binance_order(api_key: str, api_secret: str, symbol: str, side: str, quantity: float,
+                             client_order_id: Optional[str] = None):
+    """
+    binance_trader.send_binance_order ile aynı fallback'ler: -1111 → integer qty,
+    -4131 / -4116 → skipped_order().
+    """
+    qty_to_try = quantity
+    while True:
+        data = await paper_exchange.place_order(api_key, symbol, side, qty_to_try, client_order_id)
+        code = data.get("code")
+        if code is None:
+            print(f"[PAPER ORDER] {symbol} {side} qty={qty_to_try} @ {data['avgPrice']}")
+            return data
+        if code == -1111 and qty_to_try != int(qty_to_try):
+            fallback = int(qty_to_try)
+            print(f"[WARN] {symbol} precision error ({quantity}), retrying with integer qty={fallback}")
+            qty_to_try = fallback
+            continue
+        if code == -4131:
+            print(f"[WARN] {symbol} {side}: PERCENT_PRICE filter limit, skipping order.")
+            return skipped_order(code, data.get("msg"))
+        if code == -4116:
+            print(f"[WARN] {symbol} {side}: duplicate clientOrderId {client_order_id}, skipping order.")
+            return skipped_order(code, data.get("msg"))
+        raise RuntimeError(f"Order failed: {data}")
+
+
+async def send_binance_orders(api_key: str, api_secret: str, orders: List[dict]) -> List[Optional[dict]]:
+    """binance_trader.send_binance_orders ile aynı dönüş biçimi; hatalı emir diğerlerini etkilemez."""
+    results: List[Optional[dict]] = []
+    for start in range(0, len(orders), BATCH_ORDER_LIMIT):
+        for o in orders[start:start + BATCH_ORDER_LIMIT]:
+            try:
+                results.append(await send_binance_order(
+                    api_key, api_secret, o["symbol"], o["side"], o["quantity"], o.get("client_order_id")
+                ))
+            except RuntimeError as e:
+                print(f"[ERROR] {o['symbol']} {o['side']}: order failed → {e}")
+                results.append(paper_exchange._reject(-1000, str(e)))
+    return results
+
+
+async def close_position(api_key: str, api_secret: str, symbol: str, current_amt: float):
+    side = "SELL" if current_amt > 0 else "BUY"
+    return await send_binance_order(api_key, api_secret, symbol, side, abs(current_amt))
+
+
+# --- Çevrimdışı yük testi ---
+class _StaticFeed:
+    """price_source'a bağlanan sabit fiyat akışı (her okumada taze görünür)."""
+
+    def __init__(self, prices: Dict[str, float]):
+        self.latest_prices = prices
+
+    @property
+    def latest_price_times(self) -> Dict[str, float]:
+        now = time.time()
+        return {sym: now for sym in self.latest_prices}
+
+
+async def _run_load_test(n_accounts: int, ticks: int) -> None:
+    import random
+    import statistics
+    from types import SimpleNamespace
+    from prediction_store import PredictionSignals
+    from datetime import datetime
+    import background_jobs
+    import prediction_trader
+    # __main__ olarak çalışırken prediction_trader'ın kullandığı modül örneği
+    from paper_trader import paper_exchange
+    from order_journal import order_journal
+
+    if prediction_trader.TRADE_BACKEND != "paper":
+        raise SystemExit("TRADE_BACKEND=paper olmadan yük testi çalıştırılamaz.")
+
+    # Çevrimdışı: sabit fiyatlar ve filtreler
+    prices = {"ADAUSDT": 0.45, "AVAXUSDT": 25.0, "BNBUSDT": 600.0, "BTCUSDT": 65000.0,
+              "DOGEUSDT": 0.12, "DOTUSDT": 6.0, "ETHUSDT": 3200.0, "LINKUSDT": 14.0, "SOLUSDT": 150.0}
+    steps = {"BTCUSDT": 0.001, "ETHUSDT": 0.001, "BNBUSDT": 0.01, "SOLUSDT": 1, "AVAXUSDT": 1,
+             "LINKUSDT": 0.01, "DOTUSDT": 0.1, "ADAUSDT": 1, "DOGEUSDT": 1}
+    # Journal yalnızca bellekte (çevrimdışı, DB yok)
+    order_journal.persist = False
+    price_source.attach_feed(_StaticFeed(prices))
+    symbol_filter_cache._filters = {sym: {"stepSize": step, "minNotional": 5.0} for sym, step in steps.items()}
+    symbol_filter_cache._loaded_at = time.monotonic()
+
+    users = {
+        i: (SimpleNamespace(id=i, api_key=f"paper-key-{i}", api_secret="paper-secret"), 100.0)
+        for i in range(n_accounts)
+    }
+    for tick in range(ticks):
+        signals = PredictionSignals(datetime.utcnow(), {sym: random.choice((-1, 0, 1)) for sym in prices})
+        report = await background_jobs.run_trading_tick(users, prediction=signals)
+        per_user = sorted(r.get("elapsed_ms", 0) for r in report["users"].values())
+        print(f"tick={tick} accounts={n_accounts} total={report['elapsed_ms']}ms "
+              f"user p50={statistics.median(per_user):.1f}ms max={per_user[-1]:.1f}ms "
+              f"fills={paper_exchange.fills} rejects={paper_exchange.rejects}")
+
+    sample = paper_exchange.account_for_key(users[0][0].api_key).snapshot(prices)
+    print(f"sample account: {sample}")
+    paper_exchange.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paper trading load test through the real trading pipeline")
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=3)
+    args = parser.parse_args()
+    os.environ["TRADE_BACKEND"] = "paper"
+    asyncio.run(_run_load_test(args.accounts, args.ticks))
@@ -0,0 +1,137 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import text, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from database import engine
+from models import Prediction, PredictionSignal
+
+# Geniş tablodaki `*_pred` kolonlarından türetilen semboller (ADAUSDT, AVAXUSDT, ...)
+WIDE_SYMBOLS = [
+    c.name[:-len("_pred")].upper()
+    for c in Prediction.__table__.columns
+    if c.name.endswith("_pred")
+]
+
+# Eski (geniş) okuyucular için uzun tablonun geniş görünümü
+COMPAT_VIEW_NAME = "predictions_wide_v"
+
+
+class PredictionSignals(NamedTuple):
+    timestamp: datetime
+    signals: Dict[str, int]   # symbol (büyük harf) -> -1 / 0 / 1
+
+
+def from_wide_row(row: Prediction) -> PredictionSignals:
+    """Geniş `predictions` satırını sembol→sinyal eşlemesine çevirir."""
+    signals = {}
+    for sym in WIDE_SYMBOLS:
+        value = getattr(row, f"{sym.lower()}_pred", None)
+        if value is not None:
+            signals[sym] = value
+    return PredictionSignals(row.timestamp, signals)
+
+
+def as_signals(prediction) -> PredictionSignals:
+    if isinstance(prediction, PredictionSignals):
+        return prediction
+    return from_wide_row(prediction)
+
+
+# --- Write ---
+async def write_signals(session: AsyncSession, timestamp: datetime, signals: Dict[str, int],
+                        model_version: str = "") -> None:
+    """Bir timestamp'in tüm sinyallerini tek bulk insert ile yazar (varsa üzerine yazar)."""
+    await session.execute(
+        delete(PredictionSignal)
+        .where(PredictionSignal.timestamp == timestamp)
+        .where(PredictionSignal.model_version == model_version)
+    )
+    if signals:
+        await session.execute(
+            PredictionSignal.__table__.insert(),
+            [
+                {"timestamp": timestamp, "symbol": sym.upper(), "signal": int(sig), "model_version": model_version}
+                for sym, sig in signals.items()
+            ],
+        )
+
+
+async def backfill_from_wide(session: AsyncSession, since: Optional[datetime] = None,
+                             model_version: str = "") -> int:
+    """Geniş `predictions` tablosundaki satırları uzun depoya kopyalar. Yazılan timestamp sayısını döner."""
+    query = select(Prediction).order_by(Prediction.timestamp)
+    if since is not None:
+        query = query.where(Prediction.timestamp >= since)
+    result = await session.execute(query)
+    count = 0
+    for row in result.scalars():
+        ps = from_wide_row(row)
+        await write_signals(session, ps.timestamp, ps.signals, model_version)
+        count += 1
+    return count
+
+
+# --- Read ---
+async def get_signals_at(session: AsyncSession, timestamp: datetime,
+                         model_version: str = "") -> Dict[str, int]:
+    """Tek bir timestamp için symbol→signal eşlemesi (tek indeksli sorgu)."""
+    result = await session.execute(
+        select(PredictionSignal.symbol, PredictionSignal.signal)
+        .where(PredictionSignal.timestamp == timestamp)
+        .where(PredictionSignal.model_version == model_version)
+    )
+    return {sym: sig for sym, sig in result.all()}
+
+
+async def get_latest_signals(session: AsyncSession, cutoff: Optional[datetime] = None,
+                             model_version: str = "") -> Optional[PredictionSignals]:
+    """cutoff'tan eski/eşit en son timestamp'in sinyalleri."""
+    query = (
+        select(PredictionSignal.timestamp)
+        .where(PredictionSignal.model_version == model_version)
+        .order_by(PredictionSignal.timestamp.desc())
+        .limit(1)
+    )
+    if cutoff is not None:
+        query = query.where(PredictionSignal.timestamp <= cutoff)
+    ts = (await session.execute(query)).scalar()
+    if ts is None:
+        return None
+    return PredictionSignals(ts, await get_signals_at(session, ts, model_version))
+
+
+async def get_symbol_range(session: AsyncSession, symbol: str, start: datetime, end: datetime,
+                           model_version: str = "") -> List[Tuple[datetime, int]]:
+    """Tek sembol için [start, end] aralığındaki sinyaller; (symbol, timestamp) indeksi ile taranır."""
+    result = await session.execute(
+        select(PredictionSignal.timestamp, PredictionSignal.signal)
+        .where(PredictionSignal.symbol == symbol.upper())
+        .where(PredictionSignal.timestamp >= start)
+        .where(PredictionSignal.timestamp <= end)
+        .where(PredictionSignal.model_version == model_version)
+        .order_by(PredictionSignal.timestamp)
+    )
+    return [(ts, sig) for ts, sig in result.all()]
+
+
+# --- Schema helpers ---
+async def create_prediction_store(symbols: Optional[Iterable[str]] = None) -> None:
+    """prediction_signals tablosunu ve geniş uyumluluk görünümünü oluşturur."""
+    symbols = list(symbols or WIDE_SYMBOLS)
+    columns = ",\n        ".join(
+        f"MAX(CASE WHEN symbol = '{sym}' THEN signal END) AS {sym.lower()}_pred"
+        for sym in symbols
+    )
+    view_sql = f"""
+    CREATE VIEW {COMPAT_VIEW_NAME} AS
+    SELECT timestamp,
+        {columns}
+    FROM prediction_signals
+    WHERE model_version = ''
+    GROUP BY timestamp
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(PredictionSignal.__table__.create, checkfirst=True)
+        await conn.execute(text(f"DROP VIEW IF EXISTS {COMPAT_VIEW_NAME}"))
+        await conn.execute(text(view_sql))
@@ -4,15 +4,33 @@ from sqlalchemy.future import select
 from database import get_async_session
 from models import Prediction, User
 from binance_trader import (
-    get_position_amount,
-    get_mark_price,
+    get_position_amounts,
     send_binance_order,
-    close_position,
-    get_symbol_filters
+    send_binance_orders,
+    symbol_filter_cache,
+    BATCH_ORDER_LIMIT
 )
+from price_source import price_source
+from ws_order_client import send_order_ws
+from order_journal import client_order_id, order_journal, STATUS_SENT
+from rebalancer import NO_PRICE, REASONS, orders_from_deltas, rebalance
+from prediction_store import PredictionSignals, as_signals, from_wide_row, get_latest_signals
 from datetime import datetime, timedelta
-import math
-from decimal import Decimal, ROUND_DOWN
+from typing import Optional, Union
+import numpy as np
+import os
+import time
+
+# Aynı anda gönderilebilecek emir isteği (batch) sayısı
+ORDER_CONCURRENCY = int(os.getenv("TRADE_ORDER_CONCURRENCY", "4"))
+
+# Emir kanalı: "rest" (batchOrders) veya "ws" (WebSocket API order.place, REST fallback)
+ORDER_TRANSPORT = os.getenv("ORDER_TRANSPORT", "rest").lower()
+
+# Emir backend'i: "live" (Binance) veya "paper" (paper_trader ile simüle fill'ler)
+TRADE_BACKEND = os.getenv("TRADE_BACKEND", "live").lower()
+if TRADE_BACKEND == "paper":
+    from paper_trader import get_position_amounts, send_binance_order, send_binance_orders
 
 # Map each trading pair to its fixed quantity
 PAIR_TO_FIXED_QTY = {
@@ -27,87 +45,195 @@ PAIR_TO_FIXED_QTY = {
     "solusdt": 10
 }
 
-def quantize_qty(qty: float, step: float) -> float:
-    """
-    Round down qty to the nearest multiple of step.
-    """
-    return float(Decimal(str(qty)).quantize(Decimal(str(step)), rounding=ROUND_DOWN))
+# Sembol sırası ve sabit hedef miktarlar (rebalancer dizileri bu sırayı kullanır)
+SYMBOLS = [pair.upper() for pair in PAIR_TO_FIXED_QTY]
+TARGET_QTYS = np.array(list(PAIR_TO_FIXED_QTY.values()), dtype=float)
+
+def _elapsed_ms(since: float) -> float:
+    return round((time.perf_counter() - since) * 1000, 1)
 
-async def trade_from_latest_prediction(user: User, trade_size_usdt: float):
+async def load_latest_prediction() -> Optional[PredictionSignals]:
     """
-    Fetch the latest prediction (4h+1m old) and open/close positions
-    using fixed quantities per symbol. Uses send_binance_order for open
-    and close_position for closing existing positions.
+    Fetch the latest prediction that is at least 4h+1m old as a
+    symbol -> signal mapping. Both the long-format prediction store and the
+    wide `predictions` table are read under the same cutoff and the newer
+    one wins (model yalnızca geniş tabloya yazıyor; uzun depo geride kalabilir).
+    Eşit timestamp'te uzun depo tercih edilir.
     """
     session: AsyncSession = await get_async_session()
     try:
-        print("🔍 [DEBUG] trade_from_latest_prediction called.")
-
         cutoff = datetime.utcnow() - timedelta(hours=4, minutes=1)
+        try:
+            latest = await get_latest_signals(session, cutoff)
+        except Exception as e:
+            # Uzun tablo henüz oluşturulmamış olabilir
+            print(f"[ℹ️] prediction_signals okunamadı, geniş tabloya düşülüyor: {e}")
+            await session.rollback()
+            latest = None
+
         result = await session.execute(
             select(Prediction)
             .where(Prediction.timestamp <= cutoff)
             .order_by(Prediction.timestamp.desc())
             .limit(1)
         )
-        latest: Prediction = result.scalars().first()
-
-        if not latest:
-            print("[❌] No suitable prediction found.")
-            return
-
-        print(f"[✅] Processing signals from {latest.timestamp}...")
-
-        for pair, raw_target in PAIR_TO_FIXED_QTY.items():
-            sig = getattr(latest, f"{pair}_pred", None)
-            if sig not in (-1, 0, 1):
-                continue
-
-            symbol = pair.upper()
-            current_amt = await get_position_amount(
-                user.api_key, user.api_secret, symbol
-            )
-
-            # ① Fetch price and exchange filters
-            price = float(await get_mark_price(user.api_key, user.api_secret, symbol))
-            filters = await get_symbol_filters(user.api_key, user.api_secret, symbol)
-            step_size = float(filters.get("stepSize", 1))
-            min_notional = float(filters.get("minNotional", 0))
-
-            # ② Quantize the fixed target qty to stepSize
-            qty = quantize_qty(raw_target, step_size)
-
-            print(f"[DEBUG] {symbol}: price={price}, stepSize={step_size}, "
-                  f"raw_target={raw_target}, final_qty={qty}")
-
-            # ③ Skip if below stepSize or notional < minNotional
-            if qty < step_size or qty * price < min_notional:
-                print(f"[WARN] {symbol}: final_qty {qty} below stepSize or "
-                      f"notional < minNotional ({min_notional}), skipping.")
-                continue
-
-            # ④ Execute based on signal
-            if sig == 1 and current_amt == 0:
-                # Open long
-                await send_binance_order(
-                    user.api_key, user.api_secret,
-                    symbol, "BUY", qty
-                )
-            elif sig == -1 and current_amt == 0:
-                # Open short
-                await send_binance_order(
+        row = result.scalars().first()
+        wide = from_wide_row(row) if row else None
+
+        if latest is None:
+            return wide
+        if wide is not None and wide.timestamp > latest.timestamp:
+            print(f"[⚠️] prediction_signals geride ({latest.timestamp} < {wide.timestamp}); geniş tablo kullanılıyor")
+            return wide
+        return latest
+    finally:
+        await session.close()
+
+async def trade_from_latest_prediction(user: User, trade_size_usdt: float,
+                                       prediction: Optional[Union[PredictionSignals, Prediction]] = None) -> dict:
+    """
+    Fetch the latest prediction (4h+1m old) and move every symbol to its
+    target position (signal * fixed quantity) with the minimal delta orders;
+    an opposite signal flips the position in a single order. If `prediction` is given (e.g. by the
+    shared scheduler tick) it is used instead of querying the database.
+
+    Account snapshot, filters and prices are fetched concurrently; orders are
+    sent in batches of up to 5, with at most ORDER_CONCURRENCY requests in
+    flight. A failing symbol or batch does not stop the others; if the filters
+    or prices fetch fails, the affected symbols are reported as errors ("no price")
+    and only a failed position snapshot aborts the cycle.
+    Returns a report with per-symbol results and timings (ms).
+    """
+    started = time.perf_counter()
+    report = {"user_id": user.id, "prediction": None, "symbols": {}}
+    print("🔍 [DEBUG] trade_from_latest_prediction called.")
+
+    latest = as_signals(prediction) if prediction is not None else await load_latest_prediction()
+    if not latest:
+        print("[❌] No suitable prediction found.")
+        return report
+
+    report["prediction"] = latest.timestamp
+    print(f"[✅] Processing signals from {latest.timestamp}...")
+    signal_at = time.perf_counter()
+
+    # ① Position snapshot, filters and prices in parallel. Only a failed position
+    #    snapshot aborts the cycle; without filters or prices the symbols become "no price"
+    symbols = SYMBOLS
+    positions, all_filters, prices = await asyncio.gather(
+        get_position_amounts(user.api_key, user.api_secret),
+        symbol_filter_cache.get_many(symbols),
+        price_source.get_prices(symbols),
+        return_exceptions=True,
+    )
+    if isinstance(positions, BaseException):
+        raise positions
+    prefetch_errors = []
+    if isinstance(all_filters, BaseException):
+        print(f"[⚠️] Symbol filters could not be fetched: {all_filters}")
+        prefetch_errors.append(f"filters: {all_filters}")
+        all_filters = {}
+    if isinstance(prices, BaseException):
+        print(f"[⚠️] Prices could not be fetched: {prices}")
+        prefetch_errors.append(f"prices: {prices}")
+        prices = {}
+    report["prefetch_ms"] = _elapsed_ms(signal_at)
+
+    # ② Target - current for all symbols in one vectorized step
+    sigs = [latest.signals.get(sym) for sym in symbols]
+    filters = [all_filters.get(sym, {}) for sym in symbols]
+    plan = rebalance(
+        np.array([np.nan if v is None else v for v in sigs], dtype=float),
+        np.array([positions.get(sym, 0.0) for sym in symbols]),
+        TARGET_QTYS,
+        np.array([float(f.get("stepSize", 1)) for f in filters]),
+        np.array([float(f.get("minNotional", 0)) for f in filters]),
+        # Filtresi bilinmeyen sembolde stepSize/minNotional da bilinmez: fiyatsız say
+        np.array([prices.get(sym, np.nan) if f else np.nan for sym, f in zip(symbols, filters)], dtype=float),
+    )
+    for sym, sig, target, reason in zip(symbols, sigs, plan.target, plan.reason):
+        entry = report["symbols"][sym] = {"signal": sig, "target": float(target), "reason": str(REASONS[reason])}
+        if prefetch_errors and reason == NO_PRICE:
+            entry.update(status="error", error="; ".join(prefetch_errors))
+
+    orders = []
+    planned = orders_from_deltas(symbols, plan.delta)
+    cids = [client_order_id(user.id, o["symbol"], latest.timestamp) for o in planned]
+    # Aynı prediction için bu emir zaten borsaya ulaştıysa (bu veya başka bir process'te) tekrar gönderme
+    sent = await order_journal.sent_among(cids)
+    for order, cid in zip(planned, cids):
+        symbol = order["symbol"]
+        entry = report["symbols"][symbol]
+        if cid in sent:
+            entry.update(status="skipped", reason="already sent", client_order_id=cid)
+            continue
+        order["client_order_id"] = cid
+        entry.update(status="pending", side=order["side"], qty=order["quantity"], client_order_id=cid)
+        orders.append(order)
+    for entry in report["symbols"].values():
+        entry.setdefault("status", "skipped")
+
+    # ③ Send orders: batches of up to 5 (or one per WS request), bounded concurrency,
+    #    isolated failures
+    semaphore = asyncio.Semaphore(ORDER_CONCURRENCY)
+    use_ws = ORDER_TRANSPORT == "ws" and TRADE_BACKEND != "paper"
+
+    async def run_chunk(chunk):
+        async with semaphore:
+            sent_at = time.perf_counter()
+            if use_ws:
+                o = chunk[0]
+                responses = [await send_order_ws(
                     user.api_key, user.api_secret,
-                    symbol, "SELL", qty
-                )
-            elif sig == 0 and current_amt != 0:
-                # Close existing position
-                # close_position handles reduceOnly logic internally
-                await close_position(
+                    o["symbol"], o["side"], o["quantity"], o["client_order_id"]
+                )]
+            elif len(chunk) == 1:
+                o = chunk[0]
+                responses = [await send_binance_order(
                     user.api_key, user.api_secret,
-                    symbol, abs(current_amt)
-                )
+                    o["symbol"], o["side"], o["quantity"], o["client_order_id"]
+                )]
+            else:
+                responses = await send_binance_orders(user.api_key, user.api_secret, chunk)
+            return responses, _elapsed_ms(sent_at), _elapsed_ms(signal_at)
 
-        print("[🚀] All trades executed.")
+    chunk_size = 1 if use_ws else BATCH_ORDER_LIMIT
+    chunks = [orders[i:i + chunk_size] for i in range(0, len(orders), chunk_size)]
+    outcomes = await asyncio.gather(*(run_chunk(c) for c in chunks), return_exceptions=True)
 
-    finally:
-        await session.close()
+    for chunk, outcome in zip(chunks, outcomes):
+        if isinstance(outcome, BaseException):
+            print(f"[⚠️] Order request failed for {[o['symbol'] for o in chunk]}: {outcome}")
+            for o in chunk:
+                report["symbols"][o["symbol"]].update(status="error", error=str(outcome))
+            continue
+        responses, latency_ms, done_ms = outcome
+        for o, resp in zip(chunk, responses):
+            entry = report["symbols"][o["symbol"]]
+            entry.update(response=resp, latency_ms=latency_ms, done_ms=done_ms)
+            if resp is None:
+                entry["status"] = "skipped"
+            elif resp.get("skipped"):
+                # -4131 / -4116: borsanın kodu, mesajı ve sebebi journal satırına yazılır
+                entry.update(status="skipped", reason=resp["reason"], error=resp.get("msg"))
+            elif resp.get("code") is not None:
+                entry.update(status="error", error=resp.get("msg"))
+            else:
+                entry["status"] = STATUS_SENT
+
+    # ④ Journal: DB'yi beklemeden write-behind kuyruğuna ekle
+    for o in orders:
+        entry = report["symbols"][o["symbol"]]
+        order_journal.record(
+            o["client_order_id"], user.id, o["symbol"], o["side"], o["quantity"],
+            status=entry["status"], reason=entry.get("reason"), response=entry.get("response"),
+            error=entry.get("error"), latency_ms=entry.get("latency_ms"),
+            prediction_ts=latest.timestamp,
+        )
+
+    done = [e["done_ms"] for e in report["symbols"].values() if "done_ms" in e]
+    report["signal_to_last_order_ms"] = max(done) if done else None
+    report["elapsed_ms"] = _elapsed_ms(started)
+    print(f"[🚀] All trades executed. orders={len(orders)} "
+          f"signal→last order={report['signal_to_last_order_ms']}ms total={report['elapsed_ms']}ms")
+    return report
@@ -0,0 +1,142 @@
+import os
+import asyncio
+from typing import Awaitable, Callable, Optional
+from sqlalchemy import func, text
+from sqlalchemy.future import select
+from database import engine, get_async_session
+from models import Prediction
+
+# NOTIFY kanalı ve polling aralıkları (saniye)
+PREDICTION_CHANNEL = "new_prediction"
+POLL_INTERVAL = float(os.getenv("PREDICTION_POLL_INTERVAL", "1"))
+# Postgres'te NOTIFY kaçarsa diye yapılan seyrek güvenlik kontrolü
+NOTIFY_SAFETY_POLL = float(os.getenv("PREDICTION_NOTIFY_SAFETY_POLL", "30"))
+
+NOTIFY_TRIGGER_SQL = [
+    f"""
+    CREATE OR REPLACE FUNCTION notify_new_prediction() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('{PREDICTION_CHANNEL}', NEW.timestamp::text);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS predictions_notify ON predictions",
+    """
+    CREATE TRIGGER predictions_notify
+    AFTER INSERT ON predictions
+    FOR EACH ROW EXECUTE FUNCTION notify_new_prediction()
+    """,
+]
+
+
+async def install_notify_trigger() -> None:
+    """predictions tablosuna INSERT sonrası NOTIFY gönderen trigger'ı kurar (yalnızca Postgres)."""
+    if engine.dialect.name != "postgresql":
+        return
+    async with engine.begin() as conn:
+        for stmt in NOTIFY_TRIGGER_SQL:
+            await conn.execute(text(stmt))
+
+
+class PredictionWatcher:
+    """
+    predictions tablosuna yeni satır geldiğinde on_new(prediction) çağırır.
+    - Postgres: LISTEN/NOTIFY ile anında uyanır (+ seyrek güvenlik kontrolü).
+    - Diğer (SQLite): timestamp primary key indeksi üzerinden ucuz max() polling.
+    Başlangıçta var olan satırlar tetiklemez; yalnızca sonradan gelenler.
+    """
+
+    def __init__(self, on_new: Callable[[Prediction], Awaitable], poll_interval: float = POLL_INTERVAL):
+        self.on_new = on_new
+        self.poll_interval = poll_interval
+        self.last_seen = None
+        self.use_notify = engine.dialect.name == "postgresql"
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._listen_conn = None
+
+    async def _latest_timestamp(self):
+        session = await get_async_session()
+        try:
+            result = await session.execute(select(func.max(Prediction.timestamp)))
+            return result.scalar()
+        finally:
+            await session.close()
+
+    async def _newest_after(self, ts) -> Optional[Prediction]:
+        session = await get_async_session()
+        try:
+            query = select(Prediction).order_by(Prediction.timestamp.desc()).limit(1)
+            if ts is not None:
+                query = query.where(Prediction.timestamp > ts)
+            result = await session.execute(query)
+            return result.scalars().first()
+        finally:
+            await session.close()
+
+    async def _start_listener(self) -> None:
+        import asyncpg
+
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self._listen_conn = await asyncpg.connect(dsn)
+        await self._listen_conn.add_listener(
+            PREDICTION_CHANNEL, lambda *args: self._wakeup.set()
+        )
+
+    async def _stop_listener(self) -> None:
+        conn, self._listen_conn = self._listen_conn, None
+        if conn is not None and not conn.is_closed():
+            await conn.close()
+
+    async def check(self) -> Optional[Prediction]:
+        """Son görülen satırdan yeni bir prediction varsa on_new'i çağırır."""
+        latest = await self._newest_after(self.last_seen)
+        if latest is None:
+            return None
+        # Araya birden fazla satır girdiyse yalnızca en yenisi işlenir
+        self.last_seen = latest.timestamp
+        print(f"[📨] Yeni prediction: {latest.timestamp}")
+        await self.on_new(latest)
+        return latest
+
+    async def _run(self) -> None:
+        self.last_seen = await self._latest_timestamp()
+        interval = self.poll_interval
+        if self.use_notify:
+            try:
+                await install_notify_trigger()
+                await self._start_listener()
+                interval = NOTIFY_SAFETY_POLL
+            except Exception as e:
+                print(f"[⚠️] LISTEN kurulamadı, polling'e geçiliyor: {e}")
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                try:
+                    await self.check()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"[⚠️] Prediction kontrolü hata verdi: {e}")
+        finally:
+            await self._stop_listener()
+
+    def start(self) -> asyncio.Task:
+        if (
+            self._task is None
+            or self._task.done()
+            or self._task.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    def stop(self) -> None:
+        task, self._task = self._task, None
+        if task and not task.done():
+            task.cancel()
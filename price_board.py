@@ -0,0 +1,281 @@
+# price_board.py
+# Process'ler arası paylaşılan, bellek eşlemeli (mmap) fiyat tablosu.
+# Tek bir feeder process market data hub'ından gelen mark price'ları yazar;
+# aynı makinedeki her process (Streamlit, FastAPI, trading_worker) soket
+# açmadan, kopyasız okur. Slot başına seqlock ile tutarlı okuma yapılır.
+#
+#   python price_board.py                (feeder: hub → PRICE_BOARD_PATH)
+#   python price_board.py --read         (okuyucu: fiyatları ve yaşlarını yazdırır)
+import os
+import time
+import argparse
+from collections.abc import Mapping
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Paylaşılan dosya (tmpfs üzerinde olması önerilir, ör. /dev/shm)
+PRICE_BOARD_PATH = os.getenv(
+    "PRICE_BOARD_PATH",
+    "/dev/shm/price_board.bin" if os.path.isdir("/dev/shm") else "price_board.bin",
+)
+# Okuyucunun yazım ortasına denk gelirse en fazla kaç kez yeniden deneyeceği
+PRICE_BOARD_READ_RETRIES = 1000
+
+BOARD_MAGIC = 0x44524250  # "PBRD"
+BOARD_VERSION = 1
+SYMBOL_BYTES = 16
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "<u4"),
+    ("version", "<u4"),
+    ("n_slots", "<u4"),
+    ("_pad", "<u4"),
+    ("writer_pid", "<i8"),
+    ("heartbeat", "<f8"),    # feeder'ın son yazma zamanı (time.time())
+])
+# Slot başına bir cache line (64 bayt): farklı sembollerin yazımları birbirini bozmaz
+SLOT_DTYPE = np.dtype([
+    ("seq", "<u8"),          # tek → yazım sürüyor, çift → tutarlı
+    ("price", "<f8"),
+    ("event_time", "<i8"),   # borsa olay zamanı (ms)
+    ("updated", "<f8"),      # yerel alınma zamanı (time.time())
+    ("_pad", "V32"),
+])
+
+
+def _layout(n_slots: int) -> Tuple[int, int, int]:
+    """(sembol tablosu ofseti, slot ofseti, toplam boyut); slotlar 64 bayta hizalı."""
+    symbols_at = HEADER_DTYPE.itemsize
+    slots_at = -(-(symbols_at + n_slots * SYMBOL_BYTES) // 64) * 64
+    return symbols_at, slots_at, slots_at + n_slots * SLOT_DTYPE.itemsize
+
+
+class BoardQuote(NamedTuple):
+    price: float
+    event_time: int
+    updated: float
+
+
+class _Board:
+    """Dosyanın header / sembol tablosu / slot görünümleri."""
+
+    def __init__(self, path: str, mode: str):
+        self.path = path
+        header = np.memmap(path, dtype=HEADER_DTYPE, mode=mode, shape=(1,))
+        if int(header["magic"][0]) != BOARD_MAGIC or int(header["version"][0]) != BOARD_VERSION:
+            raise ValueError(f"{path} geçerli bir fiyat tablosu değil")
+        n_slots = int(header["n_slots"][0])
+        symbols_at, slots_at, _ = _layout(n_slots)
+        names = np.memmap(path, dtype=f"S{SYMBOL_BYTES}", mode="r", offset=symbols_at, shape=(n_slots,))
+        self.header = header
+        self.symbols = [n.decode() for n in names]
+        self.index = {sym: i for i, sym in enumerate(self.symbols)}
+        self.slots = np.memmap(path, dtype=SLOT_DTYPE, mode=mode, offset=slots_at, shape=(n_slots,))
+        # Alan görünümleri bir kez alınır (her okumada yeniden dilimlenmez)
+        self.seq = self.slots["seq"]
+        self.price = self.slots["price"]
+        self.event_time = self.slots["event_time"]
+        self.updated = self.slots["updated"]
+        self.inode = os.stat(path).st_ino
+
+
+class PriceBoardWriter:
+    """
+    Tek yazar. Sembol kümesi oluşturulurken sabitlenir; aynı küme ile
+    yeniden başlatılırsa mevcut dosya (ve okuyucuların mmap'i) korunur.
+    """
+
+    def __init__(self, symbols: Iterable[str], path: str = PRICE_BOARD_PATH):
+        symbols = [s.upper() for s in symbols]
+        board = None
+        if os.path.exists(path):
+            try:
+                board = _Board(path, "r+")
+                if board.symbols != symbols:
+                    board = None
+            except (ValueError, OSError):
+                board = None
+        if board is None:
+            board = self._create(path, symbols)
+        else:
+            # Önceki yazar yazım ortasında öldüyse tek kalan seq'ler çifte yuvarlanır;
+            # aksi halde okuyucular o slotu sonsuza dek "yazılıyor" görür
+            board.seq[:] += board.seq & 1
+        board.header["writer_pid"] = os.getpid()
+        self.board = board
+
+    @staticmethod
+    def _create(path: str, symbols: list) -> _Board:
+        symbols_at, slots_at, size = _layout(len(symbols))
+        tmp = f"{path}.{os.getpid()}.tmp"
+        buf = np.zeros(size, dtype=np.uint8)
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header["magic"], header["version"], header["n_slots"] = BOARD_MAGIC, BOARD_VERSION, len(symbols)
+        buf[:HEADER_DTYPE.itemsize] = header.view(np.uint8)
+        names = np.array(symbols, dtype=f"S{SYMBOL_BYTES}")
+        buf[symbols_at:symbols_at + names.nbytes] = names.view(np.uint8)
+        buf.tofile(tmp)
+        # Okuyucular hiçbir zaman yarım yazılmış bir header görmesin
+        os.replace(tmp, path)
+        return _Board(path, "r+")
+
+    def update(self, symbol: str, price: float, event_time: int = 0,
+               updated: Optional[float] = None) -> bool:
+        b = self.board
+        i = b.index.get(symbol)
+        if i is None:
+            return False
+        now = time.time() if updated is None else updated
+        s = int(b.seq[i])
+        b.seq[i] = s + 1
+        b.price[i] = price
+        b.event_time[i] = event_time
+        b.updated[i] = now
+        b.seq[i] = s + 2
+        b.header["heartbeat"] = now
+        return True
+
+    def on_price(self, symbol: str, price: float, ts: float, event_time: int) -> None:
+        """websocket_client hub callback'i: BinanceWS(callback=writer.on_price)."""
+        self.update(symbol, price, event_time, ts)
+
+    def close(self) -> None:
+        self.board.slots.flush()
+
+
+class PriceBoardReader:
+    """
+    Çok okuyucu, kilitsiz. Yazıcı dosyayı yeniden oluşturursa (sembol kümesi
+    değişti) en fazla saniyede bir yapılan inode kontrolüyle yeniden açılır.
+    price_source.attach_feed() ile feed olarak kullanılabilir.
+    """
+
+    def __init__(self, path: str = PRICE_BOARD_PATH):
+        self.path = path
+        self.board = _Board(path, "r")
+        self._checked_at = time.monotonic()
+
+    def _maybe_reopen(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < 1.0:
+            return
+        self._checked_at = now
+        try:
+            if os.stat(self.path).st_ino != self.board.inode:
+                self.board = _Board(self.path, "r")
+        except (OSError, ValueError):
+            pass
+
+    @property
+    def symbols(self) -> list:
+        return self.board.symbols
+
+    def _read_slot(self, i: int) -> Optional[BoardQuote]:
+        b = self.board
+        for _ in range(PRICE_BOARD_READ_RETRIES):
+            s1 = int(b.seq[i])
+            if s1 & 1:
+                continue
+            quote = BoardQuote(float(b.price[i]), int(b.event_time[i]), float(b.updated[i]))
+            if int(b.seq[i]) == s1:
+                return quote if s1 else None   # seq 0 → hiç yazılmamış
+        return None
+
+    def get(self, symbol: str) -> Optional[BoardQuote]:
+        self._maybe_reopen()
+        i = self.board.index.get(symbol)
+        return None if i is None else self._read_slot(i)
+
+    def snapshot(self) -> Dict[str, BoardQuote]:
+        self._maybe_reopen()
+        out = {}
+        for sym, i in self.board.index.items():
+            quote = self._read_slot(i)
+            if quote is not None:
+                out[sym] = quote
+        return out
+
+    def heartbeat_age(self) -> float:
+        """Feeder'ın son yazmasından bu yana geçen süre (saniye)."""
+        hb = float(self.board.header["heartbeat"][0])
+        return time.time() - hb if hb else float("inf")
+
+    # price_source feed arayüzü (BinanceWS ile aynı adlar; okuma slot başına yapılır)
+    @property
+    def latest_prices(self) -> "_FieldView":
+        return _FieldView(self, "price")
+
+    @property
+    def latest_price_times(self) -> "_FieldView":
+        return _FieldView(self, "updated")
+
+
+class _FieldView(Mapping):
+    """Tablonun tek bir alanına sözlük görünümü; get() yalnızca o sembolün slotunu okur."""
+
+    def __init__(self, reader: PriceBoardReader, field: str):
+        self._reader = reader
+        self._field = field
+
+    def __getitem__(self, symbol: str):
+        quote = self._reader.get(symbol)
+        if quote is None:
+            raise KeyError(symbol)
+        return getattr(quote, self._field)
+
+    def __iter__(self):
+        return iter(self._reader.snapshot())
+
+    def __len__(self) -> int:
+        return len(self._reader.snapshot())
+
+
+def open_price_board(path: str = PRICE_BOARD_PATH) -> Optional[PriceBoardReader]:
+    """Feeder çalışıyorsa okuyucu döner, tablo yoksa None."""
+    try:
+        return PriceBoardReader(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _run_feeder(path: str) -> None:
+    from websocket_client import TRACKED_SYMBOLS, market_data_hub
+
+    writer = PriceBoardWriter(TRACKED_SYMBOLS, path)
+    sub = market_data_hub.subscribe(callback=writer.on_price)
+    print(f"[ℹ️] Fiyat tablosu yazılıyor: {path} ({len(TRACKED_SYMBOLS)} sembol)")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sub.close()
+        writer.close()
+
+
+def _run_reader(path: str, reads: int) -> None:
+    reader = PriceBoardReader(path)
+    t0 = time.perf_counter()
+    for _ in range(reads):
+        reader.get(reader.symbols[0])
+    per_read = (time.perf_counter() - t0) / reads * 1e6
+    now = time.time()
+    for sym, q in reader.snapshot().items():
+        print(f"{sym:<10} {q.price:>14.6f}  age={now - q.updated:6.2f}s")
+    print(f"get(): {per_read:.2f}µs/okuma, feeder heartbeat {reader.heartbeat_age():.2f}s önce")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared-memory mark price board")
+    parser.add_argument("--path", default=PRICE_BOARD_PATH)
+    parser.add_argument("--read", action="store_true", help="Tabloyu oku ve okuma süresini ölç")
+    parser.add_argument("--reads", type=int, default=100_000)
+    args = parser.parse_args()
+    if args.read:
+        _run_reader(args.path, args.reads)
+    else:
+        _run_feeder(args.path)
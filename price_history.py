@@ -0,0 +1,180 @@
+# price_history.py
+# Sembol başına sabit kapasiteli NumPy halka tamponunda fiyat geçmişi.
+# Bellek çalışma süresinden bağımsız sabittir; pencereler kopyasız görünüm olarak döner
+# ve değişim / realized volatilite önek toplamlarıyla O(log n) hesaplanır.
+import os
+import math
+import threading
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+# 1 sn çözünürlükte kapsanacak aralık (örnek adımı; varsayılan son 1 saat)
+PRICE_HISTORY_1S = int(os.getenv("PRICE_HISTORY_1S", "3600"))
+# 1 dk çözünürlükte kapsanacak aralık (örnek adımı; varsayılan son 25 saat)
+PRICE_HISTORY_1M = int(os.getenv("PRICE_HISTORY_1M", "1500"))
+
+
+class PriceRing:
+    """
+    (ts, price) halkası; append O(1).
+    Her örnek iki kez yazılır (i ve i + capacity), böylece son n örnek her zaman
+    bitişiktir ve window() kopyasız dilim döner.
+    resolution > 0 ise aynı zaman kovasındaki güncellemeler son örneğin üzerine yazılır
+    (kova başına son fiyat). cum_r2: log getirilerin karelerinin önek toplamı.
+    """
+
+    def __init__(self, capacity: int, resolution: float = 0.0):
+        self.capacity = capacity
+        self.resolution = resolution
+        self._ts = np.zeros(2 * capacity)
+        self._px = np.zeros(2 * capacity)
+        self._cum_r2 = np.zeros(2 * capacity)
+        self._head = 0      # bir sonraki yazma indeksi (0..capacity-1)
+        self.count = 0
+        self._bucket = None
+        # Son örnekten önceki örnek (kova içi üzerine yazmada getiriyi yeniden hesaplamak için)
+        self._prev: Optional[Tuple[float, float]] = None   # (price, cum_r2)
+
+    def _write(self, i: int, ts: float, price: float, cum: float) -> None:
+        self._ts[i] = self._ts[i + self.capacity] = ts
+        self._px[i] = self._px[i + self.capacity] = price
+        self._cum_r2[i] = self._cum_r2[i + self.capacity] = cum
+
+    def append(self, ts: float, price: float) -> None:
+        if not price > 0:
+            return
+        bucket = int(ts // self.resolution) if self.resolution else None
+        if self.count and bucket is not None and bucket == self._bucket:
+            # Aynı kova: son örneği güncelle
+            last = (self._head - 1) % self.capacity
+            prev_px, prev_cum = self._prev if self._prev else (price, 0.0)
+            r = math.log(price / prev_px)
+            self._write(last, ts, price, prev_cum + r * r)
+            return
+        if self.count:
+            last = (self._head - 1) % self.capacity
+            prev_px, prev_cum = float(self._px[last]), float(self._cum_r2[last])
+            r = math.log(price / prev_px)
+            cum = prev_cum + r * r
+            self._prev = (prev_px, prev_cum)
+        else:
+            cum = 0.0
+            self._prev = None
+        self._write(self._head, ts, price, cum)
+        self._head = (self._head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self._bucket = bucket
+
+    def _span(self) -> Tuple[int, int]:
+        end = self._head + self.capacity
+        return end - self.count, end
+
+    def window(self, seconds: Optional[float] = None, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Son `seconds` içindeki (ts, price) görünümleri (kopyasız, eskiden yeniye)."""
+        lo, hi = self._span()
+        if seconds is not None and hi > lo:
+            now = self._ts[hi - 1] if now is None else now
+            lo += int(np.searchsorted(self._ts[lo:hi], now - seconds, side="left"))
+        return self._ts[lo:hi], self._px[lo:hi]
+
+    def last(self) -> Optional[Tuple[float, float]]:
+        if not self.count:
+            return None
+        i = (self._head - 1) % self.capacity
+        return float(self._ts[i]), float(self._px[i])
+
+    def _index_at(self, ts: float) -> Optional[int]:
+        """ts anında geçerli olan örneğin (ts'den önceki son örnek) mutlak indeksi."""
+        lo, hi = self._span()
+        k = int(np.searchsorted(self._ts[lo:hi], ts, side="right")) - 1
+        return None if k < 0 else lo + k
+
+    def covers(self, seconds: float) -> bool:
+        lo, hi = self._span()
+        return hi > lo and self._ts[hi - 1] - self._ts[lo] >= seconds
+
+    def change(self, seconds: float) -> float:
+        """Son fiyatın `seconds` önceki fiyata göre oranı - 1; geçmiş yetmiyorsa NaN."""
+        lo, hi = self._span()
+        if hi <= lo:
+            return math.nan
+        k = self._index_at(self._ts[hi - 1] - seconds)
+        if k is None:
+            return math.nan
+        return float(self._px[hi - 1] / self._px[k] - 1.0)
+
+    def realized_vol(self, seconds: float) -> float:
+        """Pencere içindeki log getirilerden sqrt(Σ r²) (yıllıklandırılmamış)."""
+        lo, hi = self._span()
+        if hi - lo < 2:
+            return math.nan
+        k = self._index_at(self._ts[hi - 1] - seconds)
+        if k is None:
+            k = lo
+        return math.sqrt(max(0.0, float(self._cum_r2[hi - 1] - self._cum_r2[k])))
+
+
+class SymbolHistory:
+    """
+    Bir sembolün 1 sn ve 1 dk çözünürlüklü halkaları. n adımlık aralığı
+    uçlarıyla birlikte kapsamak n + 1 örnek ister (3600 örnek yalnızca 3599 sn'yi kapsar).
+    """
+
+    def __init__(self, fine: int = PRICE_HISTORY_1S, coarse: int = PRICE_HISTORY_1M):
+        self.fine = PriceRing(fine + 1, 1.0)
+        self.coarse = PriceRing(coarse + 1, 60.0)
+
+    def append(self, ts: float, price: float) -> None:
+        self.fine.append(ts, price)
+        self.coarse.append(ts, price)
+
+    def ring_for(self, seconds: float) -> PriceRing:
+        """Pencereyi kapsayan en ince halka (hiçbiri kapsamıyorsa ince olan)."""
+        return self.coarse if not self.fine.covers(seconds) and self.coarse.covers(seconds) else self.fine
+
+    def window(self, seconds: float) -> Tuple[np.ndarray, np.ndarray]:
+        return self.ring_for(seconds).window(seconds)
+
+    def change(self, seconds: float) -> float:
+        return self.ring_for(seconds).change(seconds)
+
+    def realized_vol(self, seconds: float) -> float:
+        return self.ring_for(seconds).realized_vol(seconds)
+
+
+class PriceHistory:
+    """
+    Sembol → SymbolHistory. Tek yazar (market data hub thread'i), çok okuyucu;
+    okuyucular yazım sırasında bir örnek eski/yeni görebilir, kilit yoktur.
+    """
+
+    def __init__(self, fine: int = PRICE_HISTORY_1S, coarse: int = PRICE_HISTORY_1M):
+        self.fine = fine
+        self.coarse = coarse
+        self._symbols: Dict[str, SymbolHistory] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, symbol: str) -> SymbolHistory:
+        hist = self._symbols.get(symbol)
+        if hist is None:
+            with self._lock:
+                hist = self._symbols.setdefault(symbol, SymbolHistory(self.fine, self.coarse))
+        return hist
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._symbols
+
+    def append(self, symbol: str, ts: float, price: float) -> None:
+        self[symbol].append(ts, price)
+
+    def stats(self, symbol: str) -> dict:
+        """Dashboard için 1s/24s değişim ve realized volatilite."""
+        if symbol not in self._symbols:
+            return {}
+        hist = self._symbols[symbol]
+        return {
+            "change_1h": hist.change(3600),
+            "change_24h": hist.change(86400),
+            "vol_1h": hist.realized_vol(3600),
+            "vol_24h": hist.realized_vol(86400),
+        }
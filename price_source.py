@@ -0,0 +1,114 @@
+import os
+import time
+import asyncio
+from typing import Dict, Iterable, NamedTuple, Optional
+from dotenv import load_dotenv
+from binance_trader import get_mark_prices
+
+load_dotenv()
+
+# Canlı akıştan gelen fiyatın "taze" sayılacağı en fazla yaş (saniye)
+PRICE_MAX_AGE = float(os.getenv("PRICE_MAX_AGE", "5"))
+
+
+class PriceQuote(NamedTuple):
+    price: float
+    age: float      # saniye cinsinden bayatlık
+    source: str     # "feed" veya "rest"
+
+
+class PriceSource:
+    """
+    Mark price kaynağı: önce yerel (WebSocket) fiyat akışına bakar,
+    yeterince taze değilse eksik semboller için tek bir toplu
+    premiumIndex çağrısı yapar. Her fiyatın ne kadar bayat olduğu da döner.
+
+    feed: `latest_prices` ve `latest_price_times` sözlüklerine sahip
+    herhangi bir nesne (ör. websocket_client.BinanceWS).
+    """
+
+    def __init__(self, feed=None, max_age: float = PRICE_MAX_AGE):
+        self.feed = feed
+        self.max_age = max_age
+        # REST'ten gelen son fiyatlar: symbol -> (price, time.time())
+        self._rest_prices: Dict[str, tuple] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def attach_feed(self, feed) -> None:
+        self.feed = feed
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _local_quote(self, symbol: str, now: float) -> Optional[PriceQuote]:
+        """Akıştaki ve REST önbelleğindeki fiyatlardan en tazesini döner."""
+        best = None
+        if self.feed is not None:
+            raw = self.feed.latest_prices.get(symbol)
+            ts = getattr(self.feed, "latest_price_times", {}).get(symbol)
+            if raw is not None and ts is not None:
+                best = PriceQuote(float(raw), now - ts, "feed")
+        cached = self._rest_prices.get(symbol)
+        if cached is not None:
+            quote = PriceQuote(cached[0], now - cached[1], "rest")
+            if best is None or quote.age < best.age:
+                best = quote
+        return best
+
+    def staleness(self, symbol: str) -> float:
+        """Sembol için bilinen en taze fiyatın yaşı (saniye); yoksa inf."""
+        quote = self._local_quote(symbol, time.time())
+        return quote.age if quote else float("inf")
+
+    def staleness_map(self, symbols: Iterable[str]) -> Dict[str, float]:
+        return {sym: self.staleness(sym) for sym in symbols}
+
+    async def get_quotes(self, symbols: Iterable[str]) -> Dict[str, PriceQuote]:
+        symbols = list(symbols)
+        now = time.time()
+        quotes: Dict[str, PriceQuote] = {}
+        missing = []
+        for sym in symbols:
+            quote = self._local_quote(sym, now)
+            if quote is not None and quote.age <= self.max_age:
+                quotes[sym] = quote
+            else:
+                missing.append(sym)
+
+        if missing:
+            async with self._get_lock():
+                # Kilidi beklerken başka bir kullanıcı toplu çağrıyı yapmış olabilir
+                now = time.time()
+                still_missing = []
+                for sym in missing:
+                    quote = self._local_quote(sym, now)
+                    if quote is not None and quote.age <= self.max_age:
+                        quotes[sym] = quote
+                    else:
+                        still_missing.append(sym)
+
+                if still_missing:
+                    fetched = await get_mark_prices()
+                    now = time.time()
+                    for sym, price in fetched.items():
+                        self._rest_prices[sym] = (price, now)
+                    for sym in still_missing:
+                        if sym in fetched:
+                            quotes[sym] = PriceQuote(fetched[sym], 0.0, "rest")
+        return quotes
+
+    async def get_prices(self, symbols: Iterable[str]) -> Dict[str, float]:
+        quotes = await self.get_quotes(symbols)
+        return {sym: q.price for sym, q in quotes.items()}
+
+    async def get_price(self, symbol: str) -> Optional[float]:
+        return (await self.get_prices([symbol])).get(symbol)
+
+
+# Process genelinde paylaşılan fiyat kaynağı
+price_source = PriceSource()
@@ -0,0 +1,154 @@
+import os
+import time
+import asyncio
+import hashlib
+import threading
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Binance USDⓈ-M Futures limitleri (exchangeInfo.rateLimits)
+IP_WEIGHT_PER_MIN = int(os.getenv("BINANCE_IP_WEIGHT_PER_MIN", "2400"))
+ORDERS_PER_MIN = int(os.getenv("BINANCE_ORDERS_PER_MIN", "1200"))
+ORDERS_PER_10S = int(os.getenv("BINANCE_ORDERS_PER_10S", "300"))
+# Limitin bu oranını aşmamaya çalışıyoruz (ban riskine karşı pay)
+RATE_LIMIT_SAFETY = float(os.getenv("BINANCE_RATE_LIMIT_SAFETY", "0.9"))
+
+
+def account_id(api_key: str) -> str:
+    """API key'i bellekte/raporlarda açık tutmamak için kısa bir kimliğe çevirir."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+class TokenBucket:
+    """
+    Basit token bucket. reserve() token'ı hemen düşer (gerekirse eksiye),
+    beklenmesi gereken süreyi döner; böylece istekler sıraya girer.
+    """
+
+    def __init__(self, capacity: float, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        self._refill(now)
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def sync_used(self, used: float, now: float) -> None:
+        """
+        Borsanın bildirdiği kullanımı yerel tahminden yüksekse ona çeker.
+        used ölçeklenmemiş gerçek kullanımdır: kalan = limit*safety - used (pay korunur).
+        """
+        self._refill(now)
+        self.tokens = min(self.tokens, self.capacity - used)
+
+    def fill_ratio(self, now: float) -> float:
+        self._refill(now)
+        return max(0.0, 1.0 - self.tokens / self.capacity)
+
+
+class RateLimitGovernor:
+    """
+    Process genelinde paylaşılan rate limit yöneticisi.
+    - IP başına request weight (1 dk),
+    - hesap başına emir sayısı (1 dk ve 10 sn)
+    için token bucket tutar, X-MBX-USED-WEIGHT-1M / X-MBX-ORDER-COUNT-*
+    başlıklarıyla senkronize olur ve limit aşılmadan önce istekleri bekletir.
+    Hem async (binance_trader) hem thread (websocket_client) tarafından kullanılır.
+    """
+
+    def __init__(
+        self,
+        ip_weight_per_min: int = IP_WEIGHT_PER_MIN,
+        orders_per_min: int = ORDERS_PER_MIN,
+        orders_per_10s: int = ORDERS_PER_10S,
+        safety: float = RATE_LIMIT_SAFETY,
+    ):
+        self.safety = safety
+        self.orders_per_min = orders_per_min
+        self.orders_per_10s = orders_per_10s
+        self.ip_weight = TokenBucket(ip_weight_per_min * safety, 60)
+        self.account_orders: Dict[str, Dict[str, TokenBucket]] = {}
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _account_buckets(self, account: str) -> Dict[str, TokenBucket]:
+        buckets = self.account_orders.get(account)
+        if buckets is None:
+            buckets = {
+                "1m": TokenBucket(self.orders_per_min * self.safety, 60),
+                "10s": TokenBucket(self.orders_per_10s * self.safety, 10),
+            }
+            self.account_orders[account] = buckets
+        return buckets
+
+    def reserve(self, weight: float = 1, account: Optional[str] = None, orders: int = 0) -> float:
+        """Kapasiteyi ayırır ve isteğin gönderilmeden önce beklemesi gereken süreyi döner."""
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self.blocked_until - now)
+            delay = max(delay, self.ip_weight.reserve(weight, now))
+            if account and orders:
+                for bucket in self._account_buckets(account).values():
+                    delay = max(delay, bucket.reserve(orders, now))
+            return delay
+
+    async def acquire(self, weight: float = 1, account: Optional[str] = None, orders: int = 0) -> None:
+        delay = self.reserve(weight, account, orders)
+        if delay > 0:
+            print(f"[⏳] Rate limit: {delay:.2f}s bekleniyor (weight={weight}, orders={orders})")
+            await asyncio.sleep(delay)
+
+    def acquire_sync(self, weight: float = 1, account: Optional[str] = None, orders: int = 0) -> None:
+        delay = self.reserve(weight, account, orders)
+        if delay > 0:
+            time.sleep(delay)
+
+    def update_from_headers(self, headers, account: Optional[str] = None, status_code: int = 200) -> None:
+        """Yanıt başlıklarındaki kullanım bilgisini bucket'lara yansıtır."""
+        with self._lock:
+            now = time.monotonic()
+            used = headers.get("X-MBX-USED-WEIGHT-1M") or headers.get("x-mbx-used-weight-1m")
+            if used is not None:
+                self.ip_weight.sync_used(float(used), now)
+            if account:
+                buckets = None
+                for window in ("1m", "10s"):
+                    name = f"X-MBX-ORDER-COUNT-{window.upper()}"
+                    count = headers.get(name) or headers.get(name.lower())
+                    if count is not None:
+                        buckets = buckets or self._account_buckets(account)
+                        buckets[window].sync_used(float(count), now)
+
+            # 429: yavaşla, 418: IP ban — Retry-After kadar tüm istekleri durdur
+            if status_code in (418, 429):
+                retry_after = float(headers.get("Retry-After") or headers.get("retry-after") or 60)
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+                print(f"[⚠️] Binance {status_code}: {retry_after:.0f}s boyunca istekler durduruldu.")
+
+    def snapshot(self) -> dict:
+        """Her bucket'ın doluluk oranını döner (1'in üstü: sırada bekleyen istek var)."""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "ip_weight_1m": round(self.ip_weight.fill_ratio(now), 4),
+                "blocked_for": round(max(0.0, self.blocked_until - now), 2),
+                "accounts": {
+                    acc: {w: round(b.fill_ratio(now), 4) for w, b in buckets.items()}
+                    for acc, buckets in self.account_orders.items()
+                },
+            }
+
+
+# Process genelinde paylaşılan governor
+rate_limiter = RateLimitGovernor()
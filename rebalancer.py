@@ -0,0 +1,97 @@
+import numpy as np
+from typing import List, NamedTuple, Sequence
+
+# Emir sebebi kodları (rapor için)
+REASONS = np.array([
+    "no action", "no signal", "no price", "below filters",
+    "open long", "open short", "close", "flip", "resize",
+])
+(NO_ACTION, NO_SIGNAL, NO_PRICE, BELOW_FILTERS,
+ OPEN_LONG, OPEN_SHORT, CLOSE, FLIP, RESIZE) = range(len(REASONS))
+
+
+class RebalancePlan(NamedTuple):
+    target: np.ndarray   # hedef işaretli miktar
+    delta: np.ndarray    # gönderilecek işaretli miktar (0 → emir yok)
+    reason: np.ndarray   # REASONS indeksleri
+
+
+def quantize_down(qty: np.ndarray, step: np.ndarray) -> np.ndarray:
+    """Mutlak değeri stepSize katına aşağı yuvarlar (işaret korunur)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        units = np.floor(np.abs(qty) / step + 1e-9)
+    return np.sign(qty) * units * step
+
+
+def rebalance(signals: np.ndarray, current: np.ndarray, sizes: np.ndarray,
+              steps: np.ndarray, min_notional: np.ndarray, prices: np.ndarray) -> RebalancePlan:
+    """
+    Hedef pozisyon = sinyal * büyüklük; emir = hedef - mevcut.
+    Tüm girdiler sembol sütunlu dizilerdir: (n_symbols,) veya (n_users, n_symbols);
+    sembol başına değerler (sizes, steps, min_notional, prices) satırlara yayılır.
+      - sinyal NaN veya -1/0/1 dışında → pozisyon korunur
+      - fiyat yok → pozisyon korunur
+      - hedef stepSize'ın altında veya notional < minNotional → pozisyon korunur
+      - hedef 0 → pozisyon tamamen kapatılır (filtre uygulanmaz)
+      - kapatma dışında emir (delta) stepSize'ın altında veya notional < minNotional
+        → emir gönderilmez (ör. hedef 500 DOGE, mevcut 501 → 1 DOGE'luk SELL yok)
+      - ters pozisyon → tek emirle flip (ör. long 3 → short 3 için SELL 6)
+    """
+    sig = np.asarray(signals, dtype=float)
+    cur = np.asarray(current, dtype=float)
+    sig, cur = np.broadcast_arrays(sig, cur)
+    sizes, steps, min_notional, prices = (
+        np.broadcast_to(np.asarray(a, dtype=float), sig.shape)
+        for a in (sizes, steps, min_notional, prices)
+    )
+
+    valid_sig = np.isin(sig, (-1.0, 0.0, 1.0))
+    has_price = np.isfinite(prices) & (prices > 0)
+
+    qty = quantize_down(sizes, steps)
+    with np.errstate(invalid="ignore"):
+        passes = (qty >= steps) & (qty * prices >= min_notional)
+    target = np.where(sig == 0, 0.0, sig * qty)
+
+    keep = ~valid_sig | ((sig != 0) & (~has_price | ~passes))
+    target = np.where(keep, cur, target)
+
+    delta = quantize_down(target - cur, steps)
+    # Kapatmada mevcut miktarın tamamı gider (yuvarlama artığı kalmasın)
+    delta = np.where((target == 0) & (cur != 0), -cur, delta)
+    # Borsanın reddedeceği kırıntı emirler (kapatmalar hariç)
+    with np.errstate(invalid="ignore"):
+        dust = (target != 0) & ((np.abs(delta) < steps) | (np.abs(delta) * prices < min_notional))
+
+    reason = np.select(
+        [
+            ~valid_sig,
+            (sig != 0) & ~has_price,
+            (sig != 0) & ~passes,
+            delta == 0,
+            dust,
+            (target == 0),
+            (cur == 0) & (target > 0),
+            (cur == 0) & (target < 0),
+            np.sign(cur) != np.sign(target),
+        ],
+        [NO_SIGNAL, NO_PRICE, BELOW_FILTERS, NO_ACTION, BELOW_FILTERS, CLOSE, OPEN_LONG, OPEN_SHORT, FLIP],
+        default=RESIZE,
+    )
+    # Korunan pozisyonlarda ve kırıntı delta'larda emir yok
+    delta = np.where(keep | dust, 0.0, delta)
+    return RebalancePlan(target, delta, reason)
+
+
+def orders_from_deltas(symbols: Sequence[str], delta: np.ndarray) -> List[dict]:
+    """Sıfır olmayan delta'lar için MARKET emirleri (tek kullanıcı, 1-boyutlu)."""
+    idx = np.flatnonzero(delta)
+    return [
+        {
+            "symbol": symbols[i],
+            "side": "BUY" if delta[i] > 0 else "SELL",
+            "quantity": round(float(abs(delta[i])), 8),
+        }
+        for i in idx
+    ]
+
@@ -0,0 +1,187 @@
+import os
+import time
+import heapq
+import random
+import asyncio
+import itertools
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# Aynı anda çalışabilecek en fazla iş sayısı
+SCHEDULER_CONCURRENCY = int(os.getenv("SCHEDULER_CONCURRENCY", "100"))
+
+# Kaçırılan çalıştırmalar için politika
+CATCH_UP_SKIP = "skip"          # kaçanları atla, bir sonraki slota hizalan
+CATCH_UP_RUN_ONCE = "run_once"  # kaç tane kaçarsa kaçsın bir kez çalıştır
+CATCH_UP_RUN_ALL = "run_all"    # her kaçan slot için bir kez çalıştır
+
+
+def next_slot(now: float, interval: float, offset: float = 0.0) -> float:
+    """
+    Epoch (UTC) zamanına hizalı bir sonraki slot: offset + k * interval > now.
+    Ör. interval=4h, offset=60s → 00:01, 04:01, ..., 20:01 UTC.
+    """
+    k = (now - offset) // interval + 1
+    return offset + k * interval
+
+
+class Job:
+    __slots__ = (
+        "job_id", "func", "interval", "offset", "jitter", "catch_up",
+        "slot", "next_run", "last_run", "last_duration", "last_error",
+        "runs", "running",
+    )
+
+    def __init__(self, job_id, func: Callable[[], Awaitable], interval: float,
+                 offset: float = 0.0, jitter: float = 0.0, catch_up: str = CATCH_UP_RUN_ONCE):
+        self.job_id = job_id
+        self.func = func
+        self.interval = interval
+        self.offset = offset
+        self.jitter = jitter
+        self.catch_up = catch_up
+        self.slot = 0.0            # hizalı slot zamanı (jitter'sız)
+        self.next_run = 0.0        # slot + jitter
+        self.last_run: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.runs = 0
+        self.running = False
+
+    def schedule_after(self, now: float) -> None:
+        self.slot = next_slot(now, self.interval, self.offset)
+        self.next_run = self.slot + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def info(self) -> dict:
+        def fmt(ts):
+            return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+        return {
+            "job_id": self.job_id,
+            "interval": self.interval,
+            "next_run": fmt(self.next_run),
+            "last_run": fmt(self.last_run),
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+            "runs": self.runs,
+            "running": self.running,
+        }
+
+
+class Scheduler:
+    """
+    Tek bir asyncio görevi ile çalışan merkezi zamanlayıcı.
+    İşler bir sonraki çalışma zamanına göre heap'te tutulur; uyanma sayısı
+    iş sayısından bağımsızdır ve on binlerce iş tutulabilir.
+    Slotlar duvar saatine hizalıdır, bu yüzden uzun süren çalıştırmalar kaymaya yol açmaz.
+    """
+
+    def __init__(self, max_concurrency: int = SCHEDULER_CONCURRENCY):
+        self.jobs: Dict[object, Job] = {}
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.max_concurrency = max_concurrency
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running: set = set()
+
+    # --- İş yönetimi ---
+    def add_job(self, job_id, func: Callable[[], Awaitable], interval: float, offset: float = 0.0,
+                jitter: float = 0.0, catch_up: str = CATCH_UP_RUN_ONCE) -> Job:
+        job = Job(job_id, func, interval, offset, jitter, catch_up)
+        job.schedule_after(time.time())
+        self.jobs[job_id] = job
+        self._push(job)
+        return job
+
+    def remove_job(self, job_id) -> None:
+        # Heap'teki kayıt tembel silinir: pop edildiğinde jobs'ta yoksa atlanır
+        self.jobs.pop(job_id, None)
+
+    def _push(self, job: Job) -> None:
+        heapq.heappush(self._heap, (job.next_run, next(self._seq), job.job_id))
+        if self._wakeup is not None and self._heap[0][2] == job.job_id:
+            self._wakeup.set()
+
+    # --- Introspection ---
+    def due_jobs(self, now: Optional[float] = None) -> List[dict]:
+        now = time.time() if now is None else now
+        return [job.info() for job in self.jobs.values() if job.next_run <= now]
+
+    def list_jobs(self) -> List[dict]:
+        return sorted((job.info() for job in self.jobs.values()), key=lambda j: j["next_run"] or "")
+
+    # --- Çalıştırma ---
+    async def _execute(self, job: Job, times: int) -> None:
+        async with self._semaphore:
+            job.running = True
+            try:
+                for _ in range(times):
+                    started = time.time()
+                    t0 = time.perf_counter()
+                    try:
+                        await job.func()
+                        job.last_error = None
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        job.last_error = str(e)
+                        print(f"[⚠️] Zamanlanmış iş hata verdi ({job.job_id}): {e}")
+                    finally:
+                        job.last_run = started
+                        job.last_duration = round(time.perf_counter() - t0, 3)
+                        job.runs += 1
+            finally:
+                job.running = False
+
+    def _dispatch(self, job: Job, now: float) -> None:
+        missed = int((now - job.slot) // job.interval)
+        if job.running:
+            print(f"[ℹ️] {job.job_id} hâlâ çalışıyor, bu slot atlandı.")
+        elif missed >= 1 and job.catch_up == CATCH_UP_SKIP:
+            print(f"[ℹ️] {job.job_id}: {missed} slot kaçırıldı, atlanıyor.")
+        else:
+            times = missed + 1 if job.catch_up == CATCH_UP_RUN_ALL else 1
+            task = asyncio.create_task(self._execute(job, times))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+        job.schedule_after(now)
+        self._push(job)
+
+    async def _run(self) -> None:
+        while True:
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                run_at, _, job_id = heapq.heappop(self._heap)
+                job = self.jobs.get(job_id)
+                # Silinmiş ya da yeniden planlanmış işin eski kaydı
+                if job is None or job.next_run != run_at:
+                    continue
+                self._dispatch(job, now)
+
+            delay = self._heap[0][0] - now if self._heap else 3600.0
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, delay))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> asyncio.Task:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    def stop(self) -> None:
+        task, self._task = self._task, None
+        self._wakeup = None
+        if task and not task.done():
+            task.cancel()
+        for running in list(self._running):
+            running.cancel()
+
+
+# Process genelinde paylaşılan zamanlayıcı
+scheduler = Scheduler()
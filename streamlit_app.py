@@ -15,6 +15,11 @@ from background_jobs import start_user_loop, stop_user_loop
 from sqlalchemy.future import select
 from datetime import datetime
 from prediction_trader import trade_from_latest_prediction
+from binance_trader import close_exchange_client
+from order_journal import order_journal
+from ws_order_client import close_ws_sessions
+from trading_worker import set_trading_control
+from price_source import price_source
 
 
 load_dotenv()  
@@ -30,6 +35,8 @@ if "auth_page" not in st.session_state:
     st.session_state["auth_page"] = "login"
 if "ws_client" not in st.session_state:
     st.session_state["ws_client"] = get_binance_ws()
+    # Trade döngüsü fiyatları REST yerine bu canlı akıştan okusun
+    price_source.attach_feed(st.session_state["ws_client"])
 if "page" not in st.session_state:
     st.session_state["page"] = "Market Data"
 if "user_ws" not in st.session_state:
@@ -291,6 +298,8 @@ else:
         # .env dosyasını yükle
         load_dotenv()
         USE_TESTNET = os.getenv("USE_TESTNET", "False") == "True"
+        # True ise döngüler ayrı trading_worker process'lerinde çalışır; UI yalnızca kontrol kaydı yazar
+        USE_TRADING_WORKER = os.getenv("USE_TRADING_WORKER", "False") == "True"
         TEST_KEY = os.getenv("TESTNET_API_KEY")
         TEST_SECRET = os.getenv("TESTNET_API_SECRET")
 
@@ -310,18 +319,30 @@ else:
                         user.api_secret = TEST_SECRET
 
                     if st.session_state["trading_active"]:
-                        stop_user_loop(user.id)
+                        if USE_TRADING_WORKER:
+                            await set_trading_control(user.id, False)
+                        else:
+                            stop_user_loop(user.id)
                         st.session_state["trading_active"] = False
                     else:
                         # ① Döngüyü başlat (4h+1dk scheduler)
-                        start_user_loop(user, trade_size_usdt)
-                        # ② İlk trade’i hemen yap (butona basınca)
-                        await trade_from_latest_prediction(user, trade_size_usdt)
+                        if USE_TRADING_WORKER:
+                            await set_trading_control(user.id, True, trade_size_usdt)
+                        else:
+                            start_user_loop(user, trade_size_usdt)
+                        # ② İlk trade’i hemen yap (butona basınca); worker modunda kullanıcının
+                        #    shard'ındaki worker kontrol kaydını alınca yapar (aynı anda iki process trade etmesin)
+                        if not USE_TRADING_WORKER:
+                            await trade_from_latest_prediction(user, trade_size_usdt)
                         st.session_state["trading_active"] = True
                 else:
                     st.error("Kullanıcı bulunamadı.")
         finally:
             await session.close()
+            # asyncio.run bitince loop kapanacak; havuzu düzgünce kapat
+            await order_journal.close()
+            await close_exchange_client()
+            await close_ws_sessions()
 
 
 
@@ -385,6 +406,10 @@ else:
                 margin: 0; 
                 transition: all 0.3s ease-in-out;
             }
+            .small-ticker-change {
+                font-size: 11px; 
+                margin: 0; 
+            }
             /* Portföy */
             .portfolio-container {
                 margin-top: 20px; 
@@ -499,7 +524,7 @@ else:
         all_coins = {**top_coins, **bottom_coins}
         
 
-        def render_ticker(prices, coin_map):
+        def render_ticker(prices, coin_map, history=None):
             html = '<div class="ticker-container">'
             for sym, lbl in coin_map.items():
                 raw = prices.get(sym)
@@ -508,10 +533,24 @@ else:
                     disp = f"${price:,.2f}"
                 else:
                     disp = "N/A"
+                # Yerel fiyat geçmişinden 24s (yoksa 1s) değişim — REST çağrısı yok
+                change_html = ""
+                if history is not None and sym in history:
+                    hist = history[sym]
+                    for label, seconds in (("24s", 86400), ("1s", 3600)):
+                        chg = hist.change(seconds)
+                        if chg == chg:  # NaN değil
+                            color = "#28a745" if chg >= 0 else "#dc3545"
+                            change_html = (
+                                f'  <p class="small-ticker-change" style="color:{color}">'
+                                f'{chg * 100:+.2f}% ({label})</p>'
+                            )
+                            break
                 html += (
                     f'<div class="ticker-box">'
                     f'  <p class="small-ticker-label">{lbl}</p>'
                     f'  <p class="small-ticker-price">{disp}</p>'
+                    f'{change_html}'
                     f'</div>'
                 )
             html += "</div>"
@@ -571,14 +610,15 @@ else:
         while True:
             # — Public ticker güncellemesi (her koşulda)
             prices = st.session_state["ws_client"].latest_prices
+            history = getattr(st.session_state["ws_client"], "history", None)
             # üst satır
             top_ph.markdown(
-                render_ticker(prices, top_coins),
+                render_ticker(prices, top_coins, history),
                 unsafe_allow_html=True
             )
             # alt satır
             bot_ph.markdown(
-                render_ticker(prices, bottom_coins),
+                render_ticker(prices, bottom_coins, history),
                 unsafe_allow_html=True
             )
 
@@ -0,0 +1,99 @@
+# test_kline_store.py
+#   python -m pytest -q test_kline_store.py
+import asyncio
+from datetime import datetime, timezone
+import numpy as np
+import pytest
+import kline_store
+from kline_store import INTERVAL_MS, KLINE_DTYPE, KlineStore
+
+STEP = INTERVAL_MS["1h"]
+T0 = int(datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _ts(hours: int) -> int:
+    return T0 + hours * STEP
+
+
+class FakeKlines:
+    """/fapi/v1/klines taklidi: [start, end] içindeki mumlar, close = saat indeksi."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, symbol, interval, start_ms, end_ms):
+        self.calls.append((start_ms, end_ms))
+        first = -(-start_ms // STEP) * STEP
+        times = np.arange(first, end_ms + 1, STEP, dtype=np.int64)
+        out = np.zeros(len(times), dtype=KLINE_DTYPE)
+        out["open_time"] = times
+        out["close"] = (times - T0) // STEP
+        out["close_time"] = times + STEP - 1
+        return out
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # Küçük sayfalar: sayfalama ve grup sınırları da denensin
+    monkeypatch.setattr(kline_store, "KLINE_PAGE_LIMIT", 5)
+    s = KlineStore(root=str(tmp_path), concurrency=2)
+    fake = FakeKlines()
+    monkeypatch.setattr(s, "_fetch_page", fake)
+    s.fake = fake
+    return s
+
+
+def _sync(store, since, until):
+    return asyncio.run(store.sync("BTCUSDT", "1h", since, until))
+
+
+def _hours(store):
+    return ((np.asarray(store.load("BTCUSDT", "1h")["open_time"]) - T0) // STEP).tolist()
+
+
+def test_initial_sync_fills_range_in_pages(store):
+    assert _sync(store, _ts(0), _ts(23)) == 23
+    assert _hours(store) == list(range(23))
+    assert len(store.fake.calls) == 5   # 23 mum / 5'lik sayfa
+
+
+def test_tail_gap_only_fetches_missing_candles(store):
+    _sync(store, _ts(0), _ts(10))
+    store.fake.calls.clear()
+    assert _sync(store, _ts(0), _ts(17)) == 7
+    assert store.fake.calls[0][0] == _ts(10)
+    assert _hours(store) == list(range(17))
+
+
+def test_head_gap_is_prepended_in_order(store):
+    _sync(store, _ts(10), _ts(20))
+    assert _sync(store, _ts(3), _ts(20)) == 7
+    assert _hours(store) == list(range(3, 20))
+    assert store.load("BTCUSDT", "1h")["close"].tolist() == list(range(3, 20))
+
+
+def test_head_and_tail_gaps_in_one_sync(store):
+    _sync(store, _ts(5), _ts(8))
+    assert _sync(store, _ts(0), _ts(12)) == 9
+    assert _hours(store) == list(range(12))
+
+
+def test_resync_is_a_noop(store):
+    _sync(store, _ts(0), _ts(12))
+    store.fake.calls.clear()
+    assert _sync(store, _ts(0), _ts(12)) == 0
+    assert store.fake.calls == []
+
+
+def test_unaligned_bounds_and_open_candle(store):
+    now_ms = _ts(30) + STEP // 2
+    # since mum ortasında → o mumun başına hizalanır; until gelecekteyse kapanmamış mum alınmaz
+    assert _sync(store, _ts(2) + 123, now_ms) == 28
+    assert _hours(store) == list(range(2, 30))
+
+
+def test_read_returns_inclusive_range(store):
+    _sync(store, _ts(0), _ts(24))
+    rows = store.read("BTCUSDT", "1h", _ts(5), _ts(9))
+    assert rows["close"].tolist() == [5, 6, 7, 8, 9]
+    assert store.coverage("BTCUSDT", "1h") == (_ts(0), _ts(23))
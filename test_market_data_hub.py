@@ -0,0 +1,121 @@
+# test_market_data_hub.py
+#   python -m pytest -q test_market_data_hub.py
+import asyncio
+import gc
+import threading
+import time
+import pytest
+import websocket_client
+from websocket_client import MarketDataHub
+
+STREAMS = ("btcusdt@markPrice", "ethusdt@markPrice")
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    """Upstream bağlantı açmayan hub; iptal edilen bağlantılar kaydedilir."""
+    cancelled = []
+
+    async def fake_run(conn):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(conn.streams)
+            raise
+
+    monkeypatch.setattr(websocket_client._StreamConnection, "run", fake_run)
+    h = MarketDataHub()
+    h.cancelled = cancelled
+    yield h
+    if h._loop is not None:
+        asyncio.run_coroutine_threadsafe(_cancel_all(), h._loop).result(2)
+        h._loop.call_soon_threadsafe(h._loop.stop)
+
+
+async def _cancel_all():
+    tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_same_streams_share_one_connection(hub):
+    a = hub.subscribe(STREAMS)
+    b = hub.subscribe(reversed(STREAMS))
+    c = hub.subscribe(("solusdt@markPrice",))
+    assert hub.stats()["connections"] == 2
+    assert hub.stats()["subscribers"] == 3
+    assert a.latest_prices is b.latest_prices
+    assert a.latest_prices is not c.latest_prices
+    for sub in (a, b, c):
+        sub.close()
+
+
+def test_last_close_cancels_upstream(hub):
+    a = hub.subscribe(STREAMS)
+    b = hub.subscribe(STREAMS)
+    a.close()
+    a.close()   # ikinci close etkisiz
+    assert hub.stats() == {"connections": 1, "subscribers": 1, "streams": []}
+    b.close()
+    assert hub.stats()["connections"] == 0
+    assert _wait_for(lambda: hub.cancelled == [tuple(sorted(STREAMS))])
+
+
+def test_resubscribe_after_release_opens_new_connection(hub):
+    a = hub.subscribe(STREAMS)
+    old = a.latest_prices
+    a.close()
+    b = hub.subscribe(STREAMS)
+    assert hub.stats()["connections"] == 1
+    assert b.latest_prices is not old
+    b.close()
+
+
+def test_gc_release_does_not_take_the_lock(hub):
+    a = hub.subscribe(STREAMS)
+    keep = hub.subscribe(STREAMS)
+    done = threading.Event()
+
+    def collect_while_locked():
+        nonlocal a
+        with hub._lock:
+            del a
+            gc.collect()
+        done.set()
+
+    t = threading.Thread(target=collect_while_locked)
+    t.start()
+    t.join(2.0)
+    assert done.is_set(), "finalizer hub kilidini beklerken kilitlendi"
+    assert _wait_for(lambda: hub.stats()["subscribers"] == 1)
+    keep.close()
+
+
+def test_callback_and_queue_fan_out(hub):
+    seen = []
+    sub = hub.subscribe(STREAMS, callback=lambda *args: seen.append(args))
+    conn = hub._connections[tuple(sorted(STREAMS))]
+
+    async def run():
+        queue = sub.updates(maxsize=2)
+        for i in range(3):
+            conn._publish("BTCUSDT", 100.0 + i, 1.0 + i, i)
+        await asyncio.sleep(0.05)
+        return [queue.get_nowait()[1] for _ in range(queue.qsize())]
+
+    # Dolan kuyrukta en eski güncelleme atılır
+    assert asyncio.run(run()) == [101.0, 102.0]
+    assert [s[1] for s in seen] == [100.0, 101.0, 102.0]
+    assert sub.latest_prices["BTCUSDT"] == 102.0
+    assert sub.history["BTCUSDT"].fine.last() == (3.0, 102.0)
+    sub.close()
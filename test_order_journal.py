@@ -0,0 +1,95 @@
+# test_order_journal.py
+#   python -m pytest -q test_order_journal.py
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import database
+import order_journal
+from order_journal import STATUS_SENT, OrderJournalWriter, client_order_id
+
+TS = datetime(2026, 1, 1, 4, 1)
+
+
+def test_client_order_id_is_deterministic():
+    assert client_order_id(7, "BTCUSDT", TS) == client_order_id(7, "BTCUSDT", TS) == "pt7-BTCUSDT-1767240060"
+
+
+def test_client_order_id_truncation_keeps_prediction():
+    uid, symbol = 10 ** 15, "1000000MOGUSDT"
+    a = client_order_id(uid, symbol, TS)
+    b = client_order_id(uid, symbol, TS + timedelta(hours=4))
+    assert len(a) == len(b) == 36
+    assert a != b
+    assert a.endswith("-1767240060")
+
+
+def test_already_sent_only_for_accepted_orders():
+    journal = OrderJournalWriter(persist=False)
+    journal.record("a", 1, "BTCUSDT", "BUY", 1, status=STATUS_SENT)
+    journal.record("b", 1, "BTCUSDT", "BUY", 1, status="error")
+    journal.record("c", 1, "BTCUSDT", "BUY", 1, status="skipped")
+    assert journal.already_sent("a")
+    assert not journal.already_sent("b")
+    assert not journal.already_sent("c")
+    assert not journal.already_sent("d")
+    # Hata sonrası yeniden denenip kabul edilirse artık gönderilmiş sayılır
+    journal.record("b", 1, "BTCUSDT", "BUY", 1, status=STATUS_SENT)
+    assert journal.already_sent("b")
+
+
+def test_recent_ids_are_bounded_lru(monkeypatch):
+    monkeypatch.setattr(order_journal, "ORDER_JOURNAL_RECENT", 3)
+    journal = OrderJournalWriter(persist=False)
+    for cid in "abcd":
+        journal.record(cid, 1, "BTCUSDT", "BUY", 1, status=STATUS_SENT)
+    assert not journal.already_sent("a")
+    assert all(journal.already_sent(cid) for cid in "bcd")
+
+
+def test_buffer_overflow_drops_oldest(monkeypatch):
+    monkeypatch.setattr(order_journal, "ORDER_JOURNAL_MAX_BUFFER", 2)
+    journal = OrderJournalWriter(persist=True)
+    for cid in "abc":
+        journal.record(cid, 1, "BTCUSDT", "BUY", 1, status=STATUS_SENT)   # loop yok → görev başlamaz
+    assert [row["client_order_id"] for row in journal._buffer] == ["b", "c"]
+    assert journal.dropped == 1
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    eng = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'journal.db'}")
+    monkeypatch.setattr(database, "async_session", async_sessionmaker(eng, expire_on_commit=False))
+    monkeypatch.setattr(order_journal, "engine", eng)
+    yield eng
+    asyncio.run(eng.dispose())
+
+
+def test_sent_among_sees_other_process_rows(db):
+    async def run():
+        writer = OrderJournalWriter(persist=True)
+        writer.record("sent-1", 1, "BTCUSDT", "BUY", 1, status=STATUS_SENT, response={"orderId": 9})
+        writer.record("err-1", 1, "ETHUSDT", "BUY", 1, status="error", error="boom")
+        await writer.close()
+        assert writer.written == 2
+
+        # Boş bellekle başlayan ikinci process
+        other = OrderJournalWriter(persist=True)
+        sent = await other.sent_among(["sent-1", "err-1", "new-1"])
+        cached = other.already_sent("sent-1")
+        await db.dispose()
+        return sent, cached
+
+    sent, cached = asyncio.run(run())
+    assert sent == {"sent-1"}
+    assert cached
+
+
+def test_sent_among_falls_back_to_memory_when_db_fails(monkeypatch):
+    async def broken():
+        raise OSError("db down")
+
+    journal = OrderJournalWriter(persist=True)
+    monkeypatch.setattr(journal, "_ensure_table", broken)
+    journal._remember("a", STATUS_SENT)
+    assert asyncio.run(journal.sent_among(["a", "b"])) == {"a"}
@@ -0,0 +1,80 @@
+# test_prediction_trader.py
+#   python -m pytest -q test_prediction_trader.py
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import database
+import prediction_store
+from models import Prediction
+from prediction_store import create_prediction_store, write_signals
+from prediction_trader import load_latest_prediction
+
+NOW = datetime.utcnow()
+OLD = NOW - timedelta(hours=12)
+NEW = NOW - timedelta(hours=5)
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    """Geçici SQLite: uzun depo ve geniş tablo aynı veritabanında."""
+    eng = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'predictions.db'}")
+    monkeypatch.setattr(database, "engine", eng)
+    monkeypatch.setattr(database, "async_session", async_sessionmaker(eng, expire_on_commit=False))
+    monkeypatch.setattr(prediction_store, "engine", eng)
+    yield eng
+    asyncio.run(eng.dispose())
+
+
+def _load(eng, wide=(), long=(), long_table=True):
+    """wide: [(ts, btc_signal)], long: [(ts, btc_signal)] yazar ve seçilen prediction'ı döner."""
+    async def run():
+        async with eng.begin() as conn:
+            await conn.run_sync(Prediction.metadata.create_all, tables=[Prediction.__table__])
+        if long_table:
+            await create_prediction_store()
+        session = database.async_session()
+        for ts, sig in wide:
+            session.add(Prediction(timestamp=ts, btcusdt_pred=sig))
+        for ts, sig in long:
+            await write_signals(session, ts, {"BTCUSDT": sig})
+        await session.commit()
+        await session.close()
+        latest = await load_latest_prediction()
+        await eng.dispose()
+        return latest
+
+    return asyncio.run(run())
+
+
+def test_newer_wide_row_wins_over_lagging_long_store(db):
+    latest = _load(db, wide=[(OLD, 1), (NEW, -1)], long=[(OLD, 1)])
+    assert latest.timestamp == NEW
+    assert latest.signals["BTCUSDT"] == -1
+
+
+def test_long_store_wins_on_tie(db):
+    latest = _load(db, wide=[(NEW, 1)], long=[(NEW, -1)])
+    assert latest.timestamp == NEW
+    assert latest.signals["BTCUSDT"] == -1
+
+
+def test_newer_long_store_wins(db):
+    latest = _load(db, wide=[(OLD, 1)], long=[(NEW, -1)])
+    assert latest.timestamp == NEW
+    assert latest.signals["BTCUSDT"] == -1
+
+
+def test_rows_newer_than_cutoff_are_ignored(db):
+    latest = _load(db, wide=[(OLD, 1), (NOW - timedelta(hours=1), -1)], long=[(NOW - timedelta(hours=2), -1)])
+    assert latest.timestamp == OLD
+
+
+def test_missing_long_table_falls_back_to_wide(db):
+    latest = _load(db, wide=[(NEW, 1)], long_table=False)
+    assert latest.timestamp == NEW
+    assert latest.signals["BTCUSDT"] == 1
+
+
+def test_no_prediction(db):
+    assert _load(db) is None
@@ -0,0 +1,98 @@
+# test_price_history.py
+#   python -m pytest -q test_price_history.py
+import math
+import numpy as np
+from price_history import PriceHistory, PriceRing, SymbolHistory
+
+
+def _ref_vol(prices) -> float:
+    r = np.diff(np.log(np.asarray(prices, dtype=float)))
+    return math.sqrt(float(np.sum(r * r)))
+
+
+def test_window_is_contiguous_view_after_wraparound():
+    ring = PriceRing(5)
+    for t in range(12):
+        ring.append(float(t), 100.0 + t)
+    ts, px = ring.window()
+    assert ts.tolist() == [7.0, 8.0, 9.0, 10.0, 11.0]
+    assert px.tolist() == [107.0, 108.0, 109.0, 110.0, 111.0]
+    assert np.shares_memory(px, ring._px)
+    assert ring.last() == (11.0, 111.0)
+
+
+def test_window_by_seconds():
+    ring = PriceRing(10)
+    for t in range(10):
+        ring.append(float(t), 100.0 + t)
+    ts, _ = ring.window(3)
+    assert ts.tolist() == [6.0, 7.0, 8.0, 9.0]
+
+
+def test_prefix_sum_vol_matches_reference_across_wraparound():
+    rng = np.random.default_rng(0)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 50)))
+    ring = PriceRing(8)
+    for t, p in enumerate(prices):
+        ring.append(float(t), float(p))
+    # Son 5 sn: t=44..49 → 5 getiri
+    assert math.isclose(ring.realized_vol(5), _ref_vol(prices[44:]), rel_tol=1e-9)
+    # Kapsanandan uzun pencere: halkadaki tüm örnekler
+    assert math.isclose(ring.realized_vol(1000), _ref_vol(prices[42:]), rel_tol=1e-9)
+
+
+def test_change_uses_price_at_window_start():
+    ring = PriceRing(10)
+    for t in range(10):
+        ring.append(float(t), 100.0 + t)
+    assert math.isclose(ring.change(4), 109.0 / 105.0 - 1)
+    assert math.isnan(ring.change(100))
+
+
+def test_same_bucket_overwrites_last_sample():
+    ring = PriceRing(10, resolution=1.0)
+    ring.append(0.2, 100.0)
+    ring.append(1.1, 110.0)
+    ring.append(1.7, 90.0)      # aynı saniye: 110 yerine 90
+    ring.append(2.5, 99.0)
+    assert ring.count == 3
+    assert ring.window()[1].tolist() == [100.0, 90.0, 99.0]
+    assert math.isclose(ring.realized_vol(10), _ref_vol([100.0, 90.0, 99.0]), rel_tol=1e-9)
+
+
+def test_non_positive_prices_are_ignored():
+    ring = PriceRing(4)
+    ring.append(0.0, 100.0)
+    ring.append(1.0, 0.0)
+    ring.append(2.0, float("nan"))
+    assert ring.count == 1
+
+
+def test_fine_ring_covers_its_full_span():
+    hist = SymbolHistory(fine=3600, coarse=1500)
+    for t in range(5000):
+        hist.append(float(t), 100.0 + t * 0.01)
+    assert hist.fine.covers(3600)
+    assert hist.ring_for(3600) is hist.fine
+    assert math.isclose(hist.change(3600), (100.0 + 4999 * 0.01) / (100.0 + 1399 * 0.01) - 1)
+
+
+def test_long_windows_fall_through_to_coarse_ring():
+    hist = SymbolHistory(fine=60, coarse=100)
+    for t in range(0, 3 * 3600, 10):
+        hist.append(float(t), 100.0 + t / 3600)
+    assert not hist.fine.covers(3600)
+    assert hist.ring_for(3600) is hist.coarse
+    ts, _ = hist.window(3600)
+    assert ts[-1] - ts[0] == 3600
+
+
+def test_price_history_stats():
+    history = PriceHistory(fine=100, coarse=10)
+    assert history.stats("BTCUSDT") == {}
+    for t in range(50):
+        history.append("BTCUSDT", float(t), 100.0 + t)
+    stats = history.stats("BTCUSDT")
+    assert set(stats) == {"change_1h", "change_24h", "vol_1h", "vol_24h"}
+    assert math.isnan(stats["change_1h"])
+    assert "BTCUSDT" in history and "ETHUSDT" not in history
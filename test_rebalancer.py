@@ -0,0 +1,39 @@
+# test_rebalancer.py
+#   python -m pytest -q test_rebalancer.py
+import numpy as np
+from rebalancer import (
+    BELOW_FILTERS, CLOSE, FLIP, NO_ACTION, RESIZE, orders_from_deltas, rebalance,
+)
+
+
+def test_dust_delta_is_not_sent():
+    # Hedef 500 DOGE, mevcut 501: 1 DOGE * 0.12 < minNotional 5 → SELL 1 yok
+    plan = rebalance([1], [501], 500, 1, 5, 0.12)
+    assert plan.delta.tolist() == [0.0]
+    assert plan.reason.tolist() == [BELOW_FILTERS]
+    assert orders_from_deltas(["DOGEUSDT"], plan.delta) == []
+
+
+def test_delta_below_step_is_not_sent():
+    plan = rebalance([1], [0.0105], 0.0106, 0.001, 5, 60000)
+    assert plan.delta.tolist() == [0.0]
+    assert plan.reason.tolist() == [NO_ACTION]
+
+
+def test_resize_above_filters_is_sent():
+    plan = rebalance([1], [450], 500, 1, 5, 0.12)
+    assert plan.delta.tolist() == [50.0]
+    assert plan.reason.tolist() == [RESIZE]
+
+
+def test_close_ignores_filters():
+    # Kırıntı pozisyon da tamamen kapatılır
+    plan = rebalance([0], [1], 500, 1, 5, 0.12)
+    assert plan.delta.tolist() == [-1.0]
+    assert plan.reason.tolist() == [CLOSE]
+
+
+def test_flip_and_dust_per_user():
+    plan = rebalance(np.array([[-1], [1]]), np.array([[500], [501]]), 500, 1, 5, 0.12)
+    assert plan.delta[:, 0].tolist() == [-1000.0, 0.0]
+    assert plan.reason[:, 0].tolist() == [FLIP, BELOW_FILTERS]
@@ -0,0 +1,87 @@
+# test_scheduler.py
+#   python -m pytest -q test_scheduler.py
+import asyncio
+from datetime import datetime, timezone
+from scheduler import (
+    CATCH_UP_RUN_ALL, CATCH_UP_RUN_ONCE, CATCH_UP_SKIP, Scheduler, next_slot,
+)
+
+H4 = 4 * 3600
+
+
+def _ts(*args) -> float:
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def test_next_slot_aligns_to_utc_4h_plus_offset():
+    assert next_slot(_ts(2026, 1, 1, 0, 0, 30), H4, 60) == _ts(2026, 1, 1, 0, 1)
+    assert next_slot(_ts(2026, 1, 1, 5, 0), H4, 60) == _ts(2026, 1, 1, 8, 1)
+    assert next_slot(_ts(2026, 1, 1, 23, 59), H4, 60) == _ts(2026, 1, 2, 0, 1)
+
+
+def test_next_slot_is_strictly_after_now():
+    slot = _ts(2026, 1, 1, 4, 1)
+    assert next_slot(slot, H4, 60) == slot + H4
+
+
+def _dispatch_missed(catch_up: str, missed: int):
+    """Slotu `missed` aralık kadar geride kalmış işi dağıtır; (çalıştırma sayısı, yeni slot)."""
+    async def run():
+        calls = []
+
+        async def job_func():
+            calls.append(1)
+
+        sched = Scheduler()
+        sched._semaphore = asyncio.Semaphore(1)
+        job = sched.add_job("job", job_func, H4, offset=60, catch_up=catch_up)
+        now = job.slot + missed * H4 + 5
+        sched._dispatch(job, now)
+        await asyncio.gather(*sched._running)
+        return len(calls), job.slot, now
+
+    return asyncio.run(run())
+
+
+def test_catch_up_run_once():
+    runs, slot, now = _dispatch_missed(CATCH_UP_RUN_ONCE, 3)
+    assert runs == 1
+    assert slot == next_slot(now, H4, 60)
+
+
+def test_catch_up_run_all():
+    runs, _, _ = _dispatch_missed(CATCH_UP_RUN_ALL, 3)
+    assert runs == 4
+
+
+def test_catch_up_skip_only_skips_missed_slots():
+    assert _dispatch_missed(CATCH_UP_SKIP, 2)[0] == 0
+    # Zamanında gelen slot atlanmaz
+    assert _dispatch_missed(CATCH_UP_SKIP, 0)[0] == 1
+
+
+def test_running_job_skips_slot_and_removed_job_is_dropped():
+    async def run():
+        sched = Scheduler()
+        sched._semaphore = asyncio.Semaphore(1)
+        calls = []
+
+        async def job_func():
+            calls.append(1)
+
+        job = sched.add_job("job", job_func, H4)
+        job.running = True
+        sched._dispatch(job, job.slot + 1)
+        assert not sched._running and calls == []
+
+        # Silinen işin heap kaydı _run tarafından atlanır
+        job.running = False
+        sched.remove_job("job")
+        sched._heap = [(0.0, 0, "job")]
+        sched._wakeup = asyncio.Event()
+        task = asyncio.create_task(sched._run())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        assert calls == []
+
+    asyncio.run(run())
@@ -0,0 +1,128 @@
+# test_stream_supervisor.py
+#   python -m pytest -q test_stream_supervisor.py
+import asyncio
+import websockets
+import websocket_client
+from websocket_client import StreamSupervisor, reconnect_delay, stream_stats
+
+
+def test_reconnect_delay_is_exponential_with_cap_and_jitter(monkeypatch):
+    monkeypatch.setattr(websocket_client, "WS_RECONNECT_MIN_DELAY", 0.5)
+    monkeypatch.setattr(websocket_client, "WS_RECONNECT_MAX_DELAY", 30.0)
+    for attempt, base in ((0, 0.5), (1, 1.0), (3, 4.0), (10, 30.0)):
+        delays = [reconnect_delay(attempt) for _ in range(200)]
+        assert base * 0.5 <= min(delays) and max(delays) <= base * 1.5
+
+
+async def _supervise(behaviours, monkeypatch, stale_after=None, until=None, on_message=None,
+                     max_age=None, timeout=5.0):
+    """
+    Yerel bir WebSocket sunucusuna karşı StreamSupervisor çalıştırır.
+    behaviours: bağlantı sırasına göre sunucu davranışları (async fn(ws)); sonuncusu tekrarlanır.
+    until(sup, events) True olunca durur. Döner: (supervisor, events).
+    """
+    events = {"attempts": [], "resyncs": 0, "messages": []}
+    monkeypatch.setattr(websocket_client, "reconnect_delay",
+                        lambda attempt: events["attempts"].append(attempt) or 0.01)
+    if max_age is not None:
+        monkeypatch.setattr(websocket_client, "WS_MAX_CONNECTION_AGE", max_age)
+    connections = 0
+
+    async def handler(ws):
+        nonlocal connections
+        behaviour = behaviours[min(connections, len(behaviours) - 1)]
+        connections += 1
+        await behaviour(ws)
+
+    async def resync():
+        events["resyncs"] += 1
+
+    def default_on_message(msg):
+        events["messages"].append(msg)
+
+    async with websockets.serve(handler, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+
+        async def url():
+            return f"ws://127.0.0.1:{port}"
+
+        sup = StreamSupervisor("test:sup", url, on_message or default_on_message, resync,
+                               stale_after=stale_after)
+        task = asyncio.create_task(sup.run())
+        deadline = asyncio.get_running_loop().time() + timeout
+        while not until(sup, events):
+            assert asyncio.get_running_loop().time() < deadline, (sup.stats.as_dict(), events)
+            await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    return sup, events
+
+
+async def _close(ws):
+    await ws.close()
+
+
+async def _send_then_close(ws):
+    await ws.send("hello")
+    await ws.close()
+
+
+async def _silent(ws):
+    await ws.wait_closed()
+
+
+async def _chatty(ws):
+    for i in range(1000):
+        await ws.send(f"m{i}")
+        await asyncio.sleep(0.005)
+
+
+def test_backoff_grows_while_unhealthy_and_resets_after_a_message(monkeypatch):
+    behaviours = [_close, _close, _close, _send_then_close, _close, _close]
+    sup, events = asyncio.run(_supervise(
+        behaviours, monkeypatch, until=lambda s, e: len(e["attempts"]) >= 6,
+    ))
+    assert events["attempts"][:6] == [0, 1, 2, 0, 1, 2]
+    assert sup.stats.reconnects >= 6
+    # İlk bağlantı dışındaki her bağlantıda REST resync
+    assert events["resyncs"] == sup.stats.connects - 1
+    assert "test:sup" not in stream_stats
+
+
+def test_stale_connection_is_replaced(monkeypatch):
+    sup, events = asyncio.run(_supervise(
+        [_silent], monkeypatch, stale_after=0.05, until=lambda s, e: s.stats.stale_timeouts >= 2,
+    ))
+    assert sup.stats.connects >= 2
+    assert "mesaj gelmedi" in sup.stats.last_error
+
+
+def test_on_message_false_reconnects_without_backoff(monkeypatch):
+    sup, events = asyncio.run(_supervise(
+        [_chatty], monkeypatch, on_message=lambda msg: False,
+        until=lambda s, e: s.stats.connects >= 3,
+    ))
+    assert events["attempts"] == []
+
+
+def test_handler_errors_are_counted_not_reconnected(monkeypatch):
+    def bad(msg):
+        raise ValueError("bozuk olay")
+
+    sup, events = asyncio.run(_supervise(
+        [_chatty], monkeypatch, on_message=bad, until=lambda s, e: s.stats.parse_errors >= 5,
+    ))
+    assert sup.stats.connects == 1
+    assert sup.stats.reconnects == 0
+
+
+def test_planned_reconnect_at_max_connection_age(monkeypatch):
+    sup, events = asyncio.run(_supervise(
+        [_chatty], monkeypatch, stale_after=5, max_age=0.05,
+        until=lambda s, e: s.stats.connects >= 3,
+    ))
+    assert events["attempts"] == []
+    assert sup.stats.stale_timeouts == 0
@@ -6,6 +6,8 @@ from database import get_async_session
 from sqlalchemy import select
 from models import User
 from prediction_trader import trade_from_latest_prediction
+from binance_trader import close_exchange_client
+from order_journal import order_journal
 
 async def main():
     # 1) .env’den TESTNET ve API anahtarlarınızı yükleyin
@@ -36,6 +38,8 @@ async def main():
 
     finally:
         await session.close()
+        await order_journal.close()
+        await close_exchange_client()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,257 @@
+# trading_worker.py
+# UI'dan bağımsız trade worker'ı. Kullanıcılar N process arasında
+# consistent hashing ile paylaştırılır; başlat/durdur kontrolü
+# trading_controls tablosu üzerinden yapılır.
+#
+#   python trading_worker.py --processes 4
+import os
+import asyncio
+import argparse
+import bisect
+import hashlib
+import multiprocessing
+import signal
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+from dotenv import load_dotenv
+from cryptography.fernet import Fernet, InvalidToken
+from sqlalchemy.future import select
+from database import engine, get_async_session
+from models import TradingControl, User
+import background_jobs
+from background_jobs import start_user_loop, stop_user_loop, update_user_loop
+from binance_trader import close_exchange_client
+from order_journal import order_journal
+from prediction_trader import trade_from_latest_prediction
+from price_board import open_price_board
+from price_source import price_source
+from ws_order_client import close_ws_sessions
+
+load_dotenv()
+USE_TESTNET = os.getenv("USE_TESTNET", "False") == "True"
+
+# Kontrol tablosunun ne sıklıkla okunacağı (saniye)
+CONTROL_POLL_INTERVAL = float(os.getenv("TRADING_CONTROL_POLL_INTERVAL", "5"))
+# Her shard için ring üzerindeki sanal düğüm sayısı
+HASH_RING_REPLICAS = int(os.getenv("TRADING_HASH_RING_REPLICAS", "100"))
+
+# API anahtarlarını çözen şifreleyici (worker başlarken bir kez kurulur)
+_cipher: Optional[Fernet] = None
+# Butonla yeni açılan kullanıcılar için çalışan ilk trade görevleri
+_first_trades: Set[asyncio.Task] = set()
+
+
+def _hash(key: str) -> int:
+    return int(hashlib.md5(key.encode()).hexdigest()[:16], 16)
+
+
+class HashRing:
+    """
+    Consistent hashing halkası. Shard sayısı değiştiğinde kullanıcıların
+    yalnızca ~1/N'i başka process'e taşınır.
+    """
+
+    def __init__(self, nodes: List[int], replicas: int = HASH_RING_REPLICAS):
+        self._ring = sorted(
+            (_hash(f"shard-{node}#{r}"), node)
+            for node in nodes
+            for r in range(replicas)
+        )
+        self._keys = [h for h, _ in self._ring]
+
+    def get_node(self, key) -> int:
+        idx = bisect.bisect(self._keys, _hash(str(key))) % len(self._keys)
+        return self._ring[idx][1]
+
+
+# --- Control channel ---
+async def ensure_control_table() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(TradingControl.__table__.create, checkfirst=True)
+
+
+async def set_trading_control(user_id: int, active: bool, trade_size_usdt: Optional[float] = None) -> None:
+    """UI tarafı: kullanıcının trade döngüsünü worker'lar için aç/kapat."""
+    session = await get_async_session()
+    try:
+        control = await session.get(TradingControl, user_id)
+        if control is None:
+            control = TradingControl(user_id=user_id)
+            session.add(control)
+        control.active = active
+        if trade_size_usdt is not None:
+            control.trade_size_usdt = trade_size_usdt
+        control.updated_at = datetime.utcnow()
+        await session.commit()
+    finally:
+        await session.close()
+
+
+def load_cipher() -> None:
+    """FERNET_KEY'i doğrular; eksik veya geçersizse açık bir mesajla RuntimeError."""
+    global _cipher
+    if USE_TESTNET:
+        return
+    key = os.getenv("FERNET_KEY")
+    if not key:
+        raise RuntimeError("FERNET_KEY tanımlı değil; kullanıcı API anahtarları çözülemez")
+    try:
+        _cipher = Fernet(key.encode())
+    except ValueError as e:
+        raise RuntimeError(f"FERNET_KEY geçersiz: {e}")
+
+
+def _decrypt_keys(user: User) -> User:
+    """DB'deki Fernet ile şifrelenmiş anahtarları çözer (main.py ile aynı anahtar)."""
+    if USE_TESTNET:
+        user.api_key = os.getenv("TESTNET_API_KEY")
+        user.api_secret = os.getenv("TESTNET_API_SECRET")
+        return user
+
+    def try_decrypt(val: str) -> str:
+        if not val:
+            return ""
+        try:
+            return _cipher.decrypt(val.encode()).decode()
+        except InvalidToken:
+            # zaten şifrelenmemiş
+            return val
+
+    user.api_key = try_decrypt(user.api_key)
+    user.api_secret = try_decrypt(user.api_secret)
+    return user
+
+
+async def _first_trade(user: User, trade_size_usdt: float) -> None:
+    try:
+        await trade_from_latest_prediction(user, trade_size_usdt)
+    except Exception as e:
+        print(f"[⚠️] İlk trade başarısız (user_id={user.id}): {e}")
+
+
+async def sync_shard(shard: int, ring: HashRing, since: Optional[datetime] = None) -> Dict[int, float]:
+    """
+    Kontrol tablosunu okuyup bu shard'a düşen aktif kullanıcıların
+    döngülerini başlatır/günceller, artık aktif olmayanları durdurur.
+    Kontrol kaydı `since`'ten sonra açılan (UI'da butona basılan) kullanıcılar
+    için ilk trade hemen burada yapılır; UI kendisi trade etmez.
+    """
+    session = await get_async_session()
+    try:
+        result = await session.execute(
+            select(User, TradingControl.trade_size_usdt, TradingControl.updated_at)
+            .join(TradingControl, TradingControl.user_id == User.id)
+            .where(TradingControl.active.is_(True))
+        )
+        rows = result.all()
+    finally:
+        await session.close()
+
+    wanted: Dict[int, float] = {}
+    for user, trade_size_usdt, updated_at in rows:
+        if ring.get_node(user.id) != shard:
+            continue
+        user = _decrypt_keys(user)
+        if not user.api_key or not user.api_secret:
+            continue
+        wanted[user.id] = trade_size_usdt
+        if user.id in background_jobs.active_users:
+            update_user_loop(user, trade_size_usdt)
+        else:
+            start_user_loop(user, trade_size_usdt)
+            if since is not None and updated_at is not None and updated_at >= since:
+                task = asyncio.create_task(_first_trade(user, trade_size_usdt))
+                _first_trades.add(task)
+                task.add_done_callback(_first_trades.discard)
+
+    for user_id in list(background_jobs.active_users):
+        if user_id not in wanted:
+            stop_user_loop(user_id)
+    return wanted
+
+
+async def worker_main(shard: int, num_shards: int, poll_interval: float = CONTROL_POLL_INTERVAL) -> None:
+    try:
+        load_cipher()
+    except RuntimeError as e:
+        print(f"[❌] Trading worker başlatılamadı: {e}")
+        raise SystemExit(1)
+    ring = HashRing(list(range(num_shards)))
+    started_at = datetime.utcnow()
+    await ensure_control_table()
+    # Yeniden başlatmada aynı tick'in emirleri tekrar gönderilmesin
+    try:
+        await order_journal.warm(datetime.utcnow() - timedelta(days=1))
+    except Exception as e:
+        print(f"[⚠️] Emir journal'ı okunamadı: {e}")
+    # Aynı makinede price_board feeder'ı çalışıyorsa fiyatlar REST yerine oradan okunur
+    board = open_price_board()
+    if board is not None:
+        price_source.attach_feed(board)
+    print(f"[✅] Trading worker başladı: shard={shard}/{num_shards} pid={os.getpid()}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    try:
+        while not stop.is_set():
+            try:
+                wanted = await sync_shard(shard, ring, since=started_at)
+                print(f"[ℹ️] shard={shard}: {len(wanted)} aktif kullanıcı")
+            except Exception as e:
+                print(f"[⚠️] shard={shard} kontrol tablosu okunamadı: {e}")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        for user_id in list(background_jobs.active_users):
+            stop_user_loop(user_id)
+        if _first_trades:
+            await asyncio.gather(*_first_trades, return_exceptions=True)
+        await order_journal.close()
+        await close_exchange_client()
+        await close_ws_sessions()
+        await engine.dispose()
+        print(f"[🛑] Trading worker durdu: shard={shard}")
+
+
+def run_worker(shard: int, num_shards: int) -> None:
+    asyncio.run(worker_main(shard, num_shards))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sharded trading worker pool")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="Toplam worker process sayısı (shard sayısı)")
+    parser.add_argument("--shard", type=int, default=None,
+                        help="Yalnızca bu shard'ı bu process'te çalıştır (ayrı makinelere dağıtmak için)")
+    args = parser.parse_args()
+
+    if args.shard is not None:
+        run_worker(args.shard, args.processes)
+        return
+
+    procs = [
+        multiprocessing.Process(target=run_worker, args=(i, args.processes), name=f"trading-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,21 @@ import threading
 import asyncio
 import hmac
 import hashlib
-import json
+import random
+import itertools
+import weakref
+import concurrent.futures
 from urllib.parse import urlencode
-from typing import List, Dict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
 import websockets
 import httpx
 from dotenv import load_dotenv
+from rate_limiter import rate_limiter, account_id
+from clock_sync import clock_sync
+from price_history import PriceHistory
+from ws_events import (
+    AccountUpdate, ListenKeyExpired, OrderTradeUpdate, decode_mark_price, decode_user_event,
+)
 
 # Load environment variables
 load_dotenv()
@@ -18,28 +27,40 @@ USE_TESTNET = os.getenv("USE_TESTNET", "False") == "True"
 # Set REST and WebSocket endpoints based on environment
 # For futures: REST at testnet.binancefuture.com or fapi.binance.com
 # WS at fstream.binancefuture.com or fstream.binance.com
-domain_rest = "https://testnet.binancefuture.com" if USE_TESTNET else "https://fapi.binance.com"
-domain_ws = "wss://fstream.binancefuture.com" if USE_TESTNET else "wss://fstream.binance.com"
+# BINANCE_REST_URL / BINANCE_WS_URL ile ör. yerel mock_exchange'e yönlendirilebilir
+domain_rest = os.getenv(
+    "BINANCE_REST_URL",
+    "https://testnet.binancefuture.com" if USE_TESTNET else "https://fapi.binance.com",
+)
+domain_ws = os.getenv(
+    "BINANCE_WS_URL",
+    "wss://fstream.binancefuture.com" if USE_TESTNET else "wss://fstream.binance.com",
+)
 
 # --- Utility functions ---
 def _get_server_time() -> int:
     """Fetch server time in milliseconds."""
     url = f"{domain_rest}/fapi/v1/time"
+    rate_limiter.acquire_sync(1)
     r = httpx.get(url, timeout=5)
+    rate_limiter.update_from_headers(r.headers, status_code=r.status_code)
     r.raise_for_status()
     return r.json().get("serverTime")
 
 
-def _signed_request(api_key: str, api_secret: str, path: str, params: dict) -> dict:
+def _signed_request(api_key: str, api_secret: str, path: str, params: dict, weight: float = 5) -> dict:
     """Make a signed request to REST API."""
-    server_ts = _get_server_time()
-    params["timestamp"] = server_ts
+    # Sunucu saati her istekte sorulmaz; ölçülmüş ofsetle yerelde hesaplanır
+    params["timestamp"] = clock_sync.timestamp_sync()
     params["recvWindow"] = 5000
     qs = urlencode(params, doseq=True)
     sig = hmac.new(api_secret.encode(), qs.encode(), hashlib.sha256).hexdigest()
     url = f"{domain_rest}{path}?{qs}&signature={sig}"
     headers = {"X-MBX-APIKEY": api_key}
+    account = account_id(api_key)
+    rate_limiter.acquire_sync(weight, account)
     resp = httpx.get(url, headers=headers, timeout=10)
+    rate_limiter.update_from_headers(resp.headers, account, resp.status_code)
     resp.raise_for_status()
     return resp.json()
 
@@ -49,7 +70,9 @@ def start_user_data_stream(api_key: str) -> str:
     """Start user data stream to get listenKey."""
     headers = {"X-MBX-APIKEY": api_key}
     url = f"{domain_rest}/fapi/v1/listenKey"
+    rate_limiter.acquire_sync(1)
     r = httpx.post(url, headers=headers, timeout=5)
+    rate_limiter.update_from_headers(r.headers, status_code=r.status_code)
     r.raise_for_status()
     return r.json().get("listenKey")
 
@@ -58,40 +81,364 @@ def keepalive_user_data_stream(api_key: str, listen_key: str) -> None:
     """Keepalive user data stream."""
     headers = {"X-MBX-APIKEY": api_key}
     url = f"{domain_rest}/fapi/v1/listenKey"
-    httpx.put(url, headers=headers, params={"listenKey": listen_key}, timeout=5)
+    rate_limiter.acquire_sync(1)
+    r = httpx.put(url, headers=headers, params={"listenKey": listen_key}, timeout=5)
+    rate_limiter.update_from_headers(r.headers, status_code=r.status_code)
+    r.raise_for_status()
+
+
+def _get_mark_prices() -> Dict[str, dict]:
+    """Tüm semboller için premiumIndex (tek istek, weight 10)."""
+    rate_limiter.acquire_sync(10)
+    r = httpx.get(f"{domain_rest}/fapi/v1/premiumIndex", timeout=5)
+    rate_limiter.update_from_headers(r.headers, status_code=r.status_code)
+    r.raise_for_status()
+    return {item["symbol"]: item for item in r.json()}
+
+
+# --- Stream supervisor ---
+# Yeniden bağlanma beklemesi: MIN * 2^deneme, MAX ile sınırlı, ±%50 jitter
+WS_RECONNECT_MIN_DELAY = float(os.getenv("WS_RECONNECT_MIN_DELAY", "0.5"))
+WS_RECONNECT_MAX_DELAY = float(os.getenv("WS_RECONNECT_MAX_DELAY", "30"))
+# Bu kadar süre mesaj gelmeyen market data bağlantısı ölü sayılır (markPrice 3 sn'de bir)
+WS_STALE_AFTER = float(os.getenv("WS_STALE_AFTER", "15"))
+# Binance bağlantıyı 24 saatte kapatır; ondan önce planlı yeniden bağlanılır
+WS_MAX_CONNECTION_AGE = float(os.getenv("WS_MAX_CONNECTION_AGE", str(23.5 * 3600)))
+# listenKey 60 dk'da düşer; bu aralıkla uzatılır
+LISTEN_KEY_KEEPALIVE = float(os.getenv("LISTEN_KEY_KEEPALIVE", str(30 * 60)))
+
+
+class StreamStats:
+    """Bir akışın tazelik ve bağlantı metrikleri."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.connected = False
+        self.connects = 0
+        self.reconnects = 0
+        self.stale_timeouts = 0
+        self.messages = 0
+        self.parse_errors = 0
+        self.last_message: Optional[float] = None    # time.time()
+        self.connected_since: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_resync: Optional[float] = None
+
+    def message_age(self, now: Optional[float] = None) -> float:
+        """Son mesajdan bu yana geçen süre (saniye); hiç mesaj yoksa inf."""
+        if self.last_message is None:
+            return float("inf")
+        return (now or time.time()) - self.last_message
+
+    def as_dict(self) -> dict:
+        now = time.time()
+        return {
+            "name": self.name,
+            "connected": self.connected,
+            "last_message_age": round(self.message_age(now), 3),
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "stale_timeouts": self.stale_timeouts,
+            "messages": self.messages,
+            "parse_errors": self.parse_errors,
+            "uptime": round(now - self.connected_since, 1) if self.connected and self.connected_since else 0.0,
+            "last_error": self.last_error,
+        }
+
+
+# Akış adı -> metrikler (process genelinde)
+stream_stats: Dict[str, StreamStats] = {}
+
+
+def get_stream_stats() -> List[dict]:
+    return [stats.as_dict() for stats in list(stream_stats.values())]
+
+
+def reconnect_delay(attempt: int) -> float:
+    base = min(WS_RECONNECT_MAX_DELAY, WS_RECONNECT_MIN_DELAY * (2 ** attempt))
+    return base * random.uniform(0.5, 1.5)
+
+
+class StreamSupervisor:
+    """
+    Bir WebSocket akışını ayakta tutar:
+      - kopma / hata / sunucu kapatması → jitter'lı üstel beklemeyle yeniden bağlanır
+      - stale_after boyunca mesaj gelmezse bağlantıyı ölü sayar ve yeniler
+      - WS_MAX_CONNECTION_AGE dolmadan planlı olarak yeniden bağlanır
+      - yeniden bağlandıktan sonra on_resync ile kaçırılan durumu REST'ten tamamlar
+    get_url: her bağlantıdan önce çağrılır (ör. listenKey yenilemek için).
+    on_message: False dönerse bağlantı kapatılıp yeniden açılır; yükselttiği hata
+    bağlantı hatası sayılmaz, loglanıp parse_errors'a eklenir.
+    """
+
+    def __init__(self, name: str, get_url: Callable[[], Awaitable[str]],
+                 on_message: Callable[[str], Optional[bool]],
+                 on_resync: Optional[Callable[[], Awaitable[None]]] = None,
+                 stale_after: Optional[float] = WS_STALE_AFTER):
+        self.get_url = get_url
+        self.on_message = on_message
+        self.on_resync = on_resync
+        self.stale_after = stale_after
+        self.stats = stream_stats[name] = StreamStats(name)
+        # Son bağlantıda en az bir mesaj alındı mı (backoff sayacını sıfırlamak için)
+        self._healthy = False
+
+    async def _session(self) -> bool:
+        """Tek bağlantı ömrü. Planlı kapanışta True döner (beklemeden yeniden bağlanılır)."""
+        url = await self.get_url()
+        async with websockets.connect(url, open_timeout=10) as ws:
+            stats = self.stats
+            stats.connected = True
+            stats.connects += 1
+            stats.connected_since = time.time()
+            if stats.connects > 1 and self.on_resync is not None:
+                try:
+                    await self.on_resync()
+                    stats.last_resync = time.time()
+                except Exception as e:
+                    print(f"⚠️ {stats.name} yeniden senkronizasyon hatası: {e}")
+            deadline = time.monotonic() + WS_MAX_CONNECTION_AGE
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return True
+                timeout = remaining if self.stale_after is None else min(self.stale_after, remaining)
+                try:
+                    msg = await asyncio.wait_for(ws.recv(), timeout)
+                except asyncio.TimeoutError:
+                    if time.monotonic() >= deadline:
+                        return True
+                    stats.stale_timeouts += 1
+                    raise ConnectionError(f"{self.stale_after:g}s boyunca mesaj gelmedi")
+                stats.messages += 1
+                stats.last_message = time.time()
+                self._healthy = True
+                try:
+                    if self.on_message(msg) is False:
+                        return True
+                except Exception as e:
+                    stats.parse_errors += 1
+                    print(f"⚠️ {stats.name} mesajı işlenemedi: {type(e).__name__}: {e}")
+
+    async def run(self) -> None:
+        stats = self.stats
+        attempt = 0
+        try:
+            while True:
+                planned = False
+                try:
+                    planned = await self._session()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    stats.last_error = f"{type(e).__name__}: {e}"
+                    print(f"⚠️ {stats.name} akışı koptu: {stats.last_error}")
+                if self._healthy:
+                    attempt = 0
+                    self._healthy = False
+                stats.connected = False
+                stats.reconnects += 1
+                if not planned:
+                    await asyncio.sleep(reconnect_delay(attempt))
+                    attempt += 1
+        finally:
+            stats.connected = False
+            stream_stats.pop(stats.name, None)
 
 
 # --- Public price WebSocket ---
-class BinanceWS:
-    def __init__(self):
+TRACKED_SYMBOLS = [
+    "BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT", "XRPUSDT",
+    "ADAUSDT", "AVAXUSDT", "DOGEUSDT", "DOTUSDT", "LINKUSDT",
+]
+MARK_PRICE_STREAMS = tuple(f"{sym.lower()}@markPrice" for sym in TRACKED_SYMBOLS)
+# Async abone kuyruğunun kapasitesi (dolunca en eski güncelleme atılır)
+MARKET_DATA_QUEUE_SIZE = int(os.getenv("MARKET_DATA_QUEUE_SIZE", "1000"))
+
+
+class _StreamConnection:
+    """
+    Bir stream kümesi için tek upstream combined-stream bağlantısı.
+    Son fiyatlar tüm abonelerle paylaşılan sözlüklerde tutulur.
+    """
+
+    def __init__(self, streams: Tuple[str, ...]):
+        self.streams = streams
+        # Sayısal değerler mesaj başına bir kez parse edilir (render'da float() gerekmez)
         self.latest_prices: Dict[str, float] = {}
-        threading.Thread(target=self._run, daemon=True).start()
-
-    async def _listen(self):
-        uri = (
-            f"{domain_ws}/stream?streams="
-            "btcusdt@markPrice/ethusdt@markPrice/"
-            "bnbusdt@markPrice/solusdt@markPrice/"
-            "xrpusdt@markPrice/adausdt@markPrice/"
-            "avaxusdt@markPrice/dogeusdt@markPrice/"
-            "dotusdt@markPrice/linkusdt@markPrice"
-        )
-        async with websockets.connect(uri) as ws:
-            while True:
-                msg = await ws.recv()
-                d = json.loads(msg).get("data", {})
-                if "s" in d and "p" in d:
-                    self.latest_prices[d["s"]] = d["p"]
+        # Her sembol için son güncellemenin yerel zamanı (time.time(), saniye)
+        self.latest_price_times: Dict[str, float] = {}
+        # Sembol başına sabit boyutlu fiyat geçmişi (sparkline, % değişim, volatilite)
+        self.history = PriceHistory()
+        # abone id -> callback(symbol, price, ts, event_time_ms); hub thread'inde çağrılır
+        self.listeners: Dict[int, Callable[[str, float, float, int], None]] = {}
+        self.refs = 0
+        self.task: Optional[concurrent.futures.Future] = None
 
-    def _run(self) -> None:
-        asyncio.run(self._listen())
+    def _publish(self, symbol: str, price: float, now: float, event_time: int) -> None:
+        self.latest_prices[symbol] = price
+        self.latest_price_times[symbol] = now
+        self.history.append(symbol, now, price)
+        for callback in list(self.listeners.values()):
+            try:
+                callback(symbol, price, now, event_time)
+            except Exception as e:
+                print(f"⚠️ Market data aboneliği hatası: {e}")
+
+    def _on_message(self, msg: str) -> None:
+        mark = decode_mark_price(msg)
+        if mark is not None:
+            self._publish(mark.symbol, mark.price, time.time(), mark.event_time)
+
+    async def _url(self) -> str:
+        return f"{domain_ws}/stream?streams={'/'.join(self.streams)}"
+
+    async def _resync(self) -> None:
+        """Kopukluk sırasında kaçırılan fiyatlar: tek premiumIndex çağrısı."""
+        items = await asyncio.to_thread(_get_mark_prices)
+        now = time.time()
+        symbols = {s.split("@")[0].upper() for s in self.streams if s.endswith("@markPrice")}
+        for sym in symbols & items.keys():
+            self._publish(sym, float(items[sym]["markPrice"]), now, int(items[sym].get("time", 0)))
+
+    async def run(self) -> None:
+        name = f"market:{len(self.streams)}:{hashlib.sha1('/'.join(self.streams).encode()).hexdigest()[:8]}"
+        await StreamSupervisor(name, self._url, self._on_message, self._resync).run()
+
+
+class MarketDataHub:
+    """
+    Process genelinde paylaşılan market data hub'ı.
+    Tek daemon thread + tek event loop; her farklı stream kümesi için tek upstream
+    bağlantı açılır ve referans sayılır. Son abone ayrılınca bağlantı kapanır.
+    Oturum sayısı ne olursa olsun thread/bağlantı sayısı sabit kalır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connections: Dict[Tuple[str, ...], _StreamConnection] = {}
+        self._ids = itertools.count(1)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="market-data-hub", daemon=True).start()
+            self._loop = loop
+        return self._loop
+
+    def _acquire(self, streams: Iterable[str],
+                 callback: Optional[Callable[[str, float, float, int], None]]) -> Tuple[_StreamConnection, int]:
+        key = tuple(sorted(set(streams)))
+        with self._lock:
+            loop = self._ensure_loop()
+            conn = self._connections.get(key)
+            if conn is None:
+                conn = self._connections[key] = _StreamConnection(key)
+                # Kilit tutulurken hub loop'u beklenmez (loop'taki _release de bu kilidi alır)
+                conn.task = asyncio.run_coroutine_threadsafe(conn.run(), loop)
+            conn.refs += 1
+            sub_id = next(self._ids)
+            if callback is not None:
+                conn.listeners[sub_id] = callback
+        return conn, sub_id
+
+    def _release(self, key: Tuple[str, ...], sub_id: int) -> None:
+        with self._lock:
+            conn = self._connections.get(key)
+            if conn is None:
+                return
+            conn.listeners.pop(sub_id, None)
+            conn.refs -= 1
+            if conn.refs <= 0:
+                del self._connections[key]
+                if conn.task is not None:
+                    conn.task.cancel()
+
+    def _release_later(self, key: Tuple[str, ...], sub_id: int) -> None:
+        """
+        GC finalizer'ı: kilidi almaz, bırakmayı hub loop'una sıralar. Finalizer kilidi
+        zaten tutan bir thread'de (ör. subscribe sırasında) çalışabilir.
+        """
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._release, key, sub_id)
+
+    def subscribe(self, streams: Iterable[str] = MARK_PRICE_STREAMS,
+                  callback: Optional[Callable[[str, float, float, int], None]] = None) -> "BinanceWS":
+        return BinanceWS(streams, callback, hub=self)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "connections": len(self._connections),
+                "subscribers": sum(c.refs for c in self._connections.values()),
+                "streams": [st for st in get_stream_stats() if st["name"].startswith("market:")],
+            }
+
+
+# Process genelinde paylaşılan hub
+market_data_hub = MarketDataHub()
+
+
+class BinanceWS:
+    """
+    Hub'daki paylaşılan akışa bir abonelik (oturum başına bir tane).
+    latest_prices / latest_price_times / history bağlantıyla ortaktır (kopya yok).
+      - callback: her güncellemede hub thread'inde çağrılır (hızlı olmalı)
+      - updates(): çağıran event loop'a bağlı asyncio.Queue ile async fan-out
+    close() çağrılmasa da nesne toplandığında abonelik bırakılır.
+    """
+
+    def __init__(self, streams: Iterable[str] = MARK_PRICE_STREAMS,
+                 callback: Optional[Callable[[str, float, float, int], None]] = None,
+                 hub: Optional[MarketDataHub] = None):
+        self._hub = hub or market_data_hub
+        self._queues: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        user_callback = callback
+        queues = self._queues
+
+        def fan_out(symbol: str, price: float, ts: float, event_time: int) -> None:
+            if user_callback is not None:
+                user_callback(symbol, price, ts, event_time)
+            for loop, queue in list(queues):
+                loop.call_soon_threadsafe(_put_latest, queue, (symbol, price, ts, event_time))
+
+        conn, sub_id = self._hub._acquire(streams, fan_out)
+        self.streams = conn.streams
+        self.latest_prices = conn.latest_prices
+        self.latest_price_times = conn.latest_price_times
+        self.history = conn.history
+        self._sub = (conn.streams, sub_id)
+        self._finalizer = weakref.finalize(self, self._hub._release_later, conn.streams, sub_id)
+
+    def updates(self, maxsize: int = MARKET_DATA_QUEUE_SIZE) -> asyncio.Queue:
+        """(symbol, price, ts, event_time) güncellemelerini çalışan event loop'a taşıyan kuyruk."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._queues.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def close(self) -> None:
+        self._queues.clear()
+        # Açık close() çağıranın thread'inde, hemen bırakır
+        if self._finalizer.detach() is not None:
+            self._hub._release(*self._sub)
+
+
+def _put_latest(queue: asyncio.Queue, item) -> None:
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
 
 
 def get_binance_ws() -> BinanceWS:
-    return BinanceWS()
+    return market_data_hub.subscribe()
 
 
 # --- Private user WebSocket for account updates ---
+_user_stream_ids = itertools.count(1)
+
+
 class BinanceUserWS:
     def __init__(self, api_key: str, api_secret: str):
         self.api_key = api_key
@@ -105,6 +452,12 @@ class BinanceUserWS:
 
         # Start user data stream
         self.listen_key = start_user_data_stream(self.api_key)
+        self._fresh_key = True
+        # User stream boşta mesaj göndermez: tazelik zaman aşımı yok, ölü bağlantıyı ping yakalar
+        self.supervisor = StreamSupervisor(
+            f"user:{account_id(api_key)}#{next(_user_stream_ids)}",
+            self._url, self._on_message, self._resync, stale_after=None,
+        )
         threading.Thread(target=self._run_stream, daemon=True).start()
         threading.Thread(target=self._refresh_loop, daemon=True).start()
 
@@ -116,23 +469,18 @@ class BinanceUserWS:
             amt = float(r.get("positionAmt", 0))
             if amt != 0:
                 new[r["symbol"]] = {
-                    "positionAmt": r["positionAmt"],
-                    "entryPrice": r["entryPrice"],
+                    "positionAmt": amt,
+                    "entryPrice": float(r["entryPrice"]),
                     "leverage": r["leverage"],
-                    "unRealizedProfit": r.get("unRealizedProfit", ""),
+                    "unRealizedProfit": float(r.get("unRealizedProfit") or 0),
                     "marginType": r.get("marginType", ""),
-                    "liquidationPrice": r.get("liquidationPrice", ""),
+                    "liquidationPrice": float(r.get("liquidationPrice") or 0),
                 }
         self.positions = new
 
     def _fetch_past_trades(self) -> None:
         """Fetch recent trades for predefined symbols."""
-        symbols = [
-            "BTCUSDT","ETHUSDT","BNBUSDT","SOLUSDT",
-            "XRPUSDT","ADAUSDT","AVAXUSDT","DOGEUSDT",
-            "DOTUSDT","LINKUSDT"
-        ]
-        for sym in symbols:
+        for sym in TRACKED_SYMBOLS:
             try:
                 trades = _signed_request(self.api_key, self.api_secret, "/fapi/v1/userTrades", {"symbol": sym, "limit": 500})
                 for t in trades:
@@ -161,45 +509,68 @@ class BinanceUserWS:
                 print(f"⚠️ Pozisyon yenileme hatası: {e}")
 
     async def _keepalive(self) -> None:
-        """Send keepalive every 30 minutes."""
+        """listenKey'i düzenli uzatır. Başarısızsa key düşer; listenKeyExpired ile akış yenilenir."""
         while True:
-            await asyncio.sleep(30 * 60)
-            keepalive_user_data_stream(self.api_key, self.listen_key)
+            await asyncio.sleep(LISTEN_KEY_KEEPALIVE)
+            try:
+                await asyncio.to_thread(keepalive_user_data_stream, self.api_key, self.listen_key)
+            except Exception as e:
+                print(f"⚠️ listenKey uzatılamadı: {e}")
+
+    async def _url(self) -> str:
+        # İlk bağlantıda __init__'te alınan key; sonrakilerde POST aktif key'i döner
+        # (ve süresini uzatır) ya da düşmüşse yenisini açar
+        if self._fresh_key:
+            self._fresh_key = False
+        else:
+            self.listen_key = await asyncio.to_thread(start_user_data_stream, self.api_key)
+        return f"{domain_ws}/ws/{self.listen_key}"
+
+    async def _resync(self) -> None:
+        """Kopukluk sırasında kaçırılan ACCOUNT_UPDATE'ler: pozisyonları REST'ten yenile."""
+        await asyncio.to_thread(self._refresh_positions)
+
+    def _on_message(self, msg: str) -> Optional[bool]:
+        """Apply typed user events; False → akışı yeni listenKey ile yeniden aç."""
+        ev = decode_user_event(msg)
+        if isinstance(ev, ListenKeyExpired):
+            return False
+        if isinstance(ev, AccountUpdate):
+            for p in ev.positions:
+                if p.amount != 0:
+                    old = self.positions.get(p.symbol, {})
+                    old.update({
+                        "positionAmt": p.amount,
+                        "entryPrice": p.entry_price,
+                        "unRealizedProfit": p.unrealized_pnl,
+                        "marginType": p.margin_type,
+                    })
+                    self.positions[p.symbol] = old
+                else:
+                    self.positions.pop(p.symbol, None)
+        elif isinstance(ev, OrderTradeUpdate) and ev.exec_type == "TRADE":
+            dt = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ev.trade_time / 1000))
+            self.trade_history.append({
+                "coin": ev.symbol,
+                "side": ev.side,
+                "quantity": ev.last_qty,
+                "price": ev.last_price,
+                "commission": f"{ev.commission} {ev.commission_asset}",
+                "time": dt
+            })
+        return None
 
     async def _listen(self) -> None:
-        """Listen to user account updates via WebSocket."""
-        uri = f"{domain_ws}/ws/{self.listen_key}"
-        async with websockets.connect(uri) as ws:
-            await asyncio.create_task(self._keepalive())
-            while True:
-                msg = await ws.recv()
-                ev = json.loads(msg)
-                if ev.get("e") == "ACCOUNT_UPDATE":
-                    for p in ev.get("a", {}).get("P", []):
-                        sym = p.get("s")
-                        amt = float(p.get("pa", 0))
-                        if amt != 0:
-                            old = self.positions.get(sym, {})
-                            old.update({
-                                "positionAmt": p.get("pa"),
-                                "entryPrice": p.get("ep"),
-                                "leverage": p.get("cr"),
-                                "unRealizedProfit": p.get("up"),
-                            })
-                            self.positions[sym] = old
-                        else:
-                            self.positions.pop(sym, None)
-                elif ev.get("e") == "ORDER_TRADE_UPDATE":
-                    o = ev.get("o", {})
-                    if o.get("x") == "TRADE":
-                        dt = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(o.get("T",0)/1000))
-                        self.trade_history.append({
-                            "coin": o.get("s"),
-                            "side": o.get("S"),
-                            "quantity": o.get("q"),
-                            "price": o.get("p"),
-                            "time": dt
-                        })
+        """Listen to user account updates via WebSocket (supervised)."""
+        keepalive = asyncio.create_task(self._keepalive())
+        try:
+            await self.supervisor.run()
+        finally:
+            keepalive.cancel()
+
+    @property
+    def stream_stats(self) -> StreamStats:
+        return self.supervisor.stats
 
     def _run_stream(self) -> None:
         asyncio.run(self._listen())
@@ -0,0 +1,199 @@
+# ws_events.py
+# Binance Futures WebSocket olaylarının tipli çözümü. Her olay tipi için alan
+# listesi bir kez derlenir; sayısal alanlar yalnızca burada, bir kez parse edilir.
+# orjson kuruluysa o, değilse stdlib json kullanılır.
+#
+#   python ws_events.py --n 200000      (eski json.loads + dict yürüme ile karşılaştırma)
+import json
+import time
+import argparse
+import importlib.util
+from operator import itemgetter
+from typing import NamedTuple, Optional, Tuple, Union
+
+if importlib.util.find_spec("orjson") is not None:
+    import orjson
+    loads = orjson.loads
+    JSON_BACKEND = "orjson"
+else:
+    loads = json.loads
+    JSON_BACKEND = "json"
+
+NAN = float("nan")
+
+
+class MarkPrice(NamedTuple):
+    symbol: str
+    price: float
+    event_time: int          # ms
+    index_price: float = NAN
+    funding_rate: float = NAN
+    next_funding_time: int = 0
+
+
+class PositionUpdate(NamedTuple):
+    symbol: str
+    amount: float
+    entry_price: float
+    unrealized_pnl: float
+    cum_realized: float
+    margin_type: str
+    position_side: str
+
+
+class AccountUpdate(NamedTuple):
+    event_time: int
+    reason: str
+    positions: Tuple[PositionUpdate, ...]
+
+
+class OrderTradeUpdate(NamedTuple):
+    event_time: int
+    symbol: str
+    client_order_id: str
+    side: str
+    order_type: str
+    exec_type: str           # NEW / TRADE / CANCELED / EXPIRED ...
+    status: str
+    order_id: int
+    quantity: float
+    avg_price: float
+    last_price: float
+    last_qty: float
+    cum_qty: float
+    commission: float
+    commission_asset: str
+    realized_pnl: float
+    trade_time: int
+
+
+class ListenKeyExpired(NamedTuple):
+    event_time: int
+
+
+UserEvent = Union[AccountUpdate, OrderTradeUpdate, ListenKeyExpired]
+
+# --- Derlenmiş şemalar ---
+_MARK_REQUIRED = itemgetter("s", "p", "E")
+_POSITION = itemgetter("s", "pa", "ep", "up", "cr", "mt", "ps")
+_ORDER = itemgetter("s", "c", "S", "o", "x", "X", "i", "q", "ap", "L", "l", "z")
+
+
+def _mark_price(d: dict) -> Optional[MarkPrice]:
+    try:
+        s, p, e = _MARK_REQUIRED(d)
+    except KeyError:
+        return None
+    i = d.get("i")
+    r = d.get("r")
+    return MarkPrice(s, float(p), e, float(i) if i else NAN, float(r) if r else NAN, d.get("T", 0))
+
+
+def decode_mark_price(msg: Union[str, bytes]) -> Optional[MarkPrice]:
+    """Combined stream ({"stream", "data"}) veya ham markPriceUpdate mesajı."""
+    d = loads(msg)
+    return _mark_price(d.get("data", d))
+
+
+def _position(p: dict) -> PositionUpdate:
+    try:
+        s, pa, ep, up, cr, mt, ps = _POSITION(p)
+    except KeyError:
+        s, pa, ep, up = p.get("s"), p.get("pa", 0), p.get("ep", 0), p.get("up", 0)
+        cr, mt, ps = p.get("cr", 0), p.get("mt", ""), p.get("ps", "BOTH")
+    return PositionUpdate(s, float(pa), float(ep), float(up), float(cr), mt, ps)
+
+
+def _order(ev: dict, o: dict) -> OrderTradeUpdate:
+    try:
+        s, c, side, typ, x, status, oid, q, ap, last_px, last_qty, cum_qty = _ORDER(o)
+    except KeyError:
+        # Bazı emir tipleri / expire olayları alanların bir kısmını göndermez
+        s, c, side, typ = o.get("s"), o.get("c", ""), o.get("S", ""), o.get("o", "")
+        x, status, oid = o.get("x", ""), o.get("X", ""), o.get("i", 0)
+        q, ap, last_px = o.get("q") or 0, o.get("ap") or 0, o.get("L") or 0
+        last_qty, cum_qty = o.get("l") or 0, o.get("z") or 0
+    n = o.get("n")
+    rp = o.get("rp")
+    return OrderTradeUpdate(
+        ev.get("E", 0), s, c, side, typ, x, status, oid, float(q), float(ap), float(last_px),
+        float(last_qty), float(cum_qty), float(n) if n else 0.0, o.get("N") or "",
+        float(rp) if rp else 0.0, o.get("T", 0),
+    )
+
+
+def decode_user_event(msg: Union[str, bytes]) -> Optional[UserEvent]:
+    """User data stream mesajı; tanınmayan olaylar için None."""
+    ev = loads(msg)
+    kind = ev.get("e")
+    if kind == "ACCOUNT_UPDATE":
+        a = ev.get("a") or {}
+        return AccountUpdate(ev.get("E", 0), a.get("m", ""), tuple(_position(p) for p in a.get("P") or ()))
+    if kind == "ORDER_TRADE_UPDATE":
+        return _order(ev, ev.get("o") or {})
+    if kind == "listenKeyExpired":
+        return ListenKeyExpired(ev.get("E", 0))
+    return None
+
+
+# --- Mikro benchmark ---
+def _sample_messages() -> dict:
+    now = int(time.time() * 1000)
+    return {
+        "markPrice": json.dumps({"stream": "btcusdt@markPrice", "data": {
+            "e": "markPriceUpdate", "E": now, "s": "BTCUSDT", "p": "65012.34000000",
+            "i": "65010.11000000", "P": "65020.00000000", "r": "0.00010000", "T": now + 3600_000,
+        }}),
+        "ACCOUNT_UPDATE": json.dumps({"e": "ACCOUNT_UPDATE", "E": now, "T": now, "a": {
+            "m": "ORDER", "B": [{"a": "USDT", "wb": "1000.0", "cw": "1000.0", "bc": "0"}],
+            "P": [{"s": sym, "pa": "0.010", "ep": "65000.0", "cr": "12.5", "up": "0.12",
+                   "mt": "cross", "iw": "0", "ps": "BOTH"} for sym in ("BTCUSDT", "ETHUSDT", "SOLUSDT")],
+        }}),
+        "ORDER_TRADE_UPDATE": json.dumps({"e": "ORDER_TRADE_UPDATE", "E": now, "T": now, "o": {
+            "s": "BTCUSDT", "c": "pt1-BTCUSDT-1767225600", "S": "BUY", "o": "MARKET", "f": "GTC",
+            "q": "0.010", "p": "0", "ap": "65012.3", "sp": "0", "x": "TRADE", "X": "FILLED",
+            "i": 123456789, "l": "0.010", "z": "0.010", "L": "65012.3", "N": "USDT", "n": "0.26",
+            "T": now, "t": 987654, "b": "0", "a": "0", "m": False, "R": False, "wt": "CONTRACT_PRICE",
+            "ot": "MARKET", "ps": "BOTH", "cp": False, "rp": "0",
+        }}),
+    }
+
+
+def _legacy(kind: str, msg: str):
+    """websocket_client'ın önceki yolu: json.loads + iç içe dict yürüme + render'da float()."""
+    if kind == "markPrice":
+        d = json.loads(msg).get("data", {})
+        if "s" in d and "p" in d:
+            return d["s"], float(d["p"])
+        return None
+    ev = json.loads(msg)
+    if ev.get("e") == "ACCOUNT_UPDATE":
+        return [(p.get("s"), float(p.get("pa", 0)), float(p.get("ep", 0)), float(p.get("up", 0)))
+                for p in ev.get("a", {}).get("P", [])]
+    o = ev.get("o", {})
+    return o.get("s"), o.get("S"), float(o.get("q", 0)), float(o.get("L", 0))
+
+
+def _bench(n: int) -> None:
+    decoders = {"markPrice": decode_mark_price, "ACCOUNT_UPDATE": decode_user_event,
+                "ORDER_TRADE_UPDATE": decode_user_event}
+    print(f"backend={JSON_BACKEND} n={n}")
+    for kind, msg in _sample_messages().items():
+        raw = msg.encode()
+        results = []
+        for label, fn, payload in (("legacy", lambda m: _legacy(kind, m), msg),
+                                   ("typed", decoders[kind], raw)):
+            t0 = time.perf_counter()
+            for _ in range(n):
+                fn(payload)
+            elapsed = time.perf_counter() - t0
+            results.append(n / elapsed)
+            print(f"  {kind:<19} {label:<6} {n / elapsed:>12,.0f} msg/s  {elapsed / n * 1e6:6.2f}µs/msg")
+        print(f"  {'':<19} speedup x{results[1] / results[0]:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WebSocket event decoding micro-benchmark")
+    parser.add_argument("--n", type=int, default=200_000)
+    args = parser.parse_args()
+    _bench(args.n)
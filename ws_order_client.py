@@ -0,0 +1,204 @@
+import os
+import json
+import asyncio
+import itertools
+from typing import Dict, Optional
+import websockets
+from dotenv import load_dotenv
+from binance_trader import create_signature, server_timestamp, send_binance_order, skipped_order
+from rate_limiter import rate_limiter, account_id
+
+# Load environment variables
+load_dotenv()
+USE_TESTNET = os.getenv("USE_TESTNET", "False") == "True"
+
+# Binance USDⓈ-M Futures WebSocket API
+WS_API_URL = os.getenv(
+    "BINANCE_WS_API_URL",
+    "wss://testnet.binancefuture.com/ws-fapi/v1" if USE_TESTNET else "wss://ws-fapi.binance.com/ws-fapi/v1",
+)
+WS_API_TIMEOUT = float(os.getenv("BINANCE_WS_API_TIMEOUT", "10"))
+
+
+class WSSessionUnavailable(Exception):
+    """İstek WebSocket üzerinden hiç gönderilemedi; REST'e düşmek güvenli."""
+
+
+class WSOrderSession:
+    """
+    Bir hesap için açık tutulan WebSocket API oturumu.
+    İstekler `id` ile eşleştirilir; aynı bağlantı üzerinden çok sayıda
+    emir eşzamanlı gönderilebilir.
+    """
+
+    def __init__(self, api_key: str, api_secret: str, url: str = WS_API_URL,
+                 timeout: float = WS_API_TIMEOUT):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.url = url
+        self.timeout = timeout
+        self.ws = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def connected(self) -> bool:
+        return (
+            self.ws is not None
+            and self._reader is not None
+            and not self._reader.done()
+            and self.loop is asyncio.get_running_loop()
+        )
+
+    async def connect(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._connect_lock is None or self.loop is not loop:
+            self._connect_lock = asyncio.Lock()
+            self.loop = loop
+        async with self._connect_lock:
+            if self.connected:
+                return
+            self.ws = await websockets.connect(self.url, open_timeout=self.timeout)
+            self._reader = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self) -> None:
+        try:
+            async for msg in self.ws:
+                data = json.loads(msg)
+                fut = self._pending.pop(str(data.get("id")), None)
+                if fut is not None and not fut.done():
+                    fut.set_result(data)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            # Yanıtı gelmemiş istekler: emir gitmiş olabilir, durum bilinmiyor
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(ConnectionError("WebSocket API bağlantısı yanıt gelmeden koptu"))
+            self._pending.clear()
+
+    def _sign(self, params: dict) -> dict:
+        params = dict(params, apiKey=self.api_key)
+        payload = "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+        params["signature"] = create_signature(payload, self.api_secret)
+        return params
+
+    async def request(self, method: str, params: dict, weight: float = 1, orders: int = 0) -> dict:
+        try:
+            if not self.connected:
+                await self.connect()
+        except Exception as e:
+            raise WSSessionUnavailable(str(e)) from e
+
+        await rate_limiter.acquire(weight, account_id(self.api_key), orders)
+        req_id = str(next(self._ids))
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = fut
+        try:
+            await self.ws.send(json.dumps({"id": req_id, "method": method, "params": self._sign(params)}))
+        except Exception as e:
+            self._pending.pop(req_id, None)
+            raise WSSessionUnavailable(str(e)) from e
+        try:
+            return await asyncio.wait_for(fut, self.timeout)
+        finally:
+            # Zaman aşımında da kayıt silinir; geç gelen yanıt bekleyeni olmayan future'ı çözmez
+            self._pending.pop(req_id, None)
+
+    async def place_order(self, symbol: str, side: str, quantity,
+                          client_order_id: Optional[str] = None) -> dict:
+        params = {
+            "symbol": symbol,
+            "side": side,
+            "type": "MARKET",
+            "quantity": str(quantity),
+            "timestamp": await server_timestamp(),
+        }
+        if client_order_id:
+            params["newClientOrderId"] = client_order_id
+        return await self.request("order.place", params, weight=1, orders=1)
+
+    async def close(self) -> None:
+        if self._reader and not self._reader.done():
+            self._reader.cancel()
+        if self.ws is not None:
+            await self.ws.close()
+        self.ws = None
+        self._reader = None
+
+
+# Hesap başına açık oturumlar
+_sessions: Dict[str, WSOrderSession] = {}
+
+
+def get_ws_session(api_key: str, api_secret: str) -> WSOrderSession:
+    key = account_id(api_key)
+    session = _sessions.get(key)
+    if session is None:
+        session = _sessions[key] = WSOrderSession(api_key, api_secret)
+    return session
+
+
+async def close_ws_sessions() -> None:
+    for session in list(_sessions.values()):
+        try:
+            await session.close()
+        except Exception:
+            pass
+    _sessions.clear()
+
+
+# --- Send Market Order over the WebSocket API, REST fallback ---
+async def send_order_ws(api_key: str, api_secret: str, symbol: str, side: str, quantity: float,
+                        client_order_id: Optional[str] = None):
+    """
+    send_binance_order ile aynı davranış ve dönüş biçimi, fakat emir açık
+    WebSocket API oturumu üzerinden `order.place` ile gönderilir.
+      - Precision (-1111) hatasında integer miktarla yeniden dener.
+      - PERCENT_PRICE (-4131) ve tekrar eden client order id (-4116) hatasında
+        skipped_order() sonucu döner.
+      - Oturum kurulamaz/istek gönderilemezse REST'e (send_binance_order) düşer.
+    İstek gönderildikten sonra bağlantı koparsa emir durumu bilinmediği için
+    çift emir riskine karşı REST'e düşülmez, hata yükseltilir.
+    """
+    session = get_ws_session(api_key, api_secret)
+    qty_to_try = quantity
+
+    while True:
+        try:
+            resp = await session.place_order(symbol, side, qty_to_try, client_order_id)
+        except WSSessionUnavailable as e:
+            print(f"[WARN] {symbol}: WebSocket API unavailable ({e}), falling back to REST.")
+            return await send_binance_order(api_key, api_secret, symbol, side, qty_to_try, client_order_id)
+
+        # Başarılı
+        if resp.get("status") == 200:
+            data = resp.get("result", {})
+            print(f"[ORDER RESPONSE] {symbol} {side} qty={qty_to_try} → {data}")
+            return data
+
+        error = resp.get("error", {})
+        code = error.get("code")
+
+        # 1) Precision hatası: tam sayıya düşürüp yeniden dene
+        if code == -1111 and qty_to_try != int(qty_to_try):
+            fallback = int(qty_to_try)
+            print(f"[WARN] {symbol} precision error ({quantity}), retrying with integer qty={fallback}")
+            qty_to_try = fallback
+            continue
+
+        # 2) PERCENT_PRICE hatası: emri atla
+        if code == -4131:
+            print(f"[WARN] {symbol} {side}: PERCENT_PRICE filter limit, skipping order.")
+            return skipped_order(code, error.get("msg"))
+
+        # 3) Aynı client order id ile emir zaten verilmiş
+        if code == -4116:
+            print(f"[WARN] {symbol} {side}: duplicate clientOrderId {client_order_id}, skipping order.")
+            return skipped_order(code, error.get("msg"))
+
+        # Diğer hatalar: yükselt
+        raise RuntimeError(f"Order failed: {error or resp}")